@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Agrégations des sections du dashboard
+Objectifs :
+- Calculer les indicateurs clés et les agrégats de chaque section (offres, pays, paiements,
+  opérateurs, temps, âges) sans dépendre de Streamlit
+- Servir à la fois au dashboard et aux rapports hors ligne (rapports_hors_ligne.py)
+- Redresser les comptes par les poids d'échantillonnage en aperçu rapide (marges à 95 %)
+"""
+
+import pandas as pd
+
+from echantillonnage import estimer_comptes, estimer_total, moyenne_estimee
+
+ORDRE_JOURS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+JOURS_FR = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
+
+
+def indicateurs_cles(df):
+    """
+    Total des réponses (et marge), nombre de pays, âge moyen et pack le plus choisi (None si indisponible)
+    """
+    total, marge = estimer_total(df)
+    age_moyen = moyenne_estimee(df, 'age') if 'age' in df.columns and df['age'].notna().any() else None
+    pack_populaire = None
+    if 'type_pack' in df.columns and len(df) > 0:
+        pack_counts, _ = estimer_comptes(df, 'type_pack')
+        pack_populaire = pack_counts.index[0] if len(pack_counts) > 0 else None
+    return {
+        'total': total,
+        'marge': marge,
+        'nb_pays': df['pays'].nunique() if 'pays' in df.columns else None,
+        'age_moyen': age_moyen,
+        'pack_populaire': pack_populaire,
+    }
+
+
+def indicateurs_rapides(df):
+    """
+    Indicateurs de la passe rapide, calculés sur les seules colonnes horodateur et pays
+    avant validation et dédoublonnage : nombre de lignes, bornes de dates, pays distincts
+    """
+    dates = df['horodateur'].dropna() if 'horodateur' in df.columns else pd.Series(dtype='datetime64[ns]')
+    return {
+        'lignes': len(df),
+        'date_min': dates.min() if len(dates) else None,
+        'date_max': dates.max() if len(dates) else None,
+        'nb_pays': df['pays'].nunique() if 'pays' in df.columns else None,
+    }
+
+def agreger_offres(df):
+    """
+    Inscrits par pack et prix moyen par pack (None sans colonne de prix)
+    """
+    pack_counts, _ = estimer_comptes(df, 'type_pack')
+    prix_moyen_pack = None
+    if len(pack_counts) > 0 and 'prix_pack_fcfa' in df.columns:
+        prix_moyen_pack = moyenne_estimee(df, 'prix_pack_fcfa', par='type_pack').round(0)
+    return pack_counts, prix_moyen_pack
+
+
+def details_packs(df, pack_counts=None, prix_moyen_pack=None):
+    """
+    Tableau nombre d'inscrits et prix moyen/min/max par pack
+    """
+    pack_stats = df.groupby('type_pack').agg({
+        'type_pack': 'count',
+        'prix_pack_fcfa': ['mean', 'min', 'max']
+    }).round(0)
+    pack_stats.columns = ['Nombre d\'inscrits', 'Prix moyen (FCFA)', 'Prix min (FCFA)', 'Prix max (FCFA)']
+    if 'poids' in df.columns:
+        # Aperçu rapide : effectifs et moyennes redressés par les poids d'échantillonnage
+        pack_stats['Nombre d\'inscrits'] = pack_counts
+        pack_stats['Prix moyen (FCFA)'] = prix_moyen_pack
+    return pack_stats
+
+
+def agreger_pays(df, top=10):
+    """
+    Les `top` pays les plus représentés (variantes de Côte d'Ivoire regroupées) et leurs marges
+    """
+    df_pays = df.copy()
+    df_pays.loc[df_pays['pays'].str.contains('ivoire', case=False), 'pays'] = 'Côte d\'Ivoire'
+    pays_counts, marges = estimer_comptes(df_pays, 'pays')
+    pays_counts = pays_counts.head(top)
+    marges = marges.reindex(pays_counts.index) if marges is not None else None
+    return pays_counts, marges
+
+
+def agreger_paiements(df):
+    """
+    Réponses par méthode de paiement et leurs marges
+    """
+    return estimer_comptes(df, 'methode_paiement_std')
+
+
+def agreger_operateurs(df, top=10):
+    """
+    Numéros par pays et opérateur pour les `top` pays, et parts en % par pays ((None, None) sans opérateur)
+    """
+    if 'operateur' not in df.columns or not df['operateur'].notna().any():
+        return None, None
+    avec_operateur = df[df['operateur'].notna()]
+    top_pays = estimer_comptes(avec_operateur, 'pays')[0].head(top).index
+    poids = avec_operateur['poids'] if 'poids' in avec_operateur.columns else pd.Series(1.0, index=avec_operateur.index)
+    comptes = pd.crosstab(avec_operateur['pays'], avec_operateur['operateur'],
+                          values=poids, aggfunc='sum').fillna(0).round(0).loc[top_pays]
+    parts = (comptes.div(comptes.sum(axis=1), axis=0) * 100).round(1)
+    return comptes, parts
+
+
+def parts_operateurs_longues(parts):
+    """
+    Parts au format long (pays, operateur, part) attendu par figure_parts_operateurs
+    """
+    donnees = parts.stack().rename('part').reset_index()
+    return donnees[donnees['part'] > 0]
+
+
+def comptes_par_heure(df):
+    """
+    Inscriptions par heure de la journée (colonnes heure, count)
+    """
+    heures = df.assign(heure=df['horodateur'].dt.hour)
+    return estimer_comptes(heures, 'heure')[0].sort_index().rename('count').rename_axis('heure').reset_index()
+
+
+def comptes_par_jour_semaine(df):
+    """
+    Inscriptions par jour de la semaine, du lundi au dimanche (index en français)
+    """
+    jours = df.assign(jour_semaine=df['horodateur'].dt.day_name())
+    weekly_counts = estimer_comptes(jours, 'jour_semaine')[0].reindex(ORDRE_JOURS)
+    weekly_counts.index = JOURS_FR
+    return weekly_counts
+
+
+def agreger_tranches(df):
+    """
+    Réponses par tranche d'âge (ordre des tranches) et leurs marges
+    """
+    tranches_counts, marges = estimer_comptes(df, 'tranche_age')
+    tranches_counts = tranches_counts.sort_index()
+    marges = marges.reindex(tranches_counts.index) if marges is not None else None
+    return tranches_counts, marges
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Colonnes texte en chaînes Arrow pour le nettoyage
+Objectifs :
+- Convertir les colonnes texte en chaînes Arrow (NaN pour les manquants) : strip, casse,
+  remplacements et recherches passent par les noyaux de calcul Arrow au lieu d'objets Python
+- Mettre les dates en texte avec le noyau strftime d'Arrow
+- Replier les accents (translittération ASCII), commun au renommage des colonnes et à l'index
+  des réponses libres
+- Revenir à des colonnes object (chaînes Python) quand pyarrow n'est pas installé
+- Mesurer le gain par étape du nettoyage, en temps et en mémoire
+  (python chaines_arrow.py [nb_lignes])
+"""
+
+import sys
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from unidecode import unidecode
+
+# Format des dates des fichiers nettoyés : écrit par le nettoyage, relu par le dashboard
+FORMAT_DATE = '%d/%m/%Y %H:%M:%S'
+
+
+@lru_cache(maxsize=None)
+def dtype_chaines():
+    """
+    Type pandas des chaînes Arrow avec NaN pour les manquants (comme les colonnes object).
+    None si pandas ou pyarrow ne le proposent pas : les colonnes restent en object.
+    """
+    essais = (lambda: pd.StringDtype('pyarrow', na_value=np.nan),  # pandas >= 2.3
+              lambda: pd.StringDtype('pyarrow_numpy'))              # pandas 2.1 et 2.2
+    for essai in essais:
+        try:
+            return essai()
+        except (TypeError, ValueError, ImportError):
+            continue
+    return None
+
+
+def en_chaines(serie):
+    """
+    Colonne convertie en chaînes (Arrow si possible) ; les valeurs non textuelles (nombres, dates)
+    passent par str(), les manquants restent NaN
+    """
+    dtype = dtype_chaines()
+    if dtype is not None:
+        return serie if serie.dtype == dtype else serie.astype(dtype)
+    return serie.where(serie.isna(), serie.astype(str)).astype(object)
+
+
+def replier_accents(texte):
+    """
+    Texte sur une seule ligne, translittéré en ASCII (accents et caractères spéciaux repliés)
+    """
+    return unidecode(str(texte).replace('\n', ' ').replace('\r', ' '))
+
+
+def formater_dates(dates, format):
+    """
+    Dates (datetime64, à la seconde) mises en texte : noyau strftime d'Arrow si possible,
+    sinon strftime de pandas. Les dates manquantes restent NaN.
+    """
+    dtype = dtype_chaines()
+    if dtype is None:
+        return dates.dt.strftime(format)
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    secondes = pa.array(dates.to_numpy(dtype='datetime64[s]'), from_pandas=True)
+    textes = pc.strftime(secondes, format=format)
+    return pd.Series(textes.to_pandas(types_mapper={textes.type: dtype}.get).array, index=dates.index)
+
+
+def _export_synthetique(nb_lignes):
+    """
+    Export brut simulé : dates en plusieurs formats, téléphones, pays et packs écrits à la main
+    """
+    generateur = np.random.default_rng(0)
+    secondes = generateur.integers(0, 400 * 86400, nb_lignes)
+    dates = pd.Timestamp('2024-05-01') + pd.to_timedelta(secondes, unit='s')
+    horodateurs = np.where(generateur.random(nb_lignes) < 0.8, dates.strftime('%d/%m/%Y %H:%M:%S'),
+                           dates.strftime('%Y-%m-%d'))
+    telephones = np.array([f"+{indicatif} {numero:08d}" for indicatif, numero in
+                           zip(generateur.choice([225, 237, 229, 228, 243], 20000),
+                               generateur.integers(10**7, 10**8, 20000))], dtype=object)
+    pays = np.array(['Cameroun', ' cote d\'ivoire', 'Côte d\'Ivoire ', 'BENIN', 'Burkina', 'togo', 'Rdc',
+                     'Congo Brazzaville', 'sénégal', 'Mali ', np.nan], dtype=object)
+    packs = np.array(['pack premium', ' Pack Essentiel ', 'PACK STANDARD', 'pack avantage', np.nan], dtype=object)
+    return pd.DataFrame({
+        'horodateur': horodateurs.astype(object),
+        'numero_de_telephone': telephones[generateur.integers(0, len(telephones), nb_lignes)],
+        'pays': pays[generateur.integers(0, len(pays), nb_lignes)],
+        'type_pack': packs[generateur.integers(0, len(packs), nb_lignes)],
+        'colonne_vide': np.full(nb_lignes, np.nan, dtype=object),
+    })
+
+
+def benchmark(nb_lignes=200_000):
+    """
+    Durée de chaque étape du nettoyage cellule par cellule (avant) et sur chaînes Arrow (après),
+    puis mémoire des colonnes nettoyées en object et en chaînes Arrow
+    """
+    import nettoyage_formulaire as nf
+
+    df = _export_synthetique(nb_lignes)
+    etapes = [
+        ('Colonnes vides',
+         lambda: [c for c in df.columns if df[c].isna().all() or (df[c].astype(str).str.strip() == '').all()],
+         lambda: nf.detecter_colonnes_vides(df)),
+        ('Dates', lambda: df['horodateur'].apply(nf.uniformiser_date), lambda: nf.uniformiser_dates(df['horodateur'])),
+        ('Téléphones', lambda: df['numero_de_telephone'].apply(nf.nettoyer_telephone),
+         lambda: nf.nettoyer_telephones(df['numero_de_telephone'])),
+        ('Pays', lambda: df['pays'].apply(nf.standardiser_pays), lambda: nf.standardiser_noms_pays(df['pays'])),
+        ('Packs', lambda: df['type_pack'].astype(str).str.strip().str.title().replace('Nan', np.nan),
+         lambda: nf.standardiser_packs(df['type_pack'])),
+    ]
+
+    print(f"⏱️ Nettoyage de {nb_lignes} lignes synthétiques "
+          f"({'chaînes Arrow' if dtype_chaines() is not None else 'pyarrow absent : chaînes object'})")
+    print(f"  {'Étape':<16}{'avant (ms)':>12}{'après (ms)':>12}{'gain':>8}")
+    resultats = {}
+    for nom, avant, apres in etapes:
+        durees = []
+        for fonction in (avant, apres):
+            debut = time.perf_counter()
+            resultats[nom] = fonction()
+            durees.append(time.perf_counter() - debut)
+        print(f"  {nom:<16}{durees[0] * 1000:>12.1f}{durees[1] * 1000:>12.1f}{durees[0] / durees[1]:>7.1f}x")
+
+    print(f"\n💾 Mémoire des colonnes nettoyées")
+    for nom in ['Dates', 'Téléphones', 'Pays', 'Packs']:
+        colonne = resultats[nom]
+        objets = colonne.astype(object).memory_usage(deep=True, index=False)
+        arrow = en_chaines(colonne).memory_usage(deep=True, index=False)
+        print(f"  {nom:<16}{objets / 2**20:>9.1f} Mo en object, {arrow / 2**20:>6.1f} Mo en chaînes "
+              f"({1 - arrow / objets:.0%} de moins)")
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Chargement du jeu de données en arrière-plan
+Objectifs :
+- Lire, nettoyer et dédoublonner les données dans un thread : la page (titre, barre latérale,
+  filtres) s'affiche sans attendre la fin du chargement
+- Publier des résultats intermédiaires (indicateurs de la passe rapide) pendant que
+  le chargement complet se poursuit
+- Ne pas dépendre de Streamlit : seuls les résultats sont lus par le script du dashboard
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Un chargement par politique de dédoublonnage au plus en même temps
+NB_THREADS_CHARGEMENT = 2
+
+
+def creer_executeur():
+    return ThreadPoolExecutor(max_workers=NB_THREADS_CHARGEMENT, thread_name_prefix="chargement")
+
+
+class ChargementArrierePlan:
+    """
+    Exécute fonction(*args, publier=..., **kwargs) dans l'exécuteur donné.
+    publier(cle, valeur) rend un résultat intermédiaire lisible dans partiels avant la fin.
+    """
+
+    def __init__(self, executeur, fonction, *args, **kwargs):
+        self.partiels = {}
+        self.debut = time.monotonic()
+        self._futur = executeur.submit(fonction, *args, publier=self.partiels.__setitem__, **kwargs)
+
+    def termine(self):
+        return self._futur.done()
+
+    def apres(self, rappel):
+        """
+        Appelle rappel() à la fin du chargement (succès ou échec), dans le thread de chargement
+        """
+        self._futur.add_done_callback(lambda futur: rappel())
+
+    def resultat(self):
+        """
+        Résultat du chargement (relève l'exception du thread en cas d'échec)
+        """
+        return self._futur.result()
+
+    def duree(self):
+        return time.monotonic() - self.debut
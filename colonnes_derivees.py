@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Colonnes dérivées du formulaire
+Objectifs :
+- Extraire le type de pack et son prix des réponses « Pack Premium à 90 000 fcfa » :
+  une expression régulière compilée appliquée aux seules réponses distinctes, puis reportée sur les lignes
+- Calculer l'âge à la date de la réponse (date de naissance et horodateur), sans boucle Python
+- Ranger les âges dans les tranches par recherche dichotomique sur les bornes
+- Mesurer le coût de l'étape (python colonnes_derivees.py [nb_lignes])
+"""
+
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from chaines_arrow import FORMAT_DATE
+
+# « Pack Essentiel à 15 000 fcfa » : type après « pack », prix avec séparateurs de milliers éventuels
+MOTIF_OFFRE = re.compile(r'pack\s+(?P<type>[^\W\d_]+)\D*?(?P<prix>\d[\d\s.,  ]*)', re.IGNORECASE)
+
+# Tranches d'âge : bornes inférieures (incluses) des tranches à partir de la deuxième
+BORNES_TRANCHES = np.array([18, 25, 30, 35, 40])
+LIBELLES_TRANCHES = ['<18', '18-25', '25-30', '30-35', '35-40', '40+']
+
+
+def extraire_offres(offres):
+    """
+    (type_pack, prix_pack_fcfa) de chaque réponse ; NaN si la réponse ne décrit pas un pack.
+    Le motif n'est évalué qu'une fois par réponse distincte, les résultats sont reportés par code.
+    """
+    codes, distinctes = pd.factorize(offres)
+    types = np.full(len(distinctes) + 1, None, dtype=object)
+    prix = np.full(len(distinctes) + 1, np.nan)
+    for i, offre in enumerate(distinctes):
+        trouve = MOTIF_OFFRE.search(str(offre))
+        if trouve:
+            types[i] = trouve.group('type').title()
+            prix[i] = float(re.sub(r'\D', '', trouve.group('prix')))
+    # Le code -1 (réponse manquante) désigne la dernière case, restée vide
+    codes_types, categories = pd.factorize(types)
+    return (pd.Series(pd.Categorical.from_codes(codes_types[codes], categories), index=offres.index),
+            pd.Series(prix[codes], index=offres.index))
+
+
+def _annees_et_jours(dates):
+    """
+    Année civile et rang du jour dans l'année de chaque date, en arithmétique entière sur
+    les jours depuis 1970 (algorithme « civil from days », années commençant au 1er mars).
+    Le rang suit un calendrier bissextile (1er janvier = 0, 29 février = 59, 1er mars = 60) :
+    deux dates de même mois et même jour ont le même rang, quelle que soit l'année.
+    """
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, format=FORMAT_DATE, errors='coerce')
+    jours = dates.to_numpy(dtype='datetime64[D]')
+    manquantes = np.isnat(jours)
+    z = jours.view(np.int64) + 719468
+    ere = z // 146097
+    jour_ere = z - ere * 146097
+    annee_ere = (jour_ere - jour_ere // 1460 + jour_ere // 36524 - jour_ere // 146096) // 365
+    # Rang depuis le 1er mars : janvier et février (rangs 306 et plus) sont la fin de l'année mars-février
+    rangs_mars = jour_ere - (365 * annee_ere + annee_ere // 4 - annee_ere // 100)
+    janvier_fevrier = rangs_mars >= 306
+    annees = annee_ere + ere * 400 + janvier_fevrier
+    rangs = np.where(janvier_fevrier, rangs_mars - 306, rangs_mars + 60)
+    return annees, rangs, manquantes
+
+
+def calculer_ages(naissance, reference):
+    """
+    Âge en années révolues à la date de référence (NaN si une des deux dates manque)
+    """
+    annees_n, cles_n, manquantes_n = _annees_et_jours(naissance)
+    annees_r, cles_r, manquantes_r = _annees_et_jours(reference)
+    # Une année de moins si l'anniversaire n'est pas encore passé dans l'année de référence
+    ages = (annees_r - annees_n - (cles_r < cles_n)).astype(float)
+    ages[manquantes_n | manquantes_r] = np.nan
+    return pd.Series(ages, index=naissance.index)
+
+
+def tranches_age(ages):
+    """
+    Tranche de chaque âge (NaN si l'âge manque)
+    """
+    valeurs = ages.to_numpy(dtype=float)
+    codes = np.searchsorted(BORNES_TRANCHES, valeurs, side='right')
+    codes[np.isnan(valeurs)] = -1
+    return pd.Series(pd.Categorical.from_codes(codes, LIBELLES_TRANCHES), index=ages.index)
+
+
+def deriver_colonnes(df, col_offre='quelle_offre_choisis_-tu', col_naissance='date_de_naissance',
+                     col_horodateur='horodateur'):
+    """
+    Ajoute type_pack, prix_pack_fcfa, age et tranche_age quand leurs colonnes sources existent
+    """
+    if col_offre in df.columns:
+        df['type_pack'], df['prix_pack_fcfa'] = extraire_offres(df[col_offre])
+    if col_naissance in df.columns and col_horodateur in df.columns:
+        df['age'] = calculer_ages(df[col_naissance], df[col_horodateur])
+        df['tranche_age'] = tranches_age(df['age'])
+    return df
+
+
+def benchmark(nb_lignes=1_000_000, repetitions=3):
+    """
+    Durée de l'étape sur nb_lignes réponses synthétiques (dates déjà converties)
+    """
+    generateur = np.random.default_rng(0)
+    offres = np.array([f"Pack {t} à {p:,} fcfa".replace(',', ' ')
+                       for t, p in [('Essentiel', 15000), ('Standard', 20000), ('Premium', 45000),
+                                    ('Avantage', 30000), ('Premium', 90000)]] + [np.nan], dtype=object)
+    horodateur = pd.Timestamp('2024-05-01') + pd.to_timedelta(generateur.integers(0, 400 * 86400, nb_lignes), unit='s')
+    naissance = pd.Timestamp('1970-01-01') + pd.to_timedelta(generateur.integers(0, 40 * 365, nb_lignes), unit='D')
+    naissance = naissance.where(generateur.random(nb_lignes) > 0.3)
+    df = pd.DataFrame({'quelle_offre_choisis_-tu': offres[generateur.integers(0, len(offres), nb_lignes)],
+                       'date_de_naissance': naissance, 'horodateur': horodateur})
+
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        deriver_colonnes(df.copy())
+        durees.append(time.perf_counter() - debut)
+    print(f"⏱️ {nb_lignes} lignes : {min(durees) * 1000:.1f} ms "
+          f"({min(durees) * 1000 * 1_000_000 / nb_lignes:.1f} ms par million de lignes)")
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
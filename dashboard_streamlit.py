@@ -7,15 +7,51 @@ Visualisations des métriques clés
 
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
-from datetime import datetime, timedelta
-import folium
-from streamlit_folium import st_folium
+from datetime import datetime
+import os
+import time
+import uuid
+from agregations import (agreger_offres, agreger_operateurs, agreger_paiements, agreger_pays, agreger_tranches,
+                         comptes_par_heure, comptes_par_jour_semaine, details_packs, indicateurs_cles,
+                         indicateurs_rapides, parts_operateurs_longues)
+from chargement_arriere_plan import ChargementArrierePlan, creer_executeur
+from detection_anomalies import FICHIER_ALERTES, DetecteurAnomalies, decrire_alerte
+from echantillonnage import EchantillonStratifie, estimer_total
+from hierarchie_geographique import CENTRES, NIVEAUX, HierarchieGeographique, cumuls_geographiques, enfants
+from index_temporel import PAS, IndexTemporel, segment, sommes_prefixes
+from index_texte import COLONNES_TEXTE_LIBRE, IndexTexte
+from index_tri import IndexTri
+from jeu_de_donnees import COLONNES_DASHBOARD, JeuDeDonnees, preparer_donnees
+from jeu_partage import VARIABLE_JEU_PARTAGE, ouvrir_jeu_partage
+from prechauffage import noter_etat_processus
+from registre_campagnes import (CAMPAGNE_PRINCIPALE, FICHIER_CAMPAGNES, CacheCampagnes, lire_registre,
+                                suffixe_campagne)
+from lecteur_excel import lire_excel, nombre_lignes_classeur
+from surveillance_fichiers import SurveillantFichiers
+from suivi_performance import FICHIER_TRACES, SuiviExecution, noter_execution
+
+# Les modules lourds (Plotly via graphiques.py, Folium) sont importés à la première
+# section qui les utilise, pour que la page s'affiche plus vite au démarrage
+
+# Fichier source et dossier de dépôt des nouveaux exports
+FICHIER_DONNEES = "Formulaire_FINAL_OPTIMISE.xlsx"
+DOSSIER_DEPOT = "depot"
+FICHIER_QUARANTAINE = "quarantaine.csv"
+
+# Mode multi-processus (lancer_dashboard.py N) : jeu de données publié par le lanceur
+CHEMIN_JEU_PARTAGE = os.environ.get(VARIABLE_JEU_PARTAGE)
+
+# Au-delà de ce nombre de lignes, l'aperçu rapide (échantillon stratifié) est activé par défaut
+SEUIL_APERCU = 200000
+
+# Délai (en secondes) entre deux rafraîchissements de la page pendant le chargement
+INTERVALLE_CHARGEMENT = 0.3
+
+# Fenêtre (en jours) en dessous de laquelle la courbe des inscriptions passe au détail horaire
+JOURS_DETAIL_HORAIRE = 14
+
+# Colonnes affichées par défaut dans l'explorateur des réponses
+COLONNES_EXPLORATEUR = ['horodateur', 'nom', 'prenom', 'pays', 'type_pack', 'prix_pack_fcfa', 'methode_paiement_std']
 
 # Configuration de la page AMÉLIORÉE
 st.set_page_config(
@@ -30,19 +66,8 @@ st.set_page_config(
     }
 )
 
-# Import et injection du CSS personnalisé
-def load_css():
-    """Charge et injecte le CSS personnalisé"""
-    try:
-        with open('styles.css', 'r', encoding='utf-8') as f:
-            css = f.read()
-        st.html(f"<style>{css}</style>")
-    except FileNotFoundError:
-        st.warning("⚠️ Fichier styles.css non trouvé. Design par défaut utilisé.")
-
-# CSS personnalisé (fallback si le fichier externe n'existe pas)
-st.markdown("""
-<style>
+# CSS personnalisé de secours (utilisé si le fichier externe n'existe pas)
+CSS_SECOURS = """
     .main-header {
         font-size: 3rem;
         color: #1f77b4;
@@ -70,69 +95,162 @@ st.markdown("""
         color: #666;
         margin-bottom: 0.5rem;
     }
-</style>
-""", unsafe_allow_html=True)
+"""
 
-@st.cache_data
-def charger_donnees():
-    """
-    Charge les données nettoyées avec validation
-    """
+@st.cache_resource
+def lire_css(chemin='styles.css'):
+    """Lit le CSS personnalisé une seule fois par processus (None si absent)"""
     try:
-        df = pd.read_excel("Formulaire_FINAL_OPTIMISE.xlsx")
-        
-        # Force la standardisation des noms de pays dès le chargement
-        pays_mapping = {
-            'Côte D\'Ivoire': 'Côte d\'Ivoire',
-            'Cote d\'Ivoire': 'Côte d\'Ivoire',
-            'Cote D\'Ivoire': 'Côte d\'Ivoire',
-            'COTE D\'IVOIRE': 'Côte d\'Ivoire',
-            'Côte d\'ivoire': 'Côte d\'Ivoire',
-            'Cote d\'ivoire': 'Côte d\'Ivoire'
-        }
-        
-        # Nettoyage et validation des données
-        # Convertir les dates
-        if 'horodateur' in df.columns:
-            df['horodateur'] = pd.to_datetime(df['horodateur'], format='%d/%m/%Y %H:%M:%S', errors='coerce')
-        
-        if 'date_de_naissance' in df.columns:
-            df['date_de_naissance'] = pd.to_datetime(df['date_de_naissance'], format='%d/%m/%Y %H:%M:%S', errors='coerce')
-        
-        # Nettoyage des colonnes texte pour éviter les problèmes d'affichage
-        if 'pays' in df.columns:
-            # 1. Convertir en string et nettoyer les espaces
-            df['pays'] = df['pays'].astype(str).str.strip()
-            
-            # 2. Standardiser le nom de la Côte d'Ivoire avec le mapping défini
-            df['pays'] = df['pays'].replace(pays_mapping)
-            
-            # 3. Exclure les valeurs numériques
-            mask_pays_valides = ~df['pays'].str.isdigit()
-            df = df[mask_pays_valides].copy()
-            
-            # 4. Dernière vérification pour uniformiser la casse
-            df['pays'] = df['pays'].str.title()
-        
-        if 'type_pack' in df.columns:
-            df['type_pack'] = df['type_pack'].astype(str).str.strip()
-        
-        if 'methode_paiement_std' in df.columns:
-            df['methode_paiement_std'] = df['methode_paiement_std'].astype(str).str.strip()
-        
-        # Log pour debug
-        st.sidebar.text(f"✅ {len(df)} lignes valides chargées")
-        if 'pays' in df.columns:
-            st.sidebar.text(f"🌍 {df['pays'].nunique()} pays uniques")
-            # Afficher un échantillon des pays pour vérification
-            pays_sample = sorted(df['pays'].unique())[:5]
-            st.sidebar.text(f"📝 Échantillon: {', '.join(pays_sample)}")
-        
-        return df
-    except Exception as e:
-        st.error(f"Erreur lors du chargement des données: {e}")
+        with open(chemin, 'r', encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
         return None
 
+# Import et injection du CSS personnalisé
+def load_css():
+    """Injecte le CSS personnalisé (lu une fois par processus)"""
+    css = lire_css()
+    if css is None:
+        st.warning("⚠️ Fichier styles.css non trouvé. Design par défaut utilisé.")
+        css = CSS_SECOURS
+    st.html(f"<style>{css}</style>")
+
+def construire_jeu_de_donnees(politique_doublons='derniere', publier=None, campagne=CAMPAGNE_PRINCIPALE,
+                              fichier=FICHIER_DONNEES):
+    """
+    Jeu de données partagé entre les sessions, tenu à jour par la surveillance
+    du fichier source et du dossier de dépôt (exécuté dans le thread de chargement)
+    politique_doublons : 'derniere' ou 'premiere' inscription conservée par personne
+    publier(cle, valeur) : indicateurs intermédiaires affichés pendant le chargement
+    campagne, fichier : campagne du registre ; seule la campagne principale reçoit les exports
+    du dossier de dépôt, tient le journal des alertes et passe par le jeu partagé
+    """
+    publier = publier or (lambda cle, valeur: None)
+    index_derives = {'temporel': IndexTemporel(), 'echantillon': EchantillonStratifie(),
+                     'geographie': HierarchieGeographique(), 'texte': IndexTexte(), 'tri': IndexTri()}
+    if campagne != CAMPAGNE_PRINCIPALE:
+        return construire_jeu_campagne(campagne, fichier, politique_doublons, index_derives, publier)
+    if CHEMIN_JEU_PARTAGE:
+        # Déjà nettoyé et dédoublonné par le lanceur, lu sans copie depuis le fichier Arrow partagé ;
+        # le journal des alertes est tenu par le lanceur, qui reçoit les nouveaux exports
+        index_derives['anomalies'] = DetecteurAnomalies()
+        return ouvrir_jeu_partage(CHEMIN_JEU_PARTAGE, index_derives=index_derives)
+    index_derives['anomalies'] = DetecteurAnomalies(chemin_journal=FICHIER_ALERTES)
+    
+    # Nombre de lignes annoncé par le classeur, connu avant le décodage des cellules
+    publier('lignes_classeur', nombre_lignes_classeur(FICHIER_DONNEES))
+    
+    # Seules les colonnes utiles sont lues ; le classeur n'est décodé qu'une fois
+    df = lire_excel(FICHIER_DONNEES, colonnes=COLONNES_DASHBOARD)
+    # Copie superficielle (copie à l'écriture) : l'export tel que lu, référence de la vue des nouveautés
+    export = df.copy(deep=False)
+    
+    # Passe rapide sur deux colonnes : premières cartes affichées pendant le nettoyage complet
+    colonnes_rapides = [c for c in ('horodateur', 'pays') if c in df.columns]
+    publier('apercu', indicateurs_rapides(preparer_donnees(df[colonnes_rapides].copy())))
+    
+    # Conversion des dates et standardisation des pays (valeurs corrompues écartées par le schéma)
+    df = preparer_donnees(df)
+    
+    # Validation du schéma puis suppression des inscriptions en double (audits des lignes retirées)
+    jeu = JeuDeDonnees(df, politique_doublons, chemin_audit="doublons_supprimes.csv",
+                       chemin_quarantaine=FICHIER_QUARANTAINE, index_derives=index_derives)
+    jeu.noter_export(export, FICHIER_DONNEES)
+    os.makedirs(DOSSIER_DEPOT, exist_ok=True)
+    jeu.surveillant = SurveillantFichiers([FICHIER_DONNEES, DOSSIER_DEPOT], jeu.integrer_fichier,
+                                          tic=jeu.avancer_horloge)
+    jeu.surveillant.demarrer()
+    return jeu
+
+def construire_jeu_campagne(campagne, fichier, politique_doublons, index_derives, publier):
+    """
+    Jeu de données d'une autre campagne du registre : même préparation, audits propres
+    à la campagne, alertes non journalisées, surveillance de son seul fichier
+    """
+    index_derives['anomalies'] = DetecteurAnomalies()
+    publier('lignes_classeur', nombre_lignes_classeur(fichier))
+    df = lire_excel(fichier, colonnes=COLONNES_DASHBOARD)
+    export = df.copy(deep=False)
+    df = preparer_donnees(df)
+    suffixe = suffixe_campagne(campagne)
+    jeu = JeuDeDonnees(df, politique_doublons, chemin_audit=f"{suffixe}_doublons.csv",
+                       chemin_quarantaine=f"{suffixe}_quarantaine.csv", index_derives=index_derives)
+    jeu.noter_export(export, fichier)
+    jeu.surveillant = SurveillantFichiers([fichier], jeu.integrer_fichier, tic=jeu.avancer_horloge)
+    jeu.surveillant.demarrer()
+    return jeu
+
+@st.cache_resource
+def executeur_chargement():
+    """Threads de chargement partagés par toutes les sessions du processus"""
+    return creer_executeur()
+
+def charger_campagne(campagne, politique_doublons):
+    """
+    Chargement en arrière-plan du jeu de données d'une campagne (le script n'attend pas sa fin)
+    """
+    noter_execution('jeu_de_donnees')
+    return ChargementArrierePlan(executeur_chargement(), construire_jeu_de_donnees, politique_doublons,
+                                 campagne=campagne, fichier=cache_campagnes().campagnes[campagne])
+
+@st.cache_resource
+def cache_campagnes():
+    """
+    Registre des campagnes et jeux de données chargés, partagés par toutes les sessions
+    du processus (campagnes.json est relu après « Actualiser les données »)
+    """
+    return CacheCampagnes(lire_registre(FICHIER_DONNEES), charger_campagne)
+
+def chargement_jeu(politique_doublons='derniere', campagne=CAMPAGNE_PRINCIPALE):
+    """
+    Chargement du jeu de données, lancé une seule fois par campagne et par politique
+    puis gardé en cache tant que le budget mémoire le permet
+    """
+    return cache_campagnes().obtenir(campagne, politique_doublons)
+
+def afficher_chargement_en_cours(chargement):
+    """
+    Page affichée pendant le chargement : cartes de la passe rapide dès qu'elles sont publiées,
+    filtres inactifs en attendant les données complètes
+    """
+    apercu = chargement.partiels.get('apercu') or {}
+    lignes = apercu.get('lignes', chargement.partiels.get('lignes_classeur'))
+    periode = "…"
+    if apercu.get('date_min') is not None:
+        periode = f"{apercu['date_min'].strftime('%d/%m/%Y')} - {apercu['date_max'].strftime('%d/%m/%Y')}"
+    
+    st.sidebar.text(f"⏳ Chargement des données ({chargement.duree():.1f} s)")
+    
+    st.markdown("""
+    <div style="text-align: center; margin: 2rem 0;">
+        <h2 class="section-title">🎯 Métriques Clés de Performance</h2>
+    </div>
+    """, unsafe_allow_html=True)
+    cartes = [
+        ("📊 Réponses (avant nettoyage)", "…" if lignes is None else f"≈ {lignes}", "#e3f2fd, #bbdefb", "#1976d2"),
+        ("🌍 Pays (avant nettoyage)", apercu.get('nb_pays', "…"), "#e8f5e8, #c8e6c9", "#2e7d32"),
+        ("📆 Période Complète", periode, "#fff3e0, #ffe0b2", "#f57c00"),
+        ("⏳ Analyses", "En cours", "#f3e5f5, #e1bee7", "#7b1fa2"),
+    ]
+    for colonne, (libelle, valeur, fond, couleur) in zip(st.columns(4), cartes):
+        with colonne:
+            st.markdown(f"""
+            <div class="metric-card animated-card" style="background: linear-gradient(135deg, {fond});">
+                <div class="metric-label">{libelle}</div>
+                <div class="metric-value" style="color: {couleur};">{valeur}</div>
+            </div>
+            """, unsafe_allow_html=True)
+    
+    # Filtres visibles mais inactifs (sans clé : l'état des vrais filtres n'est pas touché)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.selectbox("🌍 Sélectionnez un pays", ['Tous'], disabled=True)
+    with col2:
+        st.selectbox("📦 Sélectionnez un type de pack", ['Tous'], disabled=True)
+    with col3:
+        st.selectbox("💳 Sélectionnez une méthode de paiement", ['Tous'], disabled=True)
+    st.info("⏳ Nettoyage et dédoublonnage en cours : les sections s'afficheront dès que les données seront prêtes")
+
 def obtenir_coordonnees_pays(pays):
     """
     Retourne les coordonnées approximatives d'un pays
@@ -158,287 +276,37 @@ def obtenir_coordonnees_pays(pays):
     }
     return coordonnees.get(pays, [0, 0])
 
-def main():
-    # Chargement du CSS personnalisé
-    load_css()
-    
-    # Logo et titre principal avec design amélioré
-    col1, col2, col3 = st.columns([1, 2, 1])
-    with col2:
-        st.markdown("""
-        <div style="text-align: center; margin-bottom: 2rem;">
-            <div style="font-size: 4rem; margin-bottom: 1rem;"></div>
-            <h1 class="main-header">Dashboard d'Analyse du Formulaire</h1>
-            
-        </div>
-        """, unsafe_allow_html=True)
-    
-    # Chargement des données
-    df = charger_donnees()
-    
-    if df is None:
-        st.error("⚠️ Impossible de charger les données. Vérifiez que le fichier 'Formulaire_FINAL_OPTIMISE.xlsx' existe.")
-        return
-    
-    # Sidebar avec design amélioré
-    with st.sidebar:
-        st.markdown("""
-        <div style="text-align: center; padding: 1rem; background: linear-gradient(135deg, #1f77b4, #ff7f0e); border-radius: 12px; margin-bottom: 2rem;">
-            <h2 style="color: white; margin: 0;"> Centre de Contrôle</h2>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        st.markdown("## 📋 Informations générales")
-        
-        # Métriques sidebar avec style
-        st.markdown(f"""
-        <div class="metric-card animated-card">
-            <div class="metric-label">📊 Total Réponses</div>
-            <div class="metric-value">{len(df)}</div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        st.markdown(f"""
-        <div class="metric-card animated-card">
-            <div class="metric-label">📂 Colonnes</div>
-            <div class="metric-value">{len(df.columns)}</div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        # Bouton pour vider le cache
-        if st.button("🔄 Actualiser les données", help="Vide le cache et recharge les données"):
-            st.cache_data.clear()
-            st.rerun()
-    
-    # Filtres de période
-    df_filtered = df.copy()
-    
-    if 'horodateur' in df.columns and df['horodateur'].notna().any():
-        st.markdown("""
-        <div style="background: linear-gradient(135deg, #e3f2fd, #bbdefb); padding: 1rem; border-radius: 12px; margin: 1rem 0;">
-            <h3 style="color: #1976d2; margin: 0 0 1rem 0;"> Filtres de Période</h3>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        date_min = df['horodateur'].min().date()
-        date_max = df['horodateur'].max().date()
-        
-        st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-label">📆 Période Complète</div>
-            <div style="color: #1f77b4; font-weight: 600;">{date_min.strftime('%d/%m/%Y')} - {date_max.strftime('%d/%m/%Y')}</div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        # Sélecteurs de date avec style
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            date_debut_selectionnee = st.date_input(
-                "📅 Date début",
-                value=date_min,
-                min_value=date_min,
-                max_value=date_max,
-                key="date_debut",
-                help="Sélectionnez la date de début de votre analyse"
-            )
-        
-        with col2:
-            date_fin_selectionnee = st.date_input(
-                "📅 Date fin",
-                value=date_max,
-                min_value=date_min,
-                max_value=date_max,
-                key="date_fin",
-                help="Sélectionnez la date de fin de votre analyse"
-            )
-        
-        # Vérification des dates avec alertes stylées
-        if date_debut_selectionnee > date_fin_selectionnee:
-            st.error("❌ La date de début doit être antérieure à la date de fin")
-        else:
-            # Filtrage des données
-            mask_date = (
-                (df['horodateur'].dt.date >= date_debut_selectionnee) & 
-                (df['horodateur'].dt.date <= date_fin_selectionnee)
-            )
-            df_filtered = df[mask_date].copy()
-            
-            # Affichage de la période sélectionnée avec style
-            if len(df_filtered) > 0:
-                st.success(f"✅ **Période sélectionnée:** {date_debut_selectionnee.strftime('%d/%m/%Y')} - {date_fin_selectionnee.strftime('%d/%m/%Y')}")
-                st.info(f"📊 **{len(df_filtered)} réponses** dans cette période")
-                
-                # Bouton de réinitialisation stylé
-                if st.button("🔄 Réinitialiser la période", type="secondary"):
-                    st.rerun()
-            else:
-                st.warning("⚠️ Aucune donnée dans cette période")
-    
-    # Filtres additionnels avec design moderne
-    st.markdown("""
-    <div style="background: linear-gradient(135deg, #fff3e0, #ffe0b2); padding: 1rem; border-radius: 12px; margin: 1rem 0;">
-        <h3 style="color: #f57c00; margin: 0 0 1rem 0;">🎯 Filtres Additionnels</h3>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Mettre les trois filtres sur la même ligne pour économiser l'espace
-    col1, col2, col3 = st.columns(3)
-    
-    # Filtre par pays avec style - utiliser les données complètes pour la liste
-    with col1:
-        if 'pays' in df.columns:
-            # Utiliser df original pour avoir tous les pays disponibles
-            tous_pays = sorted(df['pays'].dropna().unique().tolist())
-            pays_disponibles = ['Tous'] + tous_pays
-            
-            pays_selectionne = st.selectbox(
-                "🌍 Sélectionnez un pays",
-                pays_disponibles,
-                key="filtre_pays",
-                help="Filtrez les données par pays spécifique"
-            )
-            
-            if pays_selectionne != 'Tous':
-                df_filtered = df_filtered[df_filtered['pays'] == pays_selectionne]
-    
-    # Filtre par type de pack avec style - utiliser les données complètes
-    with col2:
-        if 'type_pack' in df.columns:
-            tous_packs = sorted(df['type_pack'].dropna().unique().tolist())
-            packs_disponibles = ['Tous'] + tous_packs
-            
-            pack_selectionne = st.selectbox(
-                "📦 Sélectionnez un type de pack",
-                packs_disponibles,
-                key="filtre_pack",
-                help="Filtrez les données par type de pack"
-            )
-            
-            if pack_selectionne != 'Tous':
-                df_filtered = df_filtered[df_filtered['type_pack'] == pack_selectionne]
-    
-    # Filtre par méthode de paiement avec style - utiliser les données complètes
-    with col3:
-        if 'methode_paiement_std' in df.columns:
-            tous_paiements = sorted(df['methode_paiement_std'].dropna().unique().tolist())
-            paiements_disponibles = ['Tous'] + tous_paiements
-            
-            paiement_selectionne = st.selectbox(
-                "💳 Sélectionnez une méthode de paiement",
-                paiements_disponibles,
-                key="filtre_paiement",
-                help="Filtrez les données par méthode de paiement"
-            )
-            
-            if paiement_selectionne != 'Tous':
-                df_filtered = df_filtered[df_filtered['methode_paiement_std'] == paiement_selectionne]
-    
-    # Informations sur le filtrage avec design
-    if len(df_filtered) != len(df):
-        st.markdown("---")
-        st.markdown("""
-        <div class="metric-card" style="background: linear-gradient(135deg, #f3e5f5, #e1bee7);">
-            <h3 style="color: #7b1fa2; margin: 0 0 1rem 0;">📊 Résumé du Filtrage</h3>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.markdown(f"""
-            <div class="metric-card animated-card">
-                <div class="metric-label">📋 Données Originales</div>
-                <div class="metric-value">{len(df)}</div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col2:
-            st.markdown(f"""
-            <div class="metric-card animated-card">
-                <div class="metric-label">🎯 Données Filtrées</div>
-                <div class="metric-value">{len(df_filtered)}</div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col3:
-            reduction = ((len(df) - len(df_filtered)) / len(df)) * 100
-            st.markdown(f"""
-            <div class="metric-card animated-card">
-                <div class="metric-label">📉 Réduction</div>
-                <div class="metric-value">{reduction:.1f}%</div>
-            </div>
-            """, unsafe_allow_html=True)
-    
-    # Métriques clés avec design premium
-    st.markdown("""
-    <div style="text-align: center; margin: 2rem 0;">
-        <h2 class="section-title">🎯 Métriques Clés de Performance</h2>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Affichage d'alerte si données filtrées avec style
-    if len(df_filtered) != len(df):
-        st.markdown(f"""
-        <div style="background: linear-gradient(135deg, #e8f5e8, #c8e6c9); padding: 1rem; border-radius: 12px; margin: 1rem 0; border-left: 5px solid #4caf50;">
-            <h4 style="color: #2e7d32; margin: 0;">📊 Affichage basé sur <strong>{len(df_filtered)} réponses filtrées</strong> (sur {len(df)} au total)</h4>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.markdown(f"""
-        <div class="metric-card animated-card" style="background: linear-gradient(135deg, #e3f2fd, #bbdefb);">
-            <div class="metric-label">📊 Total Réponses</div>
-            <div class="metric-value" style="color: #1976d2;">{len(df_filtered)}</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        if 'pays' in df_filtered.columns:
-            nb_pays = df_filtered['pays'].nunique()
-            st.markdown(f"""
-            <div class="metric-card animated-card" style="background: linear-gradient(135deg, #e8f5e8, #c8e6c9);">
-                <div class="metric-label">🌍 Pays Représentés</div>
-                <div class="metric-value" style="color: #2e7d32;">{nb_pays}</div>
-            </div>
-            """, unsafe_allow_html=True)
-    
-    with col3:
-        if 'age' in df_filtered.columns and df_filtered['age'].notna().any():
-            age_moyen = df_filtered['age'].mean()
-            st.markdown(f"""
-            <div class="metric-card animated-card" style="background: linear-gradient(135deg, #fff3e0, #ffe0b2);">
-                <div class="metric-label">🎂 Âge Moyen</div>
-                <div class="metric-value" style="color: #f57c00;">{age_moyen:.1f} ans</div>
-            </div>
-            """, unsafe_allow_html=True)
-        else:
-            st.markdown("""
-            <div class="metric-card animated-card" style="background: linear-gradient(135deg, #fff3e0, #ffe0b2);">
-                <div class="metric-label">🎂 Âge Moyen</div>
-                <div class="metric-value" style="color: #f57c00;">N/A</div>
-            </div>
-            """, unsafe_allow_html=True)
-    
-    with col4:
-        if 'type_pack' in df_filtered.columns and len(df_filtered) > 0:
-            pack_populaire = df_filtered['type_pack'].mode()[0] if len(df_filtered['type_pack'].mode()) > 0 else 'N/A'
-            st.markdown(f"""
-            <div class="metric-card animated-card" style="background: linear-gradient(135deg, #f3e5f5, #e1bee7);">
-                <div class="metric-label">📦 Pack Populaire</div>
-                <div class="metric-value" style="color: #7b1fa2;">{pack_populaire}</div>
-            </div>
-            """, unsafe_allow_html=True)
-        else:
-            st.markdown("""
-            <div class="metric-card animated-card" style="background: linear-gradient(135deg, #f3e5f5, #e1bee7);">
-                <div class="metric-label">📦 Pack Populaire</div>
-                <div class="metric-value" style="color: #7b1fa2;">N/A</div>
-            </div>
-            """, unsafe_allow_html=True)
-    
-    # 1. Répartition des offres choisies avec design premium
+@st.cache_data(show_spinner=False, max_entries=256)
+def construire_figure(nom, *donnees):
+    """
+    Construit une figure de graphiques.py à partir de ses agrégats (mise en cache)
+    """
+    noter_execution('figures')
+    import graphiques
+    fig = getattr(graphiques, nom)(*donnees)
+    # Taille envoyée au navigateur, mesurée une seule fois par figure mise en cache
+    points = sum(next((len(trace[a]) for a in ('x', 'y', 'values') if a in trace and trace[a] is not None), 0)
+                 for trace in fig.data)
+    return fig, {'octets': len(fig.to_json()), 'points': points}
+
+def figure(suivi, nom, *donnees):
+    """
+    Figure en cache, avec comptage des succès/échecs du cache et taille du graphique dans le suivi du rerun
+    """
+    fig, charge = suivi.appel_cache('figures', construire_figure, nom, *donnees)
+    suivi.noter_graphique(nom, **charge)
+    return fig
+
+def formater_estimation(total, marge=None):
+    """
+    Nombre exact, ou estimation « ≈ total ± marge » en aperçu rapide
+    """
+    return f"{total}" if marge is None else f"≈ {total} ± {marge}"
+
+def afficher_offres(df_filtered, suivi):
+    """
+    1. Répartition des offres choisies avec design premium
+    """
     st.markdown("---")
     st.markdown("""
     <div style="text-align: center; margin: 2rem 0;">
@@ -456,22 +324,10 @@ def main():
                 <h3 style="color: #1f77b4; text-align: center; margin-bottom: 1rem;">  Graphique en Camembert</h3>
             </div>
             """, unsafe_allow_html=True)
-            pack_counts = df_filtered['type_pack'].value_counts()
+            pack_counts, prix_moyen_pack = agreger_offres(df_filtered)
             
             if len(pack_counts) > 0:
-                fig_pie = px.pie(
-                    values=pack_counts.values,
-                    names=pack_counts.index,
-                    title="Répartition des Packs Choisis",
-                    color_discrete_sequence=px.colors.qualitative.Bold  # Palette de couleurs vives et distinctes
-                )
-                fig_pie.update_traces(textposition='inside', textinfo='percent+label')
-                fig_pie.update_layout(
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    font=dict(size=12)
-                )
-                st.plotly_chart(fig_pie, use_container_width=True)
+                st.plotly_chart(figure(suivi, 'figure_repartition_packs', pack_counts), use_container_width=True)
             else:
                 st.info("Aucune donnée de pack disponible pour cette période")
         
@@ -481,43 +337,90 @@ def main():
                 <h3 style="color: #1f77b4; text-align: center; margin-bottom: 1rem;"> Prix Moyen par Pack</h3>
             </div>
             """, unsafe_allow_html=True)
-            if len(pack_counts) > 0 and 'prix_pack_fcfa' in df_filtered.columns:
-                # Calculer le prix moyen par pack
-                prix_moyen_pack = df_filtered.groupby('type_pack')['prix_pack_fcfa'].mean().round(0)
-                
-                fig_bar = px.bar(
-                    x=prix_moyen_pack.values,
-                    y=prix_moyen_pack.index,
-                    orientation='h',
-                    title="Prix Moyen par Pack (FCFA)",
-                    labels={'x': 'Prix Moyen (FCFA)', 'y': 'Type de Pack'},
-                    color=prix_moyen_pack.index,
-                    color_discrete_sequence=px.colors.qualitative.Set1
-                )
-                # Formatter les valeurs sur les barres
-                fig_bar.update_traces(texttemplate='%{x:,.0f} FCFA', textposition='outside')
-                fig_bar.update_layout(
-                    showlegend=False,
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)'
-                )
-                st.plotly_chart(fig_bar, use_container_width=True)
+            if prix_moyen_pack is not None:
+                st.plotly_chart(figure(suivi, 'figure_prix_moyen_pack', prix_moyen_pack), use_container_width=True)
             else:
                 st.info("Aucune donnée de pack disponible pour cette période")
         
         # Tableau détaillé
         if len(df_filtered) > 0 and 'prix_pack_fcfa' in df_filtered.columns:
             st.markdown("###   Détails par Pack")
-            pack_stats = df_filtered.groupby('type_pack').agg({
-                'type_pack': 'count',
-                'prix_pack_fcfa': ['mean', 'min', 'max']
-            }).round(0)
-            pack_stats.columns = ['Nombre d\'inscrits', 'Prix moyen (FCFA)', 'Prix min (FCFA)', 'Prix max (FCFA)']
+            pack_stats = details_packs(df_filtered, pack_counts, prix_moyen_pack)
             st.dataframe(pack_stats, use_container_width=True)
     else:
         st.info("Aucune donnée d'offre disponible pour les filtres sélectionnés")
+
+def afficher_carte(pays_counts, coordonnees=obtenir_coordonnees_pays, cle=None):
+    """
+    Carte interactive des participants par pays (ou par région avec les coordonnées de leur centre)
+    """
+    import folium
+    from streamlit_folium import st_folium
+    
+    # Créer une carte
+    m = folium.Map(location=[0, 0], zoom_start=2)
+    
+    for pays, count in pays_counts.head(15).items():
+        coords = coordonnees(pays)
+        if coords != [0, 0]:
+            folium.CircleMarker(
+                location=coords,
+                radius=max(5, count/10),  # Taille proportionnelle
+                popup=f"{pays}: {count} participants",
+                color='blue',
+                fill=True,
+                fillColor='lightblue'
+            ).add_to(m)
     
-    # 2. Répartition géographique
+    st_folium(m, width=700, height=400, key=cle)
+
+def cumuls_pour_filtres(instantane, df_filtered):
+    """
+    Cumuls géographiques par niveau : ceux de l'index publié quand aucun filtre ne retire de ligne,
+    sinon calculés depuis les lignes filtrées
+    """
+    if ('geographie' in instantane.index and 'poids' not in df_filtered.columns
+            and len(df_filtered) == len(instantane.df)):
+        return instantane.index['geographie']
+    return cumuls_geographiques(df_filtered)
+
+def afficher_regions(cumuls, suivi):
+    """
+    Exploration continent → sous-région → pays, lue dans les cumuls matérialisés de chaque niveau
+    """
+    st.markdown("### 🧭 Exploration par Région")
+    col1, col2 = st.columns(2)
+    with col1:
+        continent = st.selectbox("🌐 Continent", ['Tous'] + enfants(cumuls).index.tolist(), key="geo_continent")
+    chemin = () if continent == 'Tous' else (continent,)
+    with col2:
+        # Clé propre au continent : la sous-région choisie ne survit pas à un changement de continent
+        sous_regions = enfants(cumuls, chemin).index.tolist() if chemin else []
+        sous_region = st.selectbox("🧭 Sous-région", ['Toutes'] + sous_regions, disabled=not chemin,
+                                   key=f"geo_sous_region_{continent}")
+    if chemin and sous_region != 'Toutes':
+        chemin += (sous_region,)
+    
+    niveau = NIVEAUX[len(chemin)]
+    table = enfants(cumuls, chemin)
+    if len(table) == 0:
+        st.info("Aucune donnée géographique pour cette région")
+        return
+    st.caption(f"📍 {' › '.join(chemin) or 'Monde'} : {table['inscriptions'].sum():,} inscriptions, "
+               f"{table['revenu'].sum():,.0f} FCFA")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.plotly_chart(figure(suivi, 'figure_cumuls_geographiques', table, niveau), use_container_width=True)
+    with col2:
+        coordonnees = obtenir_coordonnees_pays if niveau == 'pays' else (lambda nom: CENTRES.get(nom, [0, 0]))
+        with suivi.mesurer('carte_regions', len(table)):
+            afficher_carte(table['inscriptions'], coordonnees, cle="carte_regions")
+
+def afficher_geographie(df_filtered, suivi, cumuls=None):
+    """
+    2. Répartition géographique (la carte est mesurée à part)
+    """
     st.markdown("---")
     st.markdown("## 🌍 Répartition Géographique")
     
@@ -527,27 +430,11 @@ def main():
         with col1:
             st.markdown("### 📊 Top 10 des Pays")
             
-            # Copier le dataframe pour éviter de modifier l'original
-            df_pays = df_filtered.copy()
-            
-            # Regrouper explicitement toutes les variantes de Côte d'Ivoire
-            df_pays.loc[df_pays['pays'].str.contains('ivoire', case=False), 'pays'] = 'Côte d\'Ivoire'
-            
-            # Grouper et additionner les valeurs pour chaque pays
-            pays_counts = df_pays['pays'].value_counts().head(10)
+            # Variantes de Côte d'Ivoire regroupées, 10 pays les plus représentés
+            pays_counts, marges = agreger_pays(df_filtered)
             
             if len(pays_counts) > 0:
-                fig_geo = px.bar(
-                    x=pays_counts.values,
-                    y=pays_counts.index,
-                    orientation='h',
-                    title="Nombre de Participants par Pays",
-                    labels={'x': 'Nombre de participants', 'y': 'Pays'},
-                    color=pays_counts.index,
-                    color_discrete_sequence=px.colors.qualitative.Pastel
-                )
-                fig_geo.update_layout(height=500)
-                st.plotly_chart(fig_geo, use_container_width=True)
+                st.plotly_chart(figure(suivi, 'figure_top_pays', pays_counts, marges), use_container_width=True)
             else:
                 st.info("Aucune donnée géographique disponible")
         
@@ -555,142 +442,256 @@ def main():
             st.markdown("### 🗺️ Carte Interactive")
             
             if len(pays_counts) > 0:
-                # Créer une carte
-                m = folium.Map(location=[0, 0], zoom_start=2)
-                
-                for pays, count in pays_counts.head(15).items():
-                    coords = obtenir_coordonnees_pays(pays)
-                    if coords != [0, 0]:
-                        folium.CircleMarker(
-                            location=coords,
-                            radius=max(5, count/10),  # Taille proportionnelle
-                            popup=f"{pays}: {count} participants",
-                            color='blue',
-                            fill=True,
-                            fillColor='lightblue'
-                        ).add_to(m)
-                
-                st_folium(m, width=700, height=400)
+                with suivi.mesurer('carte', len(pays_counts)):
+                    afficher_carte(pays_counts)
             else:
                 st.info("Aucune donnée géographique disponible pour la carte")
+        
+        afficher_regions(cumuls if cumuls is not None else cumuls_geographiques(df_filtered), suivi)
     else:
         st.info("Aucune donnée géographique disponible pour les filtres sélectionnés")
+
+def afficher_paiements(df_filtered, suivi):
+    """
+    3. Modes de paiement
+    """
+    st.markdown("---")
+    st.markdown("## 💳 Modes de Paiement Choisis")
+    
+    if 'methode_paiement_std' in df_filtered.columns and len(df_filtered) > 0:
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("### 📊 Graphique en Donuts")
+            paiement_counts, marges = agreger_paiements(df_filtered)
+            
+            if len(paiement_counts) > 0:
+                st.plotly_chart(figure(suivi, 'figure_donut_paiements', paiement_counts), use_container_width=True)
+            else:
+                st.info("Aucune donnée de paiement disponible")
+        
+        with col2:
+            st.markdown("### 📊 Graphique en Barres")
+            if len(paiement_counts) > 0:
+                st.plotly_chart(figure(suivi, 'figure_barres_paiements', paiement_counts, marges), use_container_width=True)
+            else:
+                st.info("Aucune donnée de paiement disponible")
+    else:
+        st.info("Aucune donnée de paiement disponible pour les filtres sélectionnés")
+
+def afficher_operateurs(df_filtered, suivi):
+    """
+    3 bis. Opérateurs téléphoniques (déduits du numéro)
+    """
+    st.markdown("---")
+    st.markdown("## 📞 Opérateurs Téléphoniques par Pays")
+    
+    comptes, parts = agreger_operateurs(df_filtered)
+    if comptes is not None:
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            donnees = parts_operateurs_longues(parts)
+            st.plotly_chart(figure(suivi, 'figure_parts_operateurs', donnees), use_container_width=True)
+        with col2:
+            st.markdown("### 📋 Opérateur principal")
+            principal = pd.DataFrame({
+                'Opérateur': comptes.idxmax(axis=1),
+                'Part (%)': parts.max(axis=1),
+                'Numéros': comptes.sum(axis=1)
+            })
+            st.dataframe(principal, use_container_width=True)
+        
+        non_identifies = estimer_total(df_filtered[df_filtered['operateur'].isna()])[0]
+        if non_identifies > 0:
+            st.caption(f"ℹ️ {non_identifies} numéros sans opérateur identifiable (numéro invalide ou ambigu)")
+    else:
+        st.info("Aucun opérateur identifié pour les filtres sélectionnés")
+
+def sommes_pour_filtres(instantane, df_filtered, pays, pack, paiement):
+    """
+    Sommes préfixes par granularité (jour, heure) correspondant aux filtres : segment de l'index publié
+    quand seul le pack ou la méthode de paiement est filtré, sinon construites depuis les lignes filtrées
+    """
+    if pays == 'Tous' and 'temporel' in instantane.index:
+        sommes = instantane.index['temporel']
+        if pack == 'Tous' and paiement == 'Tous':
+            return sommes, segment()
+        if paiement == 'Tous':
+            return sommes, segment('type_pack', pack)
+        if pack == 'Tous':
+            return sommes, segment('methode_paiement_std', paiement)
+    return sommes_prefixes(df_filtered, granularite=None), segment()
+
+def serie_anomalies(pays, pack, paiement):
+    """
+    Série suivie par le détecteur d'anomalies correspondant aux filtres (None si plusieurs filtres)
+    """
+    filtres = [(colonne, valeur) for colonne, valeur in
+               [('pays', pays), ('type_pack', pack), ('methode_paiement_std', paiement)] if valeur != 'Tous']
+    if len(filtres) > 1:
+        return None
+    return segment(*filtres[0]) if filtres else segment()
+
+def points_anomalies(anomalies, serie, pas):
+    """
+    Anomalies placées sur une courbe : heure ramenée au pas de la courbe, hauteur lue dans la série
+    """
+    if anomalies is None or len(anomalies) == 0 or len(serie) == 0:
+        return None
+    dates = anomalies['seau'].dt.floor(pas)
+    dans_fenetre = (dates >= serie.index[0]) & (dates <= serie.index[-1])
+    if not dans_fenetre.any():
+        return None
+    anomalies, dates = anomalies[dans_fenetre], dates[dans_fenetre]
+    textes = anomalies['seau'].dt.strftime('%d/%m %Hh : ') + anomalies.apply(decrire_alerte, axis=1)
+    points = pd.DataFrame({'date': dates, 'type': anomalies['type'], 'texte': textes})
+    # Plusieurs anomalies du même type au même point : un seul marqueur, textes regroupés
+    points = points.groupby(['date', 'type'], as_index=False)['texte'].agg('<br>'.join)
+    points['valeur'] = serie.reindex(points['date']).to_numpy()
+    return points
+
+def afficher_anomalies(anomalies):
+    """
+    Liste des dernières anomalies détectées sur le flux des inscriptions
+    """
+    if anomalies is None or len(anomalies) == 0:
+        return
+    with st.expander(f"🚨 Anomalies détectées ({len(anomalies)})"):
+        recentes = anomalies.sort_values('seau', ascending=False).head(50)
+        st.dataframe(pd.DataFrame({
+            'Heure': recentes['seau'].dt.strftime('%d/%m/%Y %H:%M'),
+            'Anomalie': recentes.apply(decrire_alerte, axis=1),
+            'Score': recentes['score'],
+        }), use_container_width=True, hide_index=True)
+        st.caption(f"Journal des alertes : {FICHIER_ALERTES}")
+
+def afficher_tendances(sommes, seg, periode, suivi, anomalies=None):
+    """
+    Moyennes mobiles, croissance cumulée et comparaison avec la période précédente,
+    lues dans l'index à sommes préfixes
+    """
+    from reduction_series import LARGEUR_COLONNE_PX, reduire, reduire_tableau
+    
+    st.markdown("### 📈 Tendances et Croissance")
+    mesure = st.radio(
+        "Mesure",
+        ['inscriptions', 'revenu'],
+        format_func=lambda m: "Inscriptions" if m == 'inscriptions' else "Revenu (FCFA)",
+        horizontal=True,
+        key="mesure_tendances"
+    )
+    libelle = "Inscriptions" if mesure == 'inscriptions' else "Revenu (FCFA)"
+    debut, fin = periode
+    
+    comparaison = sommes.comparaison(debut, fin, mesure, seg)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric(f"{libelle} sur la période", f"{comparaison['actuel']:,.0f}")
+    with col2:
+        st.metric("Période précédente (même durée)", f"{comparaison['precedent']:,.0f}")
+    with col3:
+        variation = comparaison['variation_pct']
+        st.metric("Évolution", f"{variation:+.1f}%" if variation is not None else "N/A")
     
-    # 3. Modes de paiement
-    st.markdown("---")
-    st.markdown("## 💳 Modes de Paiement Choisis")
+    par_jour = sommes.serie(debut, fin, mesure, seg)
+    tendances = pd.DataFrame({
+        'date': par_jour.index,
+        'valeur': par_jour.values,
+        'mm_7': sommes.moyenne_mobile(7, debut, fin, mesure, seg).values,
+        'mm_30': sommes.moyenne_mobile(30, debut, fin, mesure, seg).values,
+    })
+    # Historique long : seuls le minimum et le maximum de chaque seau de pixels sont envoyés
+    tendances = reduire_tableau(tendances, 'valeur', LARGEUR_COLONNE_PX)
+    cumul = reduire(sommes.cumul(debut, fin, mesure, seg), LARGEUR_COLONNE_PX)
+    cumul = cumul.rename('cumul').rename_axis('date').reset_index()
     
-    if 'methode_paiement_std' in df_filtered.columns and len(df_filtered) > 0:
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.markdown("### 📊 Graphique en Donuts")
-            paiement_counts = df_filtered['methode_paiement_std'].value_counts()
-            
-            if len(paiement_counts) > 0:
-                fig_donut = go.Figure(data=[go.Pie(
-                    labels=paiement_counts.index,
-                    values=paiement_counts.values,
-                    hole=0.4
-                )])
-                fig_donut.update_traces(
-                    textposition='inside',
-                    textinfo='percent+label'
-                )
-                fig_donut.update_layout(
-                    title="Répartition des Méthodes de Paiement",
-                    showlegend=True
-                )
-                st.plotly_chart(fig_donut, use_container_width=True)
-            else:
-                st.info("Aucune donnée de paiement disponible")
-        
-        with col2:
-            st.markdown("### 📊 Graphique en Barres")
-            if len(paiement_counts) > 0:
-                fig_payment = px.bar(
-                    x=paiement_counts.index,
-                    y=paiement_counts.values,
-                    title="Choix des Méthodes de Paiement",
-                    labels={'x': 'Méthode de paiement', 'y': 'Nombre d\'utilisateurs'},
-                    color=paiement_counts.index,  # Utiliser la méthode de paiement comme base pour la couleur
-                    color_discrete_sequence=px.colors.qualitative.G10  # Palette de couleurs vibrantes
-                )
-                fig_payment.update_xaxes(tickangle=45)
-                st.plotly_chart(fig_payment, use_container_width=True)
-            else:
-                st.info("Aucune donnée de paiement disponible")
-    else:
-        st.info("Aucune donnée de paiement disponible pour les filtres sélectionnés")
+    points = points_anomalies(anomalies, par_jour, PAS['jour']) if mesure == 'inscriptions' else None
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.plotly_chart(figure(suivi, 'figure_moyennes_mobiles', tendances, libelle, points), use_container_width=True)
+    with col2:
+        st.plotly_chart(figure(suivi, 'figure_croissance_cumulee', cumul, libelle), use_container_width=True)
+
+def afficher_inscriptions_fenetre(sommes, seg, periode, suivi, anomalies=None):
+    """
+    Courbe des inscriptions sur la fenêtre choisie : relue dans l'index à chaque zoom
+    (détail horaire sur les fenêtres courtes) puis réduite à la largeur du graphique
+    """
+    from reduction_series import LARGEUR_COLONNE_PX, reduire
+    
+    jours = sommes['jour'].serie(periode[0], periode[1], seg=seg)
+    if len(jours) == 0:
+        st.info("Aucune donnée temporelle disponible")
+        return
+    debut, fin = jours.index[0].date(), jours.index[-1].date()
+    if fin > debut:
+        # La clé dépend des bornes : un changement de filtre repart de la période entière
+        debut, fin = st.slider(
+            "🔍 Fenêtre affichée",
+            min_value=debut,
+            max_value=fin,
+            value=(debut, fin),
+            format="DD/MM/YYYY",
+            key=f"zoom_temporel_{debut}_{fin}"
+        )
     
-    # 4. Évolution temporelle
+    granularite = 'heure' if (fin - debut).days < JOURS_DETAIL_HORAIRE else 'jour'
+    detail = sommes[granularite]
+    serie = detail.serie(debut, pd.Timestamp(fin) + PAS['jour'] - detail.pas, seg=seg)
+    affichee = reduire(serie, LARGEUR_COLONNE_PX)
+    counts = affichee.rename('count').rename_axis('date').reset_index()
+    titre = "Nombre d'Inscriptions par Heure" if granularite == 'heure' else "Nombre d'Inscriptions par Jour"
+    points = points_anomalies(anomalies, serie, detail.pas)
+    st.plotly_chart(figure(suivi, 'figure_inscriptions_jour', counts, titre, points), use_container_width=True)
+    if len(affichee) < len(serie):
+        st.caption(f"📉 {len(serie):,} points réduits à {len(affichee):,} pour l'affichage (LTTB)")
+
+def afficher_temporel(df_filtered, suivi, sommes=None, seg='total', periode=(None, None), anomalies=None):
+    """
+    4. Évolution temporelle
+    """
     st.markdown("---")
     st.markdown("## 📈 Évolution Temporelle des Inscriptions")
+    afficher_anomalies(anomalies)
     
     if 'horodateur' in df_filtered.columns and len(df_filtered) > 0:
         col1, col2 = st.columns(2)
         
+        if sommes is None:
+            sommes = sommes_prefixes(df_filtered, granularite=None)
+        
         with col1:
-            st.markdown("### 📅 Inscriptions par Jour")
-            df_filtered['date'] = df_filtered['horodateur'].dt.date
-            daily_counts = df_filtered.groupby('date').size().reset_index(name='count')
-            
-            if len(daily_counts) > 0:
-                fig_daily = px.line(
-                    daily_counts,
-                    x='date',
-                    y='count',
-                    title="Nombre d'Inscriptions par Jour",
-                    labels={'date': 'Date', 'count': 'Nombre d\'inscriptions'}
-                )
-                fig_daily.update_traces(mode='lines+markers')
-                st.plotly_chart(fig_daily, use_container_width=True)
-            else:
-                st.info("Aucune donnée temporelle disponible")
+            st.markdown("### 📅 Inscriptions dans le Temps")
+            afficher_inscriptions_fenetre(sommes, seg, periode, suivi, anomalies)
         
         with col2:
             st.markdown("### 🕐 Inscriptions par Heure")
-            df_filtered['heure'] = df_filtered['horodateur'].dt.hour
-            hourly_counts = df_filtered.groupby('heure').size().reset_index(name='count')
+            hourly_counts = comptes_par_heure(df_filtered)
             
             if len(hourly_counts) > 0:
-                fig_hourly = px.bar(
-                    hourly_counts,
-                    x='heure',
-                    y='count',
-                    title="Nombre d'Inscriptions par Heure",
-                    labels={'heure': 'Heure de la journée', 'count': 'Nombre d\'inscriptions'},
-                    color='count',
-                    color_continuous_scale='Blues'
-                )
-                st.plotly_chart(fig_hourly, use_container_width=True)
+                st.plotly_chart(figure(suivi, 'figure_inscriptions_heure', hourly_counts), use_container_width=True)
             else:
                 st.info("Aucune donnée horaire disponible")
         
         # Analyse par jour de la semaine
         if len(df_filtered) > 0:
             st.markdown("### 📅 Inscriptions par Jour de la Semaine")
-            df_filtered['jour_semaine'] = df_filtered['horodateur'].dt.day_name()
-            ordre_jours = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-            jours_fr = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
-            
-            weekly_counts = df_filtered['jour_semaine'].value_counts().reindex(ordre_jours)
-            weekly_counts.index = jours_fr
+            weekly_counts = comptes_par_jour_semaine(df_filtered)
             
             if weekly_counts.sum() > 0:
-                fig_weekly = px.bar(
-                    x=weekly_counts.index,
-                    y=weekly_counts.values,
-                    title="Répartition par Jour de la Semaine",
-                    labels={'x': 'Jour de la semaine', 'y': 'Nombre d\'inscriptions'},
-                    color=weekly_counts.values,
-                    color_continuous_scale='Greens'
-                )
-                st.plotly_chart(fig_weekly, use_container_width=True)
+                st.plotly_chart(figure(suivi, 'figure_jours_semaine', weekly_counts), use_container_width=True)
+        
+        # Tendances en temps constant par point grâce aux sommes préfixes
+        if len(sommes['jour']) > 0:
+            afficher_tendances(sommes['jour'], seg, periode, suivi, anomalies)
     else:
         st.info("Aucune donnée temporelle disponible pour les filtres sélectionnés")
-    
-    # 5. Statistiques d'âge
+
+def afficher_ages(df_filtered, suivi):
+    """
+    5. Statistiques d'âge
+    """
     st.markdown("---")
     st.markdown("## 🎂 Statistiques d'Âge")
     
@@ -699,15 +700,9 @@ def main():
         ages_valides = df_filtered['age'].dropna()
         
         if len(ages_valides) > 0:
-            fig_age_hist = px.histogram(
-                ages_valides,
-                nbins=20,
-                title="Distribution des Âges",
-                labels={'value': 'Âge', 'count': 'Nombre de personnes'},
-                color_discrete_sequence=['skyblue']
-            )
-            fig_age_hist.update_layout(bargap=0.1)
-            st.plotly_chart(fig_age_hist, use_container_width=True)
+            st.plotly_chart(figure(suivi, 'figure_distribution_ages', ages_valides), use_container_width=True)
+            if 'poids' in df_filtered.columns:
+                st.caption("ℹ️ Aperçu rapide : forme de la distribution calculée sur l'échantillon (effectifs non redressés)")
         else:
             st.info("Aucune donnée d'âge disponible")
         
@@ -715,22 +710,203 @@ def main():
         # Tranches d'âge
         if 'tranche_age' in df_filtered.columns and df_filtered['tranche_age'].notna().any():
             st.markdown("### 👥 Répartition par Tranches d'Âge")
-            tranches_counts = df_filtered['tranche_age'].value_counts().sort_index()
+            tranches_counts, marges = agreger_tranches(df_filtered)
             
             if len(tranches_counts) > 0:
-                fig_tranches = px.bar(
-                    x=tranches_counts.index,
-                    y=tranches_counts.values,
-                    title="Nombre de Personnes par Tranche d'Âge",
-                    labels={'x': 'Tranche d\'âge', 'y': 'Nombre de personnes'},
-                    color=tranches_counts.values,
-                    color_continuous_scale='YlOrRd'
-                )
-                st.plotly_chart(fig_tranches, use_container_width=True)
+                st.plotly_chart(figure(suivi, 'figure_tranches_age', tranches_counts, marges), use_container_width=True)
     else:
         st.info("Aucune donnée d'âge disponible pour les filtres sélectionnés")
+
+def afficher_reponses_libres(df_filtered, recherche, suivi):
+    """
+    6. Réponses libres : mots fréquents et recherche, lus dans l'index inversé
+    et limités aux lignes filtrées
+    """
+    st.markdown("---")
+    st.markdown("## 💬 Questions et Commentaires")
+    
+    colonnes = [col for col in COLONNES_TEXTE_LIBRE if col in df_filtered.columns]
+    if recherche is None or len(recherche) == 0 or not colonnes or len(df_filtered) == 0:
+        st.info("Aucune réponse libre disponible pour les filtres sélectionnés")
+        return
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("### 🔤 Mots les Plus Fréquents")
+        termes = recherche.termes_frequents(df_filtered.index, nombre=20)
+        if len(termes) > 0:
+            st.plotly_chart(figure(suivi, 'figure_termes_frequents', termes), use_container_width=True)
+        else:
+            st.info("Aucune réponse libre pour les filtres sélectionnés")
+    
+    with col2:
+        st.markdown("### 🔎 Rechercher dans les Réponses")
+        requete = st.text_input("Mots recherchés", key="recherche_reponses",
+                                placeholder="ex. compte paypal, pai*",
+                                help="Réponses contenant tous les mots (accents et majuscules ignorés) ; "
+                                     "« mot* » cherche les mots qui commencent par « mot »")
+        if requete.strip():
+            scores = recherche.rechercher(requete, df_filtered.index)
+            st.caption(f"📄 {len(scores)} réponse(s) trouvée(s)")
+            if len(scores) > 0:
+                lignes = df_filtered.loc[scores.index[:50]]
+                affichees = [col for col in ['horodateur', 'pays', 'type_pack'] if col in lignes.columns]
+                st.dataframe(lignes[affichees + colonnes].rename(columns={colonnes[0]: 'reponse'}),
+                             use_container_width=True, hide_index=True)
+    if 'poids' in df_filtered.columns:
+        st.caption("ℹ️ Aperçu rapide : mots et recherche limités aux réponses de l'échantillon")
+
+def afficher_nouveautes(jeu, suivi):
+    """
+    Réponses ajoutées, supprimées et modifiées par le dernier export intégré
+    (comptes seuls en mode multi-processus : les lignes restent dans le lanceur)
+    """
+    resume = jeu.resume_nouveautes
+    if not resume:
+        return
+    with st.expander(f"🆕 Nouveautés du dernier export ({resume.get('fichier') or 'export'}, "
+                     f"{resume['date'].replace('T', ' ')})"):
+        partiel = resume.get('partiel', False)
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Réponses ajoutées", resume['ajoutees'])
+        col2.metric("Réponses supprimées", "—" if partiel else resume['supprimees'])
+        col3.metric("Réponses modifiées", resume['modifiees'] if resume['comparables'] else "—")
+        if partiel:
+            st.caption("ℹ️ Dépôt partiel : seules ses réponses absentes du jeu de données sont listées")
+        elif not resume['comparables']:
+            st.caption("ℹ️ Export brut comparé à un fichier nettoyé : modifications non comparées")
+        nouveautes = jeu.nouveautes
+        if nouveautes is None:
+            changements = pd.Series(resume['changements_colonnes'], dtype='int64')
+        else:
+            changements = nouveautes.changements_colonnes
+            onglets = st.tabs(["Ajoutées", "Modifiées", "Supprimées"])
+            for onglet, lignes in zip(onglets, [nouveautes.ajoutees, nouveautes.modifiees, nouveautes.supprimees]):
+                with onglet:
+                    if len(lignes) == 0:
+                        st.info("Aucune réponse")
+                    else:
+                        st.dataframe(lignes.head(200), use_container_width=True, hide_index=True)
+                        if len(lignes) > 200:
+                            st.caption(f"200 premières réponses sur {len(lignes)}")
+        if len(changements) > 0:
+            st.plotly_chart(figure(suivi, 'figure_changements_colonnes', changements), use_container_width=True)
+
+def afficher_comparaison_campagnes(cache, politique_doublons, suivi):
+    """
+    Comparaison des campagnes enregistrées, entières (sans les filtres), sur leurs résumés :
+    les campagnes non chargées le sont en arrière-plan et restent comparables une fois libérées.
+    Retourne True tant qu'une campagne est en cours de chargement.
+    """
+    st.markdown("---")
+    st.markdown("## 🆚 Comparaison des Campagnes")
+    
+    resumes, en_cours = {}, []
+    for campagne in cache.campagnes:
+        try:
+            resume = cache.resume(campagne, politique_doublons)
+        except Exception as e:
+            # Chargement en échec oublié : relancé au prochain passage
+            cache.oublier(campagne, politique_doublons)
+            st.warning(f"⚠️ Campagne « {campagne} » indisponible ({cache.campagnes[campagne]}) : {e}")
+            continue
+        if resume is None:
+            en_cours.append(campagne)
+        else:
+            resumes[campagne] = resume
+    if en_cours:
+        st.info(f"⏳ Chargement des campagnes : {', '.join(en_cours)}")
+    
+    if resumes:
+        table = pd.DataFrame({
+            campagne: {
+                'Inscriptions': resume['inscriptions'],
+                'Revenu (FCFA)': round(resume['revenu']),
+                'Prix moyen (FCFA)': None if resume['prix_moyen'] is None else round(resume['prix_moyen']),
+                'Pays': resume['nb_pays'],
+                'Début': resume['debut'].strftime('%d/%m/%Y') if resume['debut'] is not None else None,
+                'Fin': resume['fin'].strftime('%d/%m/%Y') if resume['fin'] is not None else None,
+            }
+            for campagne, resume in resumes.items()
+        }).T
+        st.dataframe(table, use_container_width=True)
+        
+        courbes = pd.concat([resume['courbe'].rename_axis('jour').reset_index(name='cumul').assign(campagne=campagne)
+                             for campagne, resume in resumes.items()], ignore_index=True)
+        parts = pd.concat([resume['parts_packs'].rename_axis('type_pack').reset_index(name='part')
+                           .assign(campagne=campagne) for campagne, resume in resumes.items()], ignore_index=True)
+        col1, col2 = st.columns(2)
+        with col1:
+            if len(courbes) > 0:
+                st.plotly_chart(figure(suivi, 'figure_courbes_campagnes', courbes), use_container_width=True)
+        with col2:
+            if len(parts) > 0:
+                st.plotly_chart(figure(suivi, 'figure_parts_packs_campagnes', parts), use_container_width=True)
+    
+    en_memoire = [f"{campagne} ({'chargement' if taille is None else f'{taille / 1024 ** 2:.1f} Mo'})"
+                  + ("" if politique == 'derniere' else f", {politique}")
+                  for campagne, politique, taille in cache.etat()]
+    st.caption(f"🧠 En mémoire : {', '.join(en_memoire) or 'aucune campagne'} — budget "
+               f"{cache.budget / 1024 ** 2:.0f} Mo, {cache.liberations} campagne(s) libérée(s)")
+    return bool(en_cours)
+
+def afficher_explorateur(df_filtered, ordres):
+    """
+    7. Explorateur des réponses filtrées : tri sur les ordres précalculés, pagination côté serveur,
+    seules les lignes de la page affichée sont lues et envoyées au navigateur
+    """
+    st.markdown("---")
+    st.markdown("## 🔎 Explorer les Réponses")
+    
+    if ordres is None or len(df_filtered) == 0:
+        st.info("Aucune réponse pour les filtres sélectionnés")
+        return
+    
+    col1, col2, col3, col4 = st.columns([2, 2, 1, 1])
+    with col1:
+        colonnes_tri = [None] + [col for col in ordres.colonnes() if col in df_filtered.columns]
+        colonne_tri = st.selectbox("Trier par", colonnes_tri, key="explorateur_tri",
+                                   format_func=lambda col: "Ordre d'arrivée" if col is None else col)
+    with col2:
+        sens = st.radio("Ordre", ["Décroissant", "Croissant"], key="explorateur_sens", horizontal=True)
+    with col3:
+        taille = st.selectbox("Lignes par page", [25, 50, 100, 200], key="explorateur_taille")
+    nb_pages = max((len(df_filtered) - 1) // taille + 1, 1)
+    with col4:
+        page = st.number_input("Page", min_value=1, value=1, step=1, key="explorateur_page")
+    # Page demandée au-delà de la dernière (filtres plus restrictifs) : dernière page
+    page = min(int(page), nb_pages)
+    
+    colonnes_disponibles = [col for col in df_filtered.columns if col != 'poids']
+    colonnes = st.multiselect("Colonnes affichées", colonnes_disponibles, key="explorateur_colonnes",
+                              default=[col for col in COLONNES_EXPLORATEUR if col in colonnes_disponibles])
     
-    # Section de téléchargement des données
+    etiquettes, total = ordres.page(df_filtered.index, colonne_tri, sens == "Croissant", (page - 1) * taille, taille)
+    st.dataframe(df_filtered.loc[etiquettes, colonnes or colonnes_disponibles],
+                 use_container_width=True, hide_index=True)
+    debut = (page - 1) * taille
+    st.caption(f"📄 Réponses {debut + 1} à {debut + len(etiquettes)} sur {total} (page {page} / {nb_pages})")
+    if 'poids' in df_filtered.columns:
+        st.caption("ℹ️ Aperçu rapide : réponses de l'échantillon uniquement")
+
+def appliquer_filtres(df, filtres):
+    """
+    Applique les filtres de la page (période, pays, pack, paiement) à un DataFrame
+    """
+    (debut, fin), pays, pack, paiement = filtres
+    masque = pd.Series(True, index=df.index)
+    if debut is not None and fin is not None:
+        masque &= (df['horodateur'].dt.date >= debut) & (df['horodateur'].dt.date <= fin)
+    for colonne, valeur in [('pays', pays), ('type_pack', pack), ('methode_paiement_std', paiement)]:
+        if valeur != 'Tous':
+            masque &= df[colonne] == valeur
+    return df[masque]
+
+def afficher_telechargements(df, df_filtered, filtres=None):
+    """
+    Section de téléchargement des données
+    df_filtered : None en aperçu rapide (filtres appliqués aux données complètes au clic)
+    """
     st.markdown("---")
     st.markdown("## 📥 Téléchargement des Données")
     
@@ -738,6 +914,8 @@ def main():
     
     with col1:
         if st.button("📄 Télécharger les données filtrées CSV"):
+            if df_filtered is None:
+                df_filtered = appliquer_filtres(df, filtres)
             csv = df_filtered.to_csv(index=False)
             st.download_button(
                 label="💾 Télécharger CSV",
@@ -751,6 +929,8 @@ def main():
             # Créer un buffer pour le fichier Excel
             from io import BytesIO
             buffer = BytesIO()
+            if df_filtered is None:
+                df_filtered = appliquer_filtres(df, filtres)
             df_filtered.to_excel(buffer, index=False)
             buffer.seek(0)
             
@@ -762,10 +942,459 @@ def main():
             )
     
     # Informations sur le téléchargement
-    if len(df_filtered) != len(df):
+    if df_filtered is None:
+        st.info("💡 Aperçu rapide : les fichiers téléchargés contiendront les lignes exactes correspondant aux filtres")
+    elif len(df_filtered) != len(df):
         st.info(f"💡 Les fichiers téléchargés contiendront {len(df_filtered)} lignes (données filtrées) au lieu de {len(df)} lignes (données complètes)")
     else:
         st.info(f"💡 Les fichiers téléchargés contiendront toutes les {len(df)} lignes de données")
+
+def afficher_panneau_performance(suivi):
+    """
+    Panneau de débogage : temps par section, caches, taille des graphiques et mémoire du dernier rerun
+    """
+    with st.sidebar:
+        st.markdown("## 🛠️ Performance du rerun")
+        st.metric("⏱️ Durée totale", f"{suivi.total_ms:.0f} ms")
+        if suivi.rss is not None:
+            st.metric("🧠 Mémoire (RSS)", f"{suivi.rss / 1024 ** 2:.0f} Mo")
+        
+        etapes = pd.DataFrame(suivi.etapes)[['section', 'duree_ms', 'lignes']]
+        etapes.columns = ['Section', 'Durée (ms)', 'Lignes']
+        st.dataframe(etapes, use_container_width=True, hide_index=True)
+        
+        if suivi.caches:
+            caches = pd.DataFrame(suivi.caches).T
+            caches.columns = ['Succès', 'Échecs']
+            st.dataframe(caches, use_container_width=True)
+        
+        if suivi.graphiques:
+            graphiques = pd.DataFrame(suivi.graphiques).T
+            graphiques['octets'] = (graphiques['octets'] / 1024).round(1)
+            graphiques.columns = ['Taille (Ko)', 'Points']
+            st.dataframe(graphiques.sort_values('Taille (Ko)', ascending=False), use_container_width=True)
+        st.caption(f"Traces JSON : {FICHIER_TRACES}")
+
+def main():
+    # Chargement du CSS personnalisé
+    load_css()
+    
+    # Logo et titre principal avec design amélioré
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col2:
+        st.markdown("""
+        <div style="text-align: center; margin-bottom: 2rem;">
+            <div style="font-size: 4rem; margin-bottom: 1rem;"></div>
+            <h1 class="main-header">Dashboard d'Analyse du Formulaire</h1>
+            
+        </div>
+        """, unsafe_allow_html=True)
+    
+    # Suivi des performances du rerun (identifiant de session stable entre les reruns)
+    if 'id_session' not in st.session_state:
+        st.session_state['id_session'] = uuid.uuid4().hex[:12]
+    suivi = SuiviExecution(st.session_state['id_session'])
+    
+    with suivi.mesurer('chargement') as etape:
+        # Campagne affichée (sélecteur présent dès qu'une autre campagne est enregistrée)
+        campagnes = cache_campagnes().campagnes
+        campagne = CAMPAGNE_PRINCIPALE
+        if len(campagnes) > 1:
+            campagne = st.sidebar.selectbox("🗂️ Campagne", list(campagnes), key="campagne",
+                                            help=f"Campagnes enregistrées dans {FICHIER_CAMPAGNES}")
+        
+        # Chargement des données (politique de déduplication choisie dans la sidebar)
+        politique_doublons = st.sidebar.radio(
+            "👥 Doublons : inscription conservée",
+            ['derniere', 'premiere'],
+            format_func=lambda p: "La plus récente" if p == 'derniere' else "La plus ancienne",
+            key="politique_doublons",
+            disabled=bool(CHEMIN_JEU_PARTAGE),
+            help="Choisit quelle réponse garder quand une personne a soumis le formulaire plusieurs fois"
+                 " (fixée par le script de lancement)"
+        )
+        chargement = suivi.appel_cache('jeu_de_donnees', chargement_jeu, politique_doublons, campagne)
+    
+        # Chargement en arrière-plan : page partielle puis nouveau passage jusqu'à la fin
+        if not chargement.termine():
+            afficher_chargement_en_cours(chargement)
+            time.sleep(INTERVALLE_CHARGEMENT)
+            st.rerun()
+        try:
+            jeu = chargement.resultat()
+        except Exception as e:
+            # Le chargement en échec est oublié : il sera relancé au prochain passage
+            cache_campagnes().oublier(campagne, politique_doublons)
+            st.error(f"Erreur lors du chargement des données: {e}")
+            st.error(f"⚠️ Impossible de charger les données. Vérifiez que le fichier '{campagnes[campagne]}' existe.")
+            return
+    
+        # Version courante du jeu de données (les nouveaux exports sont pris en compte au rerun suivant)
+        instantane = jeu.instantane()
+        df = instantane.df
+        etape['lignes'] = len(df)
+    
+    # Log pour debug
+    st.sidebar.text(f"✅ {len(df)} lignes valides chargées")
+    if jeu.doublons_retires > 0:
+        st.sidebar.text(f"👥 {jeu.doublons_retires} doublons retirés")
+    if 'pays_corrige' in df.columns and df['pays_corrige'].astype(bool).any():
+        st.sidebar.text(f"📞 {int(df['pays_corrige'].astype(bool).sum())} pays corrigés par le téléphone")
+    if jeu.lignes_quarantaine > 0:
+        st.sidebar.text(f"🚧 {jeu.lignes_quarantaine} lignes en quarantaine "
+                        f"({jeu.lignes_exclues} exclues)")
+        with st.sidebar.expander("Codes de rejet"):
+            st.dataframe(jeu.comptes_quarantaine.rename('lignes'), use_container_width=True)
+    if 'pays' in df.columns:
+        st.sidebar.text(f"🌍 {df['pays'].nunique()} pays uniques")
+        # Afficher un échantillon des pays pour vérification
+        pays_sample = sorted(df['pays'].unique())[:5]
+        st.sidebar.text(f"📝 Échantillon: {', '.join(pays_sample)}")
+    
+    # Sidebar avec design amélioré
+    with st.sidebar:
+        st.markdown("""
+        <div style="text-align: center; padding: 1rem; background: linear-gradient(135deg, #1f77b4, #ff7f0e); border-radius: 12px; margin-bottom: 2rem;">
+            <h2 style="color: white; margin: 0;"> Centre de Contrôle</h2>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        st.markdown("## 📋 Informations générales")
+        
+        # Métriques sidebar avec style
+        st.markdown(f"""
+        <div class="metric-card animated-card">
+            <div class="metric-label">📊 Total Réponses</div>
+            <div class="metric-value">{len(df)}</div>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        st.markdown(f"""
+        <div class="metric-card animated-card">
+            <div class="metric-label">📂 Colonnes</div>
+            <div class="metric-value">{len(df.columns)}</div>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        # Suivi des mises à jour en direct
+        st.markdown(f"""
+        <div class="metric-card animated-card">
+            <div class="metric-label">🔴 Données en direct (v{instantane.version})</div>
+            <div style="color: #1f77b4; font-weight: 600;">Mise à jour : {instantane.derniere_maj.strftime('%d/%m/%Y %H:%M:%S')}</div>
+        </div>
+        """, unsafe_allow_html=True)
+        if instantane.version > 1:
+            st.caption(f"📥 +{instantane.lignes_ajoutees} réponses lors de la dernière mise à jour")
+        
+        # Bouton pour vider le cache
+        if st.button("🔄 Actualiser les données", help="Vide le cache et recharge les données"):
+            cache_campagnes().vider()
+            cache_campagnes.clear()
+            st.cache_data.clear()
+            st.rerun()
+        
+        # Panneau de débogage des performances (affiché en fin de rerun)
+        st.checkbox("🛠️ Panneau de performance", key="panneau_performance",
+                    help="Temps par section, caches et mémoire du dernier rerun")
+        
+        # Aperçu rapide : les sections lisent l'échantillon stratifié au lieu de toutes les lignes
+        apercu = st.checkbox("⚡ Aperçu rapide (échantillon)", value=len(df) > SEUIL_APERCU, key="apercu_rapide",
+                             help="Chiffres estimés sur un échantillon stratifié par pays, pack et mois, "
+                                  "avec intervalles de confiance à 95 %. Décocher pour les chiffres exacts.")
+        
+        # Comparaison des campagnes : les autres campagnes ne sont chargées qu'à la demande
+        if len(campagnes) > 1:
+            st.checkbox("🆚 Comparer les campagnes", key="comparaison_campagnes",
+                        help="Charge les autres campagnes en arrière-plan ; les moins récemment utilisées "
+                             "sont libérées au-delà du budget mémoire, leurs résumés restent comparables")
+    
+    df_complet = df
+    echantillon = instantane.index.get('echantillon')
+    apercu = apercu and echantillon is not None and len(echantillon) > 0
+    if apercu:
+        df = echantillon
+        st.info(f"⚡ **Aperçu rapide** : chiffres estimés sur un échantillon stratifié de {len(df)} lignes "
+                f"(sur {len(df_complet)}), barres d'erreur à 95 %. Décochez l'option dans la barre latérale "
+                f"pour les chiffres exacts.")
+    
+    # Filtres de période, additionnels et résumé du filtrage
+    with suivi.mesurer('filtrage', len(df)):
+        df_filtered = df.copy()
+        periode = (None, None)
+        pays_selectionne = pack_selectionne = paiement_selectionne = 'Tous'
+        
+        if 'horodateur' in df.columns and df['horodateur'].notna().any():
+            st.markdown("""
+            <div style="background: linear-gradient(135deg, #e3f2fd, #bbdefb); padding: 1rem; border-radius: 12px; margin: 1rem 0;">
+                <h3 style="color: #1976d2; margin: 0 0 1rem 0;"> Filtres de Période</h3>
+            </div>
+            """, unsafe_allow_html=True)
+        
+            date_min = df['horodateur'].min().date()
+            date_max = df['horodateur'].max().date()
+        
+            st.markdown(f"""
+            <div class="metric-card">
+                <div class="metric-label">📆 Période Complète</div>
+                <div style="color: #1f77b4; font-weight: 600;">{date_min.strftime('%d/%m/%Y')} - {date_max.strftime('%d/%m/%Y')}</div>
+            </div>
+            """, unsafe_allow_html=True)
+        
+            # Sélecteurs de date avec style
+            col1, col2 = st.columns(2)
+        
+            with col1:
+                date_debut_selectionnee = st.date_input(
+                    "📅 Date début",
+                    value=date_min,
+                    min_value=date_min,
+                    max_value=date_max,
+                    key="date_debut",
+                    help="Sélectionnez la date de début de votre analyse"
+                )
+        
+            with col2:
+                date_fin_selectionnee = st.date_input(
+                    "📅 Date fin",
+                    value=date_max,
+                    min_value=date_min,
+                    max_value=date_max,
+                    key="date_fin",
+                    help="Sélectionnez la date de fin de votre analyse"
+                )
+        
+            # Vérification des dates avec alertes stylées
+            if date_debut_selectionnee > date_fin_selectionnee:
+                st.error("❌ La date de début doit être antérieure à la date de fin")
+            else:
+                # Filtrage des données
+                mask_date = (
+                    (df['horodateur'].dt.date >= date_debut_selectionnee) & 
+                    (df['horodateur'].dt.date <= date_fin_selectionnee)
+                )
+                df_filtered = df[mask_date].copy()
+                periode = (date_debut_selectionnee, date_fin_selectionnee)
+            
+                # Affichage de la période sélectionnée avec style
+                if len(df_filtered) > 0:
+                    st.success(f"✅ **Période sélectionnée:** {date_debut_selectionnee.strftime('%d/%m/%Y')} - {date_fin_selectionnee.strftime('%d/%m/%Y')}")
+                    st.info(f"📊 **{formater_estimation(*estimer_total(df_filtered))} réponses** dans cette période")
+                
+                    # Bouton de réinitialisation stylé
+                    if st.button("🔄 Réinitialiser la période", type="secondary"):
+                        st.rerun()
+                else:
+                    st.warning("⚠️ Aucune donnée dans cette période")
+    
+        # Filtres additionnels avec design moderne
+        st.markdown("""
+        <div style="background: linear-gradient(135deg, #fff3e0, #ffe0b2); padding: 1rem; border-radius: 12px; margin: 1rem 0;">
+            <h3 style="color: #f57c00; margin: 0 0 1rem 0;">🎯 Filtres Additionnels</h3>
+        </div>
+        """, unsafe_allow_html=True)
+    
+        # Mettre les trois filtres sur la même ligne pour économiser l'espace
+        col1, col2, col3 = st.columns(3)
+    
+        # Filtre par pays avec style - utiliser les données complètes pour la liste
+        with col1:
+            if 'pays' in df.columns:
+                # Utiliser df original pour avoir tous les pays disponibles
+                tous_pays = sorted(df['pays'].dropna().unique().tolist())
+                pays_disponibles = ['Tous'] + tous_pays
+            
+                pays_selectionne = st.selectbox(
+                    "🌍 Sélectionnez un pays",
+                    pays_disponibles,
+                    key="filtre_pays",
+                    help="Filtrez les données par pays spécifique"
+                )
+            
+                if pays_selectionne != 'Tous':
+                    df_filtered = df_filtered[df_filtered['pays'] == pays_selectionne]
+    
+        # Filtre par type de pack avec style - utiliser les données complètes
+        with col2:
+            if 'type_pack' in df.columns:
+                tous_packs = sorted(df['type_pack'].dropna().unique().tolist())
+                packs_disponibles = ['Tous'] + tous_packs
+            
+                pack_selectionne = st.selectbox(
+                    "📦 Sélectionnez un type de pack",
+                    packs_disponibles,
+                    key="filtre_pack",
+                    help="Filtrez les données par type de pack"
+                )
+            
+                if pack_selectionne != 'Tous':
+                    df_filtered = df_filtered[df_filtered['type_pack'] == pack_selectionne]
+    
+        # Filtre par méthode de paiement avec style - utiliser les données complètes
+        with col3:
+            if 'methode_paiement_std' in df.columns:
+                tous_paiements = sorted(df['methode_paiement_std'].dropna().unique().tolist())
+                paiements_disponibles = ['Tous'] + tous_paiements
+            
+                paiement_selectionne = st.selectbox(
+                    "💳 Sélectionnez une méthode de paiement",
+                    paiements_disponibles,
+                    key="filtre_paiement",
+                    help="Filtrez les données par méthode de paiement"
+                )
+            
+                if paiement_selectionne != 'Tous':
+                    df_filtered = df_filtered[df_filtered['methode_paiement_std'] == paiement_selectionne]
+    
+        # Informations sur le filtrage avec design
+        if len(df_filtered) != len(df):
+            st.markdown("---")
+            st.markdown("""
+            <div class="metric-card" style="background: linear-gradient(135deg, #f3e5f5, #e1bee7);">
+                <h3 style="color: #7b1fa2; margin: 0 0 1rem 0;">📊 Résumé du Filtrage</h3>
+            </div>
+            """, unsafe_allow_html=True)
+        
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.markdown(f"""
+                <div class="metric-card animated-card">
+                    <div class="metric-label">📋 Données Originales</div>
+                    <div class="metric-value">{len(df_complet)}</div>
+                </div>
+                """, unsafe_allow_html=True)
+        
+            with col2:
+                st.markdown(f"""
+                <div class="metric-card animated-card">
+                    <div class="metric-label">🎯 Données Filtrées</div>
+                    <div class="metric-value">{formater_estimation(*estimer_total(df_filtered))}</div>
+                </div>
+                """, unsafe_allow_html=True)
+        
+            with col3:
+                reduction = ((len(df_complet) - estimer_total(df_filtered)[0]) / len(df_complet)) * 100
+                st.markdown(f"""
+                <div class="metric-card animated-card">
+                    <div class="metric-label">📉 Réduction</div>
+                    <div class="metric-value">{reduction:.1f}%</div>
+                </div>
+                """, unsafe_allow_html=True)
+    
+    # Métriques clés avec design premium
+    with suivi.mesurer('kpi', len(df_filtered)):
+        st.markdown("""
+        <div style="text-align: center; margin: 2rem 0;">
+            <h2 class="section-title">🎯 Métriques Clés de Performance</h2>
+        </div>
+        """, unsafe_allow_html=True)
+    
+        # Affichage d'alerte si données filtrées avec style
+        if len(df_filtered) != len(df):
+            st.markdown(f"""
+            <div style="background: linear-gradient(135deg, #e8f5e8, #c8e6c9); padding: 1rem; border-radius: 12px; margin: 1rem 0; border-left: 5px solid #4caf50;">
+                <h4 style="color: #2e7d32; margin: 0;">📊 Affichage basé sur <strong>{formater_estimation(*estimer_total(df_filtered))} réponses filtrées</strong> (sur {len(df_complet)} au total)</h4>
+            </div>
+            """, unsafe_allow_html=True)
+    
+        indicateurs = indicateurs_cles(df_filtered)
+        col1, col2, col3, col4 = st.columns(4)
+    
+        with col1:
+            st.markdown(f"""
+            <div class="metric-card animated-card" style="background: linear-gradient(135deg, #e3f2fd, #bbdefb);">
+                <div class="metric-label">📊 Total Réponses</div>
+                <div class="metric-value" style="color: #1976d2;">{formater_estimation(indicateurs['total'], indicateurs['marge'])}</div>
+            </div>
+            """, unsafe_allow_html=True)
+    
+        with col2:
+            if indicateurs['nb_pays'] is not None:
+                nb_pays = indicateurs['nb_pays']
+                st.markdown(f"""
+                <div class="metric-card animated-card" style="background: linear-gradient(135deg, #e8f5e8, #c8e6c9);">
+                    <div class="metric-label">🌍 Pays Représentés</div>
+                    <div class="metric-value" style="color: #2e7d32;">{nb_pays}</div>
+                </div>
+                """, unsafe_allow_html=True)
+    
+        with col3:
+            if indicateurs['age_moyen'] is not None:
+                age_moyen = indicateurs['age_moyen']
+                st.markdown(f"""
+                <div class="metric-card animated-card" style="background: linear-gradient(135deg, #fff3e0, #ffe0b2);">
+                    <div class="metric-label">🎂 Âge Moyen</div>
+                    <div class="metric-value" style="color: #f57c00;">{age_moyen:.1f} ans</div>
+                </div>
+                """, unsafe_allow_html=True)
+            else:
+                st.markdown("""
+                <div class="metric-card animated-card" style="background: linear-gradient(135deg, #fff3e0, #ffe0b2);">
+                    <div class="metric-label">🎂 Âge Moyen</div>
+                    <div class="metric-value" style="color: #f57c00;">N/A</div>
+                </div>
+                """, unsafe_allow_html=True)
+    
+        with col4:
+            if 'type_pack' in df_filtered.columns and len(df_filtered) > 0:
+                pack_populaire = indicateurs['pack_populaire'] or 'N/A'
+                st.markdown(f"""
+                <div class="metric-card animated-card" style="background: linear-gradient(135deg, #f3e5f5, #e1bee7);">
+                    <div class="metric-label">📦 Pack Populaire</div>
+                    <div class="metric-value" style="color: #7b1fa2;">{pack_populaire}</div>
+                </div>
+                """, unsafe_allow_html=True)
+            else:
+                st.markdown("""
+                <div class="metric-card animated-card" style="background: linear-gradient(135deg, #f3e5f5, #e1bee7);">
+                    <div class="metric-label">📦 Pack Populaire</div>
+                    <div class="metric-value" style="color: #7b1fa2;">N/A</div>
+                </div>
+                """, unsafe_allow_html=True)
+    
+    # Sections d'analyse, chacune mesurée dans le suivi du rerun
+    with suivi.mesurer('nouveautes'):
+        afficher_nouveautes(jeu, suivi)
+    
+    comparaison_en_cours = False
+    if len(campagnes) > 1 and st.session_state.get('comparaison_campagnes'):
+        with suivi.mesurer('comparaison_campagnes'):
+            comparaison_en_cours = afficher_comparaison_campagnes(cache_campagnes(), politique_doublons, suivi)
+    
+    with suivi.mesurer('offres', len(df_filtered)):
+        afficher_offres(df_filtered, suivi)
+    
+    with suivi.mesurer('geographie', len(df_filtered)):
+        afficher_geographie(df_filtered, suivi, cumuls_pour_filtres(instantane, df_filtered))
+    
+    with suivi.mesurer('paiements', len(df_filtered)):
+        afficher_paiements(df_filtered, suivi)
+    
+    with suivi.mesurer('operateurs', len(df_filtered)):
+        afficher_operateurs(df_filtered, suivi)
+    
+    with suivi.mesurer('temporel', len(df_filtered)):
+        sommes, seg = sommes_pour_filtres(instantane, df_filtered, pays_selectionne, pack_selectionne,
+                                          paiement_selectionne)
+        # Anomalies du flux des inscriptions pour la série correspondant aux filtres
+        anomalies = instantane.index.get('anomalies')
+        serie = serie_anomalies(pays_selectionne, pack_selectionne, paiement_selectionne)
+        if anomalies is not None:
+            anomalies = anomalies[anomalies['serie'] == serie]
+        afficher_temporel(df_filtered, suivi, sommes, seg, periode, anomalies)
+    
+    with suivi.mesurer('ages', len(df_filtered)):
+        afficher_ages(df_filtered, suivi)
+    
+    with suivi.mesurer('reponses_libres', len(df_filtered)):
+        afficher_reponses_libres(df_filtered, instantane.index.get('texte'), suivi)
+    
+    with suivi.mesurer('explorateur', len(df_filtered)):
+        afficher_explorateur(df_filtered, instantane.index.get('tri'))
+    
+    with suivi.mesurer('telechargements', len(df_filtered)):
+        # En aperçu rapide, les lignes exactes ne sont filtrées qu'au moment du téléchargement
+        filtres = (periode, pays_selectionne, pack_selectionne, paiement_selectionne)
+        afficher_telechargements(df_complet, None if apercu else df_filtered, filtres)
     
     # Footer premium
     st.markdown("---")
@@ -808,6 +1437,20 @@ def main():
         </div>
     </div>
     """.format(datetime.now().strftime('%d/%m/%Y %H:%M')), unsafe_allow_html=True)
+    
+    # Clôture du suivi : trace JSON, puis panneau de performance si demandé
+    suivi.terminer()
+    if st.session_state.get('panneau_performance'):
+        afficher_panneau_performance(suivi)
+    
+    # Préchauffage par le lanceur : version (partagée, sinon locale) entièrement affichée par ce processus
+    publication = jeu.publication if CHEMIN_JEU_PARTAGE else instantane.version
+    noter_etat_processus(publication, len(df_complet), st.get_option('server.port'))
+    
+    # Campagnes de la comparaison encore en chargement : nouveau passage une fois la page affichée
+    if comparaison_en_cours:
+        time.sleep(INTERVALLE_CHARGEMENT)
+        st.rerun()
 
 if __name__ == "__main__":
     main()
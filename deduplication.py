@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Détection des inscriptions en double
+Objectifs :
+- Construire des clés normalisées (email, téléphone E.164, nom)
+- Résoudre les doublons exacts par hachage (une passe par clé)
+- Repérer les quasi-doublons via un index de blocage (pas de comparaison deux à deux),
+  sans fusionner deux lignes dont les emails ou les téléphones diffèrent
+- Conserver la première ou la dernière réponse selon l'horodateur
+- Écrire les lignes supprimées dans un fichier d'audit
+"""
+
+import pandas as pd
+import numpy as np
+from difflib import SequenceMatcher
+from unidecode import unidecode
+
+# Politiques de conservation disponibles
+POLITIQUES = ('derniere', 'premiere')
+
+# Seuil de similarité des noms pour les quasi-doublons (0 à 1)
+SEUIL_SIMILARITE_NOM = 0.9
+
+# Taille maximale d'un bloc comparé (évite les blocs trop génériques)
+TAILLE_MAX_BLOC = 50
+
+
+def detecter_colonne(df, mots, exclure=()):
+    """
+    Retourne la première colonne dont le nom contient un des mots clés
+    """
+    for col in df.columns:
+        nom = str(col).lower()
+        if any(mot in nom for mot in mots) and not any(mot in nom for mot in exclure):
+            return col
+    return None
+
+
+def normaliser_email(serie):
+    """
+    Email en minuscules sans espaces, NaN si vide
+    """
+    emails = serie.astype(str).str.strip().str.lower()
+    return emails.where(serie.notna() & emails.str.contains('@', regex=False))
+
+
+def normaliser_telephone_e164(serie):
+    """
+    Ramène le numéro issu de nettoyer_telephone (format international) au format E.164
+    """
+    telephones = serie.astype(str).str.replace(r'[^\d+]', '', regex=True)
+    # Un numéro trop court n'est pas une clé fiable
+    return telephones.where(serie.notna() & (telephones.str.len() >= 8))
+
+
+def normaliser_nom(noms, prenoms=None):
+    """
+    Clé de nom : tokens sans accents, en minuscules et triés
+    (« TCHINDA Gildas » et « Gildas Tchinda » donnent la même clé)
+    """
+    complet = noms.fillna('').astype(str)
+    if prenoms is not None:
+        complet = complet + ' ' + prenoms.fillna('').astype(str)
+
+    # unidecode n'est appliqué qu'une fois par valeur distincte
+    valeurs = pd.unique(complet.values)
+    correspondance = {}
+    for valeur in valeurs:
+        tokens = unidecode(valeur).lower().replace('-', ' ').split()
+        correspondance[valeur] = ' '.join(sorted(tokens))
+
+    cles = complet.map(correspondance)
+    return cles.where(cles != '')
+
+
+def construire_cles(df):
+    """
+    Construit le DataFrame des clés normalisées utilisées pour la déduplication
+    """
+    col_email = detecter_colonne(df, ['mail'], exclure=['domaine', 'type'])
+    col_tel = detecter_colonne(df, ['telephone', 'phone'])
+    col_nom = detecter_colonne(df, ['nom'], exclure=['prenom'])
+    col_prenom = detecter_colonne(df, ['prenom'])
+
+    vide = pd.Series(np.nan, index=df.index, dtype=object)
+    cles = pd.DataFrame(index=df.index)
+    cles['email'] = normaliser_email(df[col_email]) if col_email else vide
+    cles['telephone'] = normaliser_telephone_e164(df[col_tel]) if col_tel else vide
+    if col_nom:
+        cles['nom'] = normaliser_nom(df[col_nom], df[col_prenom] if col_prenom else None)
+    else:
+        cles['nom'] = vide
+    return cles
+
+
+def _propager_groupes(cles, colonnes, max_iterations=10):
+    """
+    Attribue un identifiant de groupe commun aux lignes partageant une clé.
+    Chaque passe est un groupby (hachage) sur une clé ; on itère jusqu'à
+    stabilité pour gérer les liens transitifs email ↔ téléphone.
+    """
+    groupe = np.arange(len(cles))
+    for _ in range(max_iterations):
+        precedent = groupe.copy()
+        for col in colonnes:
+            valeurs = cles[col].values
+            masque = cles[col].notna().values
+            if not masque.any():
+                continue
+            minimum = pd.Series(groupe[masque]).groupby(valeurs[masque]).transform('min')
+            groupe[masque] = minimum.values
+        if np.array_equal(groupe, precedent):
+            break
+    return groupe
+
+
+def _cles_de_blocage(cles):
+    """
+    Index de blocage : début de la clé de nom. Le domaine email n'est pas une clé de blocage :
+    les messageries gratuites (gmail.com, yahoo.fr...) regroupent des inconnus au nom proche.
+    """
+    index = {}
+    blocs_nom = cles['nom'].str[:3]
+    valides = blocs_nom.notna()
+    for position, cle in zip(np.flatnonzero(valides.values), blocs_nom[valides].values):
+        index.setdefault(f"nom:{cle}", []).append(position)
+    return index
+
+
+def _contacts_en_conflit(cles, i, j):
+    """
+    Vrai si les deux lignes ont un email (ou un téléphone) renseigné et différent :
+    ce sont alors deux personnes, même avec des noms presque identiques
+    """
+    for col in ('email', 'telephone'):
+        a, b = cles[col].values[i], cles[col].values[j]
+        if pd.notna(a) and pd.notna(b) and a != b:
+            return True
+    return False
+
+
+def trouver_quasi_doublons(cles, groupe, seuil=SEUIL_SIMILARITE_NOM):
+    """
+    Retourne les paires (i, j) de positions considérées comme quasi-doublons.
+    Seules les lignes d'un même bloc sont comparées entre elles, et une paire dont
+    les emails ou les téléphones sont en conflit est écartée.
+    """
+    noms = cles['nom'].values
+    paires = []
+    for positions in _cles_de_blocage(cles).values():
+        if len(positions) < 2 or len(positions) > TAILLE_MAX_BLOC:
+            continue
+        for a in range(len(positions)):
+            i = positions[a]
+            for j in positions[a + 1:]:
+                if groupe[i] == groupe[j] or _contacts_en_conflit(cles, i, j):
+                    continue
+                if SequenceMatcher(None, noms[i], noms[j]).ratio() >= seuil:
+                    paires.append((i, j))
+    return paires
+
+
+def _fusionner_paires(groupe, paires):
+    """
+    Fusionne les groupes reliés par des paires (union-find sur les groupes)
+    """
+    parent = {}
+
+    def racine(x):
+        while parent.get(x, x) != x:
+            parent[x] = parent.get(parent[x], parent[x])
+            x = parent[x]
+        return x
+
+    for i, j in paires:
+        ri, rj = racine(groupe[i]), racine(groupe[j])
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+
+    if not parent:
+        return groupe
+    return np.array([racine(g) for g in groupe])
+
+
+def dedupliquer(df, politique='derniere', quasi_doublons=True, chemin_audit=None,
+                colonne_date='horodateur'):
+    """
+    Supprime les inscriptions en double.
+
+    politique : 'derniere' conserve la réponse la plus récente, 'premiere' la plus ancienne
+    quasi_doublons : fusionne aussi les quasi-doublons trouvés par blocage
+    chemin_audit : fichier CSV recevant les lignes supprimées (optionnel)
+
+    Retourne (df_dedoublonne, df_audit)
+    """
+    if politique not in POLITIQUES:
+        raise ValueError(f"Politique inconnue: {politique} (attendu: {', '.join(POLITIQUES)})")
+
+    if len(df) == 0:
+        audit = df.iloc[0:0].copy()
+        audit.insert(0, 'motif_suppression', pd.Series(dtype=object))
+        audit.insert(1, 'index_conserve', pd.Series(dtype=object))
+        if chemin_audit:
+            audit.to_csv(chemin_audit, index=True, index_label='index_supprime', encoding='utf-8-sig')
+        return df, audit
+
+    cles = construire_cles(df)
+    groupe = _propager_groupes(cles, ['email', 'telephone'])
+    exacts = groupe.copy()
+
+    if quasi_doublons:
+        groupe = _fusionner_paires(groupe, trouver_quasi_doublons(cles, groupe))
+
+    # Ordre chronologique (les dates manquantes sont considérées comme les plus anciennes)
+    if colonne_date in df.columns:
+        dates = df[colonne_date]
+        if not pd.api.types.is_datetime64_any_dtype(dates):
+            dates = pd.to_datetime(dates, format='%d/%m/%Y %H:%M:%S', errors='coerce')
+        ordre_date = dates.values.astype('datetime64[ns]').astype('int64')
+        ordre_date = np.where(pd.isna(dates).values, np.iinfo('int64').min, ordre_date)
+    else:
+        ordre_date = np.zeros(len(df), dtype='int64')
+
+    positions = np.arange(len(df))
+    tri = np.lexsort((positions, ordre_date, groupe))
+    garder = 'last' if politique == 'derniere' else 'first'
+    doublon_trie = pd.Series(groupe[tri]).duplicated(keep=garder).values
+
+    a_supprimer = np.zeros(len(df), dtype=bool)
+    a_supprimer[tri[doublon_trie]] = True
+
+    # Ligne conservée pour chaque groupe
+    conservee = pd.Series(positions[~a_supprimer], index=groupe[~a_supprimer])
+    conservee = conservee[~conservee.index.duplicated()]
+
+    supprimees = np.flatnonzero(a_supprimer)
+    gardees = conservee.loc[groupe[supprimees]].values
+
+    audit = df.iloc[supprimees].copy()
+    motifs = np.where(
+        cles['email'].values[supprimees] == cles['email'].values[gardees], 'doublon_email',
+        np.where(cles['telephone'].values[supprimees] == cles['telephone'].values[gardees],
+                 'doublon_telephone',
+                 np.where(exacts[supprimees] == exacts[gardees], 'doublon_transitif', 'quasi_doublon')))
+    audit.insert(0, 'motif_suppression', motifs)
+    audit.insert(1, 'index_conserve', df.index[gardees])
+
+    # Toujours réécrit : un passage sans doublon ne laisse pas l'audit du précédent
+    if chemin_audit:
+        audit.to_csv(chemin_audit, index=True, index_label='index_supprime', encoding='utf-8-sig')
+
+    return df[~a_supprimer].copy(), audit
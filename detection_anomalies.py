@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Détection d'anomalies en continu sur le flux des inscriptions
+Objectifs :
+- Compter les inscriptions par heure, au total et par pack, pays et méthode de paiement
+- Comparer chaque heure à une référence saisonnière par heure de la semaine (moyenne et variance
+  à lissage exponentiel) : un état de taille fixe par série, mis à jour à l'arrivée des lignes
+  sans relire l'historique
+- Signaler les pics dès que les lignes arrivent, les chutes à la fin de l'heure, et les méthodes
+  de paiement dont la part devient soudain dominante
+- Fermer aussi les heures à l'horloge, pour signaler les chutes quand les inscriptions s'arrêtent
+- Écrire les alertes détectées en direct dans un journal JSON (une ligne par alerte)
+"""
+
+import json
+import os
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from index_temporel import segment
+from taille_memoire import octets
+
+FICHIER_ALERTES = "alertes_anomalies.jsonl"
+
+HEURES_SEMAINE = 168
+# Le 1er janvier 1970 (heure 0) est un jeudi : décalage pour que l'heure 0 de la semaine soit le lundi 0 h
+DECALAGE_LUNDI = 3 * 24
+
+# Poids de la dernière semaine dans la référence d'une heure de la semaine
+ALPHA = 0.2
+# Semaines observées avant de juger une heure de la semaine
+MIN_OBSERVATIONS = 3
+# Écart signalé : au-delà de SEUIL_ECART écarts-types et d'au moins ECART_MINIMUM inscriptions.
+# La variance ne descend pas sous la moyenne + 1 (bruit de Poisson des petits comptes).
+SEUIL_ECART = 4.5
+ECART_MINIMUM = 3
+
+# Part d'une méthode de paiement : référence lissée sur les heures ; une méthode est signalée
+# quand elle dépasse PART_DOMINANTE des inscriptions de l'heure (au moins MIN_INSCRIPTIONS_PART)
+# avec un écart de SEUIL_ECART écarts-types binomiaux à sa référence
+ALPHA_PART = 0.05
+PART_DOMINANTE = 0.5
+MIN_INSCRIPTIONS_PART = 10
+VARIANCE_PART_MINIMALE = 0.05
+
+# Alertes conservées en mémoire pour le dashboard (le journal garde tout)
+MAX_ALERTES = 1000
+
+COLONNES_ALERTES = ['seau', 'serie', 'type', 'observe', 'attendu', 'score']
+
+TYPES_ALERTES = {
+    'pic': "Pic d'inscriptions",
+    'chute': "Chute des inscriptions",
+    'part_dominante': "Méthode de paiement dominante",
+}
+
+
+def decrire_alerte(alerte):
+    """
+    Texte court d'une alerte (dictionnaire ou ligne de resultat())
+    """
+    if alerte['type'] == 'part_dominante':
+        valeurs = f"{alerte['observe']:.0%} des inscriptions pour {alerte['attendu']:.0%} d'habitude"
+    else:
+        valeurs = f"{alerte['observe']:.0f} inscriptions pour {alerte['attendu']:.1f} attendues"
+    return f"{TYPES_ALERTES.get(alerte['type'], alerte['type'])} ({alerte['serie']}) : {valeurs}"
+
+
+class DetecteurAnomalies:
+    """
+    Index dérivé du jeu de données : construire(df) rejoue l'historique, ajouter(df) suit les
+    nouvelles lignes, resultat() publie les alertes (DataFrame, les plus récentes en dernier).
+    fermer_heures() ferme à l'horloge les heures écoulées sans nouvelle ligne.
+    Seules les alertes détectées par ajouter() sont écrites dans chemin_journal.
+    """
+
+    def __init__(self, segments=('type_pack', 'pays', 'methode_paiement_std'), chemin_journal=None,
+                 colonne_paiement='methode_paiement_std'):
+        self.segments = segments
+        self.chemin_journal = chemin_journal
+        self.colonne_paiement = colonne_paiement
+        self.construire(pd.DataFrame())
+
+    def construire(self, df):
+        self.series = {}
+        self.moyennes = np.zeros((0, HEURES_SEMAINE))
+        self.variances = np.zeros((0, HEURES_SEMAINE))
+        self.observations = np.zeros((0, HEURES_SEMAINE), dtype=np.int64)
+        self.noms = []
+        self.paiements = np.zeros(0, dtype=np.int64)
+        self.parts = np.zeros(0)
+        self.heure_ouverte = None
+        self.comptes_ouverts = np.zeros(0)
+        self.deja_signalees = set()
+        self.alertes = deque(maxlen=MAX_ALERTES)
+        self.lignes_tardives = 0
+        self._en_direct = False
+        self.ajouter(df)
+        self._en_direct = True
+
+    # --- Comptage des lignes -------------------------------------------------
+
+    def _enregistrer(self, noms):
+        nouvelles = [n for n in noms if n not in self.series]
+        for nom in nouvelles:
+            self.series[nom] = len(self.series)
+            self.noms.append(nom)
+        if nouvelles:
+            prefixe = segment(self.colonne_paiement, '')
+            self.paiements = np.array([i for i, nom in enumerate(self.noms) if nom.startswith(prefixe)],
+                                      dtype=np.int64)
+            # Part de référence inconnue (NaN) jusqu'à la première heure observée
+            self.parts = np.concatenate([self.parts, np.full(len(nouvelles), np.nan)])
+            ajout = (len(nouvelles), HEURES_SEMAINE)
+            self.moyennes = np.vstack([self.moyennes, np.zeros(ajout)])
+            self.variances = np.vstack([self.variances, np.zeros(ajout)])
+            self.observations = np.vstack([self.observations, np.zeros(ajout, dtype=np.int64)])
+            self.comptes_ouverts = np.concatenate([self.comptes_ouverts, np.zeros(len(nouvelles))])
+
+    def _comptes(self, df):
+        """
+        Matrice heures × séries des inscriptions (heures en nombre d'heures depuis 1970, triées)
+        """
+        if 'horodateur' not in df.columns:
+            return pd.DataFrame()
+        lignes = df[df['horodateur'].notna()]
+        heures = lignes['horodateur'].to_numpy(dtype='datetime64[h]').view(np.int64)
+        comptes = {segment(): pd.Series(heures).value_counts()}
+        for colonne in self.segments:
+            if colonne not in lignes.columns:
+                continue
+            par_valeur = pd.DataFrame({'heure': heures, 'valeur': lignes[colonne].to_numpy()}) \
+                .groupby(['valeur', 'heure']).size()
+            for valeur, serie in par_valeur.groupby(level='valeur'):
+                comptes[segment(colonne, valeur)] = serie.droplevel('valeur')
+        matrice = pd.DataFrame(comptes).fillna(0).sort_index()
+        self._enregistrer(matrice.columns)
+        return matrice.reindex(columns=list(self.series), fill_value=0)
+
+    # --- Comparaison à la référence --------------------------------------------
+
+    def _signaler(self, heure, serie, type_alerte, observe, attendu, score):
+        cle = (heure, serie, type_alerte)
+        if cle in self.deja_signalees:
+            return
+        self.deja_signalees.add(cle)
+        alerte = {'seau': pd.Timestamp(np.datetime64(heure, 'h')), 'serie': serie, 'type': type_alerte,
+                  'observe': float(observe), 'attendu': round(float(attendu), 2), 'score': round(float(score), 2)}
+        self.alertes.append(alerte)
+        if self._en_direct and self.chemin_journal:
+            ligne = {**alerte, 'seau': alerte['seau'].isoformat(), 'detectee': datetime.now().isoformat()}
+            with open(self.chemin_journal, 'a', encoding='utf-8') as journal:
+                journal.write(json.dumps(ligne, ensure_ascii=False) + '\n')
+            print(f"🚨 {alerte['seau']:%d/%m/%Y %H:%M} {decrire_alerte(alerte)}")
+
+    def _ecarts(self, heure, comptes):
+        """
+        (écarts à la référence, écarts-types, références, séries jugeables) pour l'heure donnée
+        """
+        creneau = (heure + DECALAGE_LUNDI) % HEURES_SEMAINE
+        attendu = self.moyennes[:, creneau]
+        ecarts_types = np.sqrt(np.maximum(self.variances[:, creneau], attendu + 1))
+        jugeables = self.observations[:, creneau] >= MIN_OBSERVATIONS
+        return comptes - attendu, ecarts_types, attendu, jugeables
+
+    def _verifier(self, heure, comptes, heure_terminee):
+        """
+        Pics (dès l'arrivée des lignes) ; chutes seulement une fois l'heure terminée
+        """
+        ecarts, ecarts_types, attendu, jugeables = self._ecarts(heure, comptes)
+        hors_seuil = jugeables & (np.abs(ecarts) > np.maximum(SEUIL_ECART * ecarts_types, ECART_MINIMUM))
+        if hors_seuil.any():
+            for i in np.flatnonzero(hors_seuil):
+                if ecarts[i] > 0 or heure_terminee:
+                    self._signaler(heure, self.noms[i], 'pic' if ecarts[i] > 0 else 'chute', comptes[i],
+                                   attendu[i], ecarts[i] / ecarts_types[i])
+        self._verifier_parts(heure, comptes)
+
+    def _verifier_parts(self, heure, comptes):
+        total = comptes[self.series[segment()]]
+        if total < MIN_INSCRIPTIONS_PART:
+            return
+        parts = comptes[self.paiements] / total
+        references = np.nan_to_num(self.parts[self.paiements])
+        scores = (parts - references) / np.sqrt(np.maximum(references * (1 - references), VARIANCE_PART_MINIMALE) / total)
+        for j in np.flatnonzero((parts >= PART_DOMINANTE) & (scores > SEUIL_ECART)):
+            i = self.paiements[j]
+            self._signaler(heure, self.noms[i], 'part_dominante', parts[j], references[j], scores[j])
+
+    def _fermer(self, heure, comptes):
+        """
+        Juge l'heure terminée puis l'intègre à la référence de son heure de la semaine
+        """
+        self._verifier(heure, comptes, heure_terminee=True)
+        creneau = (heure + DECALAGE_LUNDI) % HEURES_SEMAINE
+        # Moyenne simple pendant les premières semaines, lissage exponentiel ensuite
+        alpha = np.maximum(ALPHA, 1.0 / (self.observations[:, creneau] + 1))
+        ecart = comptes - self.moyennes[:, creneau]
+        self.moyennes[:, creneau] += alpha * ecart
+        self.variances[:, creneau] = (1 - alpha) * (self.variances[:, creneau] + alpha * ecart ** 2)
+        self.observations[:, creneau] += 1
+
+        total = comptes[self.series[segment()]]
+        if total > 0:
+            parts = comptes[self.paiements] / total
+            references = self.parts[self.paiements]
+            self.parts[self.paiements] = np.where(np.isnan(references), parts,
+                                                  references + ALPHA_PART * (parts - references))
+        if self.deja_signalees:
+            self.deja_signalees = {cle for cle in self.deja_signalees if cle[0] > heure}
+
+    def _avancer(self, heure):
+        """
+        Ferme les heures ouvertes jusqu'à heure (exclue), y compris celles sans inscription
+        """
+        while self.heure_ouverte < heure:
+            self._fermer(self.heure_ouverte, self.comptes_ouverts)
+            self.heure_ouverte += 1
+            self.comptes_ouverts = np.zeros(len(self.series))
+
+    def fermer_heures(self, maintenant=None):
+        """
+        Ferme les heures terminées à l'horloge (avant l'heure de maintenant) : sans nouvelle ligne,
+        elles sont jugées vides et les chutes signalées. Retourne True si une heure a été fermée.
+        """
+        if self.heure_ouverte is None:
+            return False
+        heure = int(np.datetime64(maintenant or datetime.now(), 'h').astype(np.int64))
+        if self.heure_ouverte >= heure:
+            return False
+        self._avancer(heure)
+        return True
+
+    # --- Protocole des index dérivés -----------------------------------------
+
+    def ajouter(self, df):
+        matrice = self._comptes(df)
+        for heure, comptes in zip(matrice.index, matrice.to_numpy(dtype=float)):
+            if self.heure_ouverte is None:
+                self.heure_ouverte = heure
+            if heure < self.heure_ouverte:
+                # Heure déjà jugée : la référence n'est pas réécrite
+                self.lignes_tardives += int(comptes[self.series[segment()]])
+                continue
+            self._avancer(heure)
+            self.comptes_ouverts = self.comptes_ouverts + comptes
+        if self.heure_ouverte is not None and len(matrice):
+            self._verifier(self.heure_ouverte, self.comptes_ouverts, heure_terminee=False)
+
+    def retirer(self, df):
+        # Lignes remplacées par un doublon plus récent : seule l'heure en cours est corrigée,
+        # les références lissées des heures passées ne dépendent plus d'une ligne isolée
+        matrice = self._comptes(df)
+        if self.heure_ouverte in matrice.index:
+            self.comptes_ouverts = self.comptes_ouverts - matrice.loc[self.heure_ouverte].to_numpy(dtype=float)
+
+    def memoire(self, vus=None):
+        """
+        Mémoire de l'état de l'index (octets) ; vus : objets déjà comptés
+        """
+        return octets(self.series, self.noms, self.moyennes, self.variances, self.observations,
+                      self.paiements, self.parts, self.comptes_ouverts, self.deja_signalees, self.alertes, vus=vus)
+
+    def resultat(self):
+        return pd.DataFrame(list(self.alertes), columns=COLONNES_ALERTES)
+
+
+def lire_alertes(chemin=FICHIER_ALERTES):
+    """
+    Alertes du journal (DataFrame vide si le journal n'existe pas)
+    """
+    if not os.path.exists(chemin):
+        return pd.DataFrame(columns=COLONNES_ALERTES + ['detectee'])
+    return pd.read_json(chemin, lines=True, convert_dates=['seau', 'detectee'])
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Différences entre deux exports du formulaire
+Utilisation : python diff_exports.py ancien.xlsx nouveau.xlsx [prefixe_sortie]
+Objectifs :
+- Identifier chaque réponse par son empreinte (horodateur à la seconde + email), comme
+  l'intégration des nouveaux exports
+- Hacher chaque cellule normalisée (texte sans espaces superflus, dates à la seconde, nombres)
+  puis chaque ligne : les deux exports sont joints sur les empreintes en une passe, sans
+  comparaison deux à deux
+- Lister les réponses ajoutées, supprimées et modifiées, et le nombre de changements par colonne
+"""
+
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from chaines_arrow import FORMAT_DATE, en_chaines, formater_dates
+from jeu_de_donnees import empreintes_lignes
+
+# Empreintes d'un export : clés des réponses, hachages des cellules (lignes × colonnes),
+# lignes gardées pour l'affichage et nature de l'export (brut ou nettoyé)
+EmpreintesExport = namedtuple('EmpreintesExport', ['cles', 'cellules', 'colonnes', 'lignes', 'brut'])
+
+# Résultat de la comparaison ; comparables vaut False si les deux exports ne sont pas de même nature
+# (brut / nettoyé) : seules les réponses ajoutées et supprimées sont alors fiables
+Differences = namedtuple('Differences', ['ajoutees', 'supprimees', 'modifiees', 'changements_colonnes',
+                                         'comparables', 'cles_en_double'])
+
+# Colonnes gardées pour la vue des nouveautés du dashboard
+COLONNES_APERCU = ['horodateur', 'nom', 'prenom', 'adresse_e-mail', 'pays', 'type_pack', 'methode_paiement_std']
+
+VALEURS_VIDES = ['', 'nan', 'none', 'nat']
+
+
+def _hacher_colonne(valeurs):
+    """
+    Hachage de chaque cellule normalisée ; toutes les valeurs manquantes ont le même hachage.
+    La normalisation n'est faite qu'une fois par valeur distincte, puis reportée par code.
+    """
+    codes, distinctes = pd.factorize(valeurs)
+    distinctes = pd.Series(distinctes)
+    if distinctes.dtype == object and len(distinctes) and distinctes.map(type).isin([int, float]).all():
+        distinctes = distinctes.astype(float)
+    if pd.api.types.is_datetime64_any_dtype(distinctes):
+        normalisees = formater_dates(distinctes, FORMAT_DATE)
+    elif pd.api.types.is_numeric_dtype(distinctes) and not pd.api.types.is_bool_dtype(distinctes):
+        # 25 et 25.0 (colonne entière d'un côté, avec manquants de l'autre) sont la même valeur
+        normalisees = en_chaines(distinctes.astype(float).map(repr))
+    else:
+        normalisees = en_chaines(distinctes).str.strip().str.replace(r'\s+', ' ', regex=True)
+    normalisees = normalisees.mask(normalisees.str.lower().isin(VALEURS_VIDES))
+    # Le code -1 (valeur manquante) désigne la dernière case : hachage d'une valeur manquante
+    hachages = pd.util.hash_pandas_object(pd.concat([normalisees, pd.Series([None], dtype=normalisees.dtype)]),
+                                          index=False).to_numpy()
+    return hachages[codes]
+
+
+def empreintes_export(df, colonnes_apercu=None):
+    """
+    Empreintes d'un export brut ou nettoyé (colonnes des exports bruts renommées comme au nettoyage).
+    colonnes_apercu : colonnes des lignes gardées pour l'affichage (toutes si None).
+    """
+    from nettoyage_formulaire import est_export_brut, noms_colonnes_uniques
+
+    brut = est_export_brut(df)
+    if brut:
+        df = df.copy()
+        df.columns = noms_colonnes_uniques(df.columns)
+    cles = empreintes_lignes(df).to_numpy()
+    cellules = np.column_stack([_hacher_colonne(df[col]) for col in df.columns]) if len(df.columns) \
+        else np.zeros((len(df), 0), dtype=np.uint64)
+    apercu = df if colonnes_apercu is None else df[[c for c in colonnes_apercu if c in df.columns]]
+    return EmpreintesExport(cles, cellules, list(df.columns), apercu.reset_index(drop=True), brut)
+
+
+def _dernieres(cles):
+    """
+    Position de la dernière occurrence de chaque clé, et nombre de clés en double ignorées
+    """
+    positions = pd.Series(np.arange(len(cles))).groupby(cles).last().to_numpy()
+    return positions, len(cles) - len(positions)
+
+
+def comparer(ancien, nouveau):
+    """
+    Differences entre deux EmpreintesExport, par jointure des clés (table de hachage, O(n))
+    """
+    positions_ancien, doublons_ancien = _dernieres(ancien.cles)
+    positions_nouveau, doublons_nouveau = _dernieres(nouveau.cles)
+    cles_ancien = pd.Index(ancien.cles[positions_ancien])
+    correspondances = cles_ancien.get_indexer(nouveau.cles[positions_nouveau])
+
+    ajoutees = positions_nouveau[correspondances < 0]
+    communes_nouveau = positions_nouveau[correspondances >= 0]
+    communes_ancien = positions_ancien[correspondances[correspondances >= 0]]
+    presentes = np.zeros(len(positions_ancien), dtype=bool)
+    presentes[correspondances[correspondances >= 0]] = True
+    supprimees = positions_ancien[~presentes]
+
+    # Colonnes présentes dans les deux exports, comparées seulement entre exports de même nature
+    comparables = ancien.brut == nouveau.brut
+    colonnes = [c for c in nouveau.colonnes if c in ancien.colonnes] if comparables else []
+    indices_ancien = [ancien.colonnes.index(c) for c in colonnes]
+    indices_nouveau = [nouveau.colonnes.index(c) for c in colonnes]
+    cellules_ancien = ancien.cellules[communes_ancien][:, indices_ancien]
+    cellules_nouveau = nouveau.cellules[communes_nouveau][:, indices_nouveau]
+    # Hachage de ligne : seules les lignes dont il diffère sont comparées colonne par colonne
+    if colonnes:
+        hachages_ancien = pd.util.hash_pandas_object(pd.DataFrame(cellules_ancien), index=False).to_numpy()
+        hachages_nouveau = pd.util.hash_pandas_object(pd.DataFrame(cellules_nouveau), index=False).to_numpy()
+        candidates = np.flatnonzero(hachages_ancien != hachages_nouveau)
+    else:
+        candidates = np.zeros(0, dtype=np.int64)
+    differentes = cellules_ancien[candidates] != cellules_nouveau[candidates]
+    modifiees = candidates[differentes.any(axis=1)]
+    differentes = differentes[differentes.any(axis=1)]
+
+    lignes_modifiees = nouveau.lignes.iloc[communes_nouveau[modifiees]].copy()
+    noms_colonnes = np.array(colonnes, dtype=object)
+    lignes_modifiees.insert(0, 'colonnes_modifiees', [', '.join(noms_colonnes[ligne]) for ligne in differentes])
+    changements = pd.Series(differentes.sum(axis=0), index=colonnes, dtype='int64')
+    return Differences(
+        ajoutees=nouveau.lignes.iloc[ajoutees],
+        supprimees=ancien.lignes.iloc[supprimees],
+        modifiees=lignes_modifiees,
+        changements_colonnes=changements[changements > 0].sort_values(ascending=False),
+        comparables=comparables,
+        cles_en_double=doublons_ancien + doublons_nouveau,
+    )
+
+
+def resumer(differences):
+    """
+    Comptes d'une comparaison (transmis avec le jeu partagé, sans les lignes)
+    """
+    return {
+        'ajoutees': len(differences.ajoutees),
+        'supprimees': len(differences.supprimees),
+        'modifiees': len(differences.modifiees),
+        'changements_colonnes': {col: int(n) for col, n in differences.changements_colonnes.items()},
+        'comparables': bool(differences.comparables),
+    }
+
+
+def comparer_fichiers(chemin_ancien, chemin_nouveau, prefixe_sortie=None):
+    """
+    Compare deux exports (bruts ou nettoyés), affiche le résumé et écrit éventuellement
+    prefixe_sortie_{ajoutees,supprimees,modifiees}.csv
+    """
+    from lecteur_excel import lire_excel
+
+    debut = time.perf_counter()
+    ancien = empreintes_export(lire_excel(chemin_ancien))
+    nouveau = empreintes_export(lire_excel(chemin_nouveau))
+    lecture = time.perf_counter() - debut
+    debut = time.perf_counter()
+    differences = comparer(ancien, nouveau)
+    comparaison = time.perf_counter() - debut
+
+    print(f"🔍 {chemin_ancien} ({len(ancien.cles)} lignes) → {chemin_nouveau} ({len(nouveau.cles)} lignes)")
+    print(f"🆕 {len(differences.ajoutees)} réponses ajoutées")
+    print(f"🗑️ {len(differences.supprimees)} réponses supprimées")
+    if differences.comparables:
+        print(f"✏️ {len(differences.modifiees)} réponses modifiées")
+        for colonne, nombre in differences.changements_colonnes.items():
+            print(f"  {colonne}: {nombre}")
+    else:
+        print("⚠️ Exports de nature différente (brut / nettoyé) : modifications non comparées")
+    if differences.cles_en_double:
+        print(f"⚠️ {differences.cles_en_double} réponses de même horodateur et email (dernière gardée)")
+    print(f"⏱️ Lecture et hachage : {lecture:.2f} s, comparaison : {comparaison * 1000:.0f} ms")
+
+    if prefixe_sortie:
+        for nom in ['ajoutees', 'supprimees', 'modifiees']:
+            chemin = f"{prefixe_sortie}_{nom}.csv"
+            getattr(differences, nom).to_csv(chemin, index=False, encoding='utf-8-sig')
+            print(f"💾 {chemin}")
+    return differences
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Utilisation : python diff_exports.py ancien.xlsx nouveau.xlsx [prefixe_sortie]")
+        sys.exit(1)
+    comparer_fichiers(sys.argv[1], sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
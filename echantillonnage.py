@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Échantillon stratifié pour l'aperçu rapide du dashboard
+Objectifs :
+- Garder un échantillon de taille bornée, stratifié par pays, type de pack et mois
+- Le tenir à jour à chaque ajout de lignes sans relire l'historique
+- Estimer les comptages (poids = 1 / probabilité d'inclusion) avec un intervalle de confiance à 95 %
+"""
+
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from taille_memoire import octets
+
+# Taille visée de l'échantillon et minimum de lignes gardées par strate
+TAILLE_ECHANTILLON = 20000
+MIN_PAR_STRATE = 30
+
+# Quantile de la loi normale pour un intervalle à 95 %
+Z_95 = 1.96
+
+
+class EchantillonStratifie:
+    """
+    Index dérivé du jeu de données : échantillon de Poisson stratifié.
+
+    Chaque ligne reçoit un tirage uniforme fixe (hash de son étiquette) et est gardée si son tirage
+    est sous le seuil de sa strate. Les seuils ne font que baisser quand les données grandissent :
+    un ajout ne demande que de filtrer l'échantillon existant et le nouveau lot.
+    """
+
+    def __init__(self, taille=TAILLE_ECHANTILLON, minimum=MIN_PAR_STRATE, colonnes=('pays', 'type_pack')):
+        self.taille = taille
+        self.minimum = minimum
+        self.colonnes = colonnes
+        self.effectifs = Counter()
+        self.seuils = {}
+        self.lignes = None
+
+    def _strates(self, df):
+        strates = pd.Series('', index=df.index)
+        for col in self.colonnes:
+            if col in df.columns:
+                strates = strates + df[col].astype(str) + '|'
+        if 'horodateur' in df.columns:
+            # Mois sous forme AAAAMM (strftime serait plus lent de deux ordres de grandeur)
+            mois = df['horodateur'].dt.year * 100 + df['horodateur'].dt.month
+            strates = strates + mois.astype('Int64').astype(str)
+        return strates
+
+    @staticmethod
+    def _tirages(df):
+        return pd.util.hash_array(np.asarray(df.index)) / 2.0 ** 64
+
+    def construire(self, df):
+        self.effectifs = Counter()
+        self.seuils = {}
+        self.lignes = None
+        self.ajouter(df)
+
+    def ajouter(self, df):
+        strates = self._strates(df)
+        self.effectifs.update(strates.value_counts().to_dict())
+        total = sum(self.effectifs.values())
+        for strate, effectif in self.effectifs.items():
+            cible = min(1.0, max(self.taille / total, self.minimum / effectif)) if effectif > 0 else 1.0
+            self.seuils[strate] = min(self.seuils.get(strate, 1.0), cible)
+
+        lot = df.assign(_strate=strates, _tirage=self._tirages(df))
+        lignes = lot if self.lignes is None else pd.concat([self.lignes, lot])
+        self.lignes = lignes[lignes['_tirage'] < lignes['_strate'].map(self.seuils)]
+
+    def retirer(self, df):
+        # Les seuils restent inchangés : l'échantillon reste sans biais, à peine plus petit
+        self.effectifs.subtract(self._strates(df).value_counts().to_dict())
+        self.effectifs += Counter()
+        if self.lignes is not None:
+            self.lignes = self.lignes.drop(index=df.index, errors='ignore')
+
+    def memoire(self, vus=None):
+        """
+        Mémoire de l'état de l'index (octets) ; vus : objets déjà comptés
+        """
+        return octets(self.lignes, self.effectifs, self.seuils, vus=vus)
+
+    def resultat(self):
+        if self.lignes is None:
+            return pd.DataFrame()
+        poids = 1.0 / self.lignes['_strate'].map(self.seuils)
+        return self.lignes.drop(columns=['_strate', '_tirage']).assign(poids=poids)
+
+
+def estimer_comptes(df, colonne):
+    """
+    Comptages par modalité : (comptes, marges à 95 %).
+    Sans colonne poids (données complètes), les comptes sont exacts et marges vaut None.
+    """
+    if 'poids' not in df.columns:
+        return df[colonne].value_counts(), None
+    lignes = df[df[colonne].notna()]
+    poids = lignes['poids']
+    # Variance de l'estimateur de Horvitz-Thompson pour un tirage de Poisson : somme de (1 - p) / p²
+    groupes = pd.DataFrame({'compte': poids, 'variance': poids * (poids - 1)}).groupby(lignes[colonne]).sum()
+    groupes = groupes.sort_values('compte', ascending=False)
+    return groupes['compte'].round(0), (Z_95 * np.sqrt(groupes['variance'])).round(0)
+
+
+def estimer_total(df):
+    """
+    Nombre de lignes représentées : (total, marge à 95 % ou None)
+    """
+    if 'poids' not in df.columns:
+        return len(df), None
+    poids = df['poids']
+    return int(round(poids.sum())), int(round(Z_95 * np.sqrt((poids * (poids - 1)).sum())))
+
+
+def moyenne_estimee(df, colonne, par=None):
+    """
+    Moyenne pondérée par les poids d'échantillonnage (moyenne simple sur les données complètes)
+    """
+    lignes = df[df[colonne].notna()]
+    if 'poids' not in lignes.columns:
+        return lignes[colonne].mean() if par is None else lignes.groupby(par)[colonne].mean()
+    ponderees = lignes[colonne] * lignes['poids']
+    if par is None:
+        return ponderees.sum() / lignes['poids'].sum() if len(lignes) else np.nan
+    return ponderees.groupby(lignes[par]).sum() / lignes['poids'].groupby(lignes[par]).sum()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Enrichissement des numéros de téléphone
+Objectifs :
+- Déduire la région (code pays) et l'opérateur (Orange, MTN, Moov...) de chaque numéro
+- Interroger phonenumbers une seule fois par indicatif + préfixe national (cache), pas par ligne
+- Compléter ou corriger le pays quand il est manquant, numérique ou non reconnu
+"""
+
+import re
+
+import pandas as pd
+from unidecode import unidecode
+
+# Chiffres du numéro national utilisés comme clé du cache (préfixe opérateur)
+LONGUEUR_PREFIXE = 4
+
+# nettoyer_telephone interprète les numéros locaux avec la région par défaut 'FR' :
+# un +33 ne permet donc pas de corriger un pays inconnu
+REGION_AMBIGUE = 'FR'
+
+# Variantes rencontrées dans les réponses, absentes des noms officiels
+ALIAS_PAYS = {
+    'rdc': 'CD', 'r d c': 'CD', 'rd congo': 'CD', 'rdcongo': 'CD', 'congo rdc': 'CD', 'congo rd': 'CD',
+    'drc congo': 'CD', 'congo kinshasa': 'CD', 'rd congo kinshasa': 'CD',
+    'republique democratique du congo kinshasa': 'CD', 'la republique democratique du congo': 'CD',
+    'congo republique democratique': 'CD', 'republique democratique du congo rdc': 'CD',
+    'congo brazzaville': 'CG', 'le congo brazzaville': 'CG', 'republique du congo': 'CG',
+    'civ': 'CI', 'abidjan': 'CI', 'guinee conakry': 'GN', 'centrafrique': 'CF', 'benin': 'BJ', 'cameron': 'CM',
+}
+
+# (indicatif, préfixe national) -> (région, opérateur)
+_cache_prefixes = {}
+_regions_par_nom = {}
+_infos_regions = {}
+
+
+def normaliser_nom_pays(nom):
+    """
+    Clé de comparaison d'un nom de pays : sans accents, emoji ni ponctuation
+    """
+    return re.sub(r'[^a-z0-9]+', ' ', unidecode(str(nom)).lower()).strip()
+
+
+def regions_par_nom():
+    """
+    Nom de pays normalisé -> code région, construit une fois depuis les noms français de phonenumbers
+    """
+    if not _regions_par_nom:
+        import phonenumbers
+        from phonenumbers import geocoder
+
+        for region in phonenumbers.SUPPORTED_REGIONS:
+            exemple = phonenumbers.example_number(region)
+            if exemple is not None:
+                _regions_par_nom[normaliser_nom_pays(geocoder.country_name_for_number(exemple, 'fr'))] = region
+        _regions_par_nom.update(ALIAS_PAYS)
+    return _regions_par_nom
+
+
+def regions_des_pays(pays):
+    """
+    Code région de chaque pays déclaré (None si manquant ou non reconnu), calculé par valeur distincte
+    """
+    correspondances = regions_par_nom()
+    distincts = pd.Series(pays.dropna().unique())
+    regions = dict(zip(distincts, distincts.map(lambda p: correspondances.get(normaliser_nom_pays(p)))))
+    return pays.map(regions)
+
+
+def _infos_region(region):
+    """
+    Indicatif et préfixe interurbain (ex. '0') d'une région, mis en cache
+    """
+    if region not in _infos_regions:
+        import phonenumbers
+        from phonenumbers import PhoneMetadata
+
+        metadonnees = PhoneMetadata.metadata_for_region(region) if isinstance(region, str) else None
+        _infos_regions[region] = (str(phonenumbers.country_code_for_region(region)), metadonnees.national_prefix) \
+            if metadonnees else (None, None)
+    return _infos_regions[region]
+
+
+def _indicatif(chiffres):
+    import phonenumbers
+
+    # Les indicatifs forment un code préfixe : au plus un des 1 à 3 premiers chiffres correspond
+    for longueur in (1, 2, 3):
+        if int(chiffres[:longueur] or 0) in phonenumbers.COUNTRY_CODE_TO_REGION_CODE:
+            return chiffres[:longueur]
+    return None
+
+
+def _sans_interurbain(national, prefixe):
+    return national[len(prefixe):] if prefixe and national.startswith(prefixe) else national
+
+
+def decomposer_numero(numero, region_pays=None):
+    """
+    (indicatif, numéro national) d'un numéro, ou (None, None).
+    Sans indicatif, le numéro est lu avec la région du pays déclaré ; un +33 issu
+    de la région par défaut du nettoyage est relu avec cette région.
+    """
+    brut = str(numero).strip()
+    chiffres = re.sub(r'\D', '', brut)
+    if brut.startswith('00'):
+        chiffres = chiffres[2:]
+    indicatif_pays, interurbain = _infos_region(region_pays)
+
+    if brut.startswith(('+', '00')):
+        indicatif = _indicatif(chiffres)
+        if indicatif == '33' and indicatif_pays and region_pays != REGION_AMBIGUE:
+            # L'utilisateur avait saisi 0 + numéro local : le 0 est rendu puis interprété selon le pays
+            return indicatif_pays, _sans_interurbain('0' + chiffres[2:], interurbain)
+        return (indicatif, chiffres[len(indicatif):]) if indicatif else (None, None)
+
+    if indicatif_pays:
+        if chiffres.startswith(indicatif_pays) and len(chiffres) - len(indicatif_pays) >= 8:
+            return indicatif_pays, chiffres[len(indicatif_pays):]
+        return indicatif_pays, _sans_interurbain(chiffres, interurbain)
+
+    # Pays inconnu : un numéro long sans « + » commence souvent par l'indicatif (ex. 229...)
+    indicatif = _indicatif(chiffres) if len(chiffres) >= 10 else None
+    return (indicatif, chiffres[len(indicatif):]) if indicatif else (None, None)
+
+
+def infos_prefixe(indicatif, nationaux):
+    """
+    Région et opérateur d'un préfixe, depuis le cache ou phonenumbers.
+    nationaux : numéros nationaux partageant ce préfixe (quelques-uns sont essayés
+    jusqu'à en trouver un valide pour l'opérateur)
+    """
+    cle = (indicatif, nationaux[0][:LONGUEUR_PREFIXE])
+    if cle in _cache_prefixes:
+        return _cache_prefixes[cle]
+
+    import phonenumbers
+    from phonenumbers import carrier
+
+    region, operateur = None, None
+    for national in nationaux[:3]:
+        try:
+            numero = phonenumbers.parse(f"+{indicatif}{national}")
+        except phonenumbers.NumberParseException:
+            continue
+        region = region or phonenumbers.region_code_for_number(numero)
+        if phonenumbers.is_valid_number(numero):
+            operateur = carrier.name_for_number(numero, 'fr') or None
+            break
+    _cache_prefixes[cle] = (region, operateur)
+    return region, operateur
+
+
+def enrichir_telephones(df, col_tel='numero_de_telephone', col_pays='pays'):
+    """
+    Ajoute region_telephone, operateur et pays_corrige ; remplace les pays manquants,
+    numériques ou non reconnus par le pays du numéro quand il est fiable
+    """
+    if col_tel not in df.columns:
+        return df
+    df = df.copy()
+    pays = df[col_pays] if col_pays in df.columns else pd.Series(None, index=df.index, dtype=object)
+    regions_pays = regions_des_pays(pays)
+
+    # Décomposition par paire distincte (numéro, région déclarée)
+    paires = pd.DataFrame({'numero': df[col_tel], 'region': regions_pays})
+    paires = paires[paires['numero'].notna() & (paires['numero'].astype(str).str.strip() != '')]
+    groupes = paires.groupby(['numero', 'region'], dropna=False, sort=False).ngroup().to_numpy()
+    premieres = paires[~pd.Series(groupes).duplicated().to_numpy()]
+    decomposes = pd.DataFrame([decomposer_numero(n, r) for n, r in zip(premieres['numero'], premieres['region'])],
+                              columns=['indicatif', 'national']).iloc[groupes].set_index(paires.index)
+    decomposes = decomposes[decomposes['national'].str.len() >= LONGUEUR_PREFIXE]
+    prefixes = decomposes['indicatif'] + ':' + decomposes['national'].str[:LONGUEUR_PREFIXE]
+
+    infos = {}
+    for prefixe, nationaux in decomposes['national'].groupby(prefixes):
+        infos[prefixe] = infos_prefixe(prefixe.split(':')[0], nationaux.unique().tolist())
+    df['region_telephone'] = prefixes.map(lambda p: infos[p][0]).reindex(df.index)
+    df['operateur'] = prefixes.map(lambda p: infos[p][1]).reindex(df.index)
+
+    # Correction du pays : le nom le plus fréquent des réponses de la même région, sinon le nom officiel
+    a_corriger = regions_pays.isna() & df['region_telephone'].notna() & (df['region_telephone'] != REGION_AMBIGUE)
+    df['pays_corrige'] = a_corriger
+    if a_corriger.any():
+        noms_region = pays[regions_pays.notna()].groupby(regions_pays[regions_pays.notna()]).agg(
+            lambda p: p.value_counts().index[0]).to_dict()
+        for region in df.loc[a_corriger, 'region_telephone'].unique():
+            if region not in noms_region:
+                import phonenumbers
+                from phonenumbers import geocoder
+                exemple = phonenumbers.example_number(region)
+                noms_region[region] = geocoder.country_name_for_number(exemple, 'fr') if exemple else region
+        df.loc[a_corriger, col_pays] = df.loc[a_corriger, 'region_telephone'].map(noms_region)
+    return df
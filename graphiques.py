@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Graphiques du dashboard
+Chaque fonction construit une figure Plotly à partir d'agrégats déjà calculés
+(comptages, moyennes), sans dépendre de Streamlit. Les marges optionnelles
+(aperçu rapide sur échantillon) sont affichées en barres d'erreur. Les séries
+plus longues que le budget de réduction d'un graphique en demi-page (SEUIL_WEBGL,
+rapports pleine page) passent en rendu WebGL. Les anomalies
+détectées sur le flux des inscriptions sont ajoutées en marqueurs sur les courbes.
+"""
+
+import plotly.express as px
+import plotly.graph_objects as go
+
+from reduction_series import SEUIL_WEBGL
+
+# Marqueurs des anomalies détectées (detection_anomalies.py) : symbole, couleur, légende
+MARQUEURS_ANOMALIES = {
+    'pic': ('triangle-up', '#d62728', "🚨 Pic"),
+    'chute': ('triangle-down', '#9467bd', "🚨 Chute"),
+    'part_dominante': ('diamond', '#ff7f0e', "🚨 Paiement dominant"),
+}
+
+
+def _ajouter_anomalies(fig, anomalies):
+    """
+    Ajoute les anomalies (colonnes date, valeur, type, texte) en marqueurs au-dessus de la courbe
+    """
+    if anomalies is None or len(anomalies) == 0:
+        return fig
+    for type_alerte, points in anomalies.groupby('type'):
+        symbole, couleur, nom = MARQUEURS_ANOMALIES.get(type_alerte, ('x', '#d62728', "🚨 Anomalie"))
+        fig.add_trace(go.Scatter(
+            x=points['date'], y=points['valeur'], mode='markers', name=nom, text=points['texte'],
+            marker=dict(symbol=symbole, size=13, color=couleur, line=dict(width=1, color='white')),
+            hovertemplate='%{x}<br>%{text}<extra></extra>'
+        ))
+    return fig
+
+
+def figure_repartition_packs(pack_counts):
+    fig_pie = px.pie(
+        values=pack_counts.values,
+        names=pack_counts.index,
+        title="Répartition des Packs Choisis",
+        color_discrete_sequence=px.colors.qualitative.Bold  # Palette de couleurs vives et distinctes
+    )
+    fig_pie.update_traces(textposition='inside', textinfo='percent+label')
+    fig_pie.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(size=12)
+    )
+    return fig_pie
+
+
+def figure_prix_moyen_pack(prix_moyen_pack):
+    fig_bar = px.bar(
+        x=prix_moyen_pack.values,
+        y=prix_moyen_pack.index,
+        orientation='h',
+        title="Prix Moyen par Pack (FCFA)",
+        labels={'x': 'Prix Moyen (FCFA)', 'y': 'Type de Pack'},
+        color=prix_moyen_pack.index,
+        color_discrete_sequence=px.colors.qualitative.Set1
+    )
+    # Formatter les valeurs sur les barres
+    fig_bar.update_traces(texttemplate='%{x:,.0f} FCFA', textposition='outside')
+    fig_bar.update_layout(
+        showlegend=False,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+    return fig_bar
+
+
+def figure_top_pays(pays_counts, marges=None):
+    fig_geo = px.bar(
+        x=pays_counts.values,
+        y=pays_counts.index,
+        error_x=marges.values if marges is not None else None,
+        orientation='h',
+        title="Nombre de Participants par Pays",
+        labels={'x': 'Nombre de participants', 'y': 'Pays'},
+        color=pays_counts.index,
+        color_discrete_sequence=px.colors.qualitative.Pastel
+    )
+    fig_geo.update_layout(height=500)
+    return fig_geo
+
+
+def figure_cumuls_geographiques(table, niveau):
+    libelle = {'continent': 'Continent', 'sous_region': 'Sous-région', 'pays': 'Pays'}[niveau]
+    fig_regions = px.bar(
+        table.reset_index(),
+        x='inscriptions',
+        y=table.index.name,
+        orientation='h',
+        hover_data={'revenu': ':,.0f'},
+        title=f"Inscriptions par {libelle}",
+        labels={'inscriptions': 'Nombre de participants', table.index.name: libelle, 'revenu': 'Revenu (FCFA)'},
+        color=table.index.name,
+        color_discrete_sequence=px.colors.qualitative.Pastel
+    )
+    fig_regions.update_layout(showlegend=False, height=max(300, 40 * len(table)),
+                              yaxis={'categoryorder': 'total ascending'})
+    return fig_regions
+
+
+def figure_termes_frequents(termes):
+    fig_termes = px.bar(
+        x=termes.values,
+        y=termes.index,
+        orientation='h',
+        title="Mots les Plus Fréquents dans les Réponses Libres",
+        labels={'x': 'Nombre de réponses', 'y': 'Mot'},
+        color_discrete_sequence=['#1f77b4']
+    )
+    fig_termes.update_layout(height=max(300, 25 * len(termes)), yaxis={'categoryorder': 'total ascending'})
+    return fig_termes
+
+
+def figure_changements_colonnes(changements):
+    fig_changements = px.bar(
+        x=changements.values,
+        y=changements.index,
+        orientation='h',
+        title="Réponses Modifiées par Colonne",
+        labels={'x': 'Réponses modifiées', 'y': 'Colonne'},
+        color_discrete_sequence=['#ff7f0e']
+    )
+    fig_changements.update_layout(height=max(300, 30 * len(changements)), yaxis={'categoryorder': 'total ascending'})
+    return fig_changements
+
+
+def figure_courbes_campagnes(courbes):
+    fig_courbes = px.line(
+        courbes,
+        x='jour',
+        y='cumul',
+        color='campagne',
+        title="Inscriptions Cumulées depuis le Début de la Campagne",
+        labels={'jour': 'Jours depuis la première réponse', 'cumul': 'Inscriptions (cumul)', 'campagne': 'Campagne'}
+    )
+    return fig_courbes
+
+
+def figure_parts_packs_campagnes(parts):
+    fig_parts = px.bar(
+        parts,
+        x='type_pack',
+        y='part',
+        color='campagne',
+        barmode='group',
+        title="Part des Packs par Campagne",
+        labels={'type_pack': 'Type de Pack', 'part': 'Part des inscriptions', 'campagne': 'Campagne'}
+    )
+    fig_parts.update_layout(yaxis_tickformat='.0%')
+    return fig_parts
+
+
+def figure_donut_paiements(paiement_counts):
+    fig_donut = go.Figure(data=[go.Pie(
+        labels=paiement_counts.index,
+        values=paiement_counts.values,
+        hole=0.4
+    )])
+    fig_donut.update_traces(
+        textposition='inside',
+        textinfo='percent+label'
+    )
+    fig_donut.update_layout(
+        title="Répartition des Méthodes de Paiement",
+        showlegend=True
+    )
+    return fig_donut
+
+
+def figure_barres_paiements(paiement_counts, marges=None):
+    fig_payment = px.bar(
+        x=paiement_counts.index,
+        y=paiement_counts.values,
+        error_y=marges.values if marges is not None else None,
+        title="Choix des Méthodes de Paiement",
+        labels={'x': 'Méthode de paiement', 'y': 'Nombre d\'utilisateurs'},
+        color=paiement_counts.index,  # Utiliser la méthode de paiement comme base pour la couleur
+        color_discrete_sequence=px.colors.qualitative.G10  # Palette de couleurs vibrantes
+    )
+    fig_payment.update_xaxes(tickangle=45)
+    return fig_payment
+
+
+def figure_parts_operateurs(parts):
+    fig_operateurs = px.bar(
+        parts,
+        x='part',
+        y='pays',
+        color='operateur',
+        orientation='h',
+        title="Part des Opérateurs Téléphoniques par Pays",
+        labels={'part': 'Part des numéros (%)', 'pays': 'Pays', 'operateur': 'Opérateur'},
+        color_discrete_sequence=px.colors.qualitative.Safe
+    )
+    fig_operateurs.update_layout(barmode='stack', height=500, yaxis={'categoryorder': 'total ascending'})
+    return fig_operateurs
+
+
+def figure_inscriptions_jour(daily_counts, titre="Nombre d'Inscriptions par Jour", anomalies=None):
+    fig_daily = px.line(
+        daily_counts,
+        x='date',
+        y='count',
+        title=titre,
+        labels={'date': 'Date', 'count': 'Nombre d\'inscriptions'},
+        render_mode='webgl' if len(daily_counts) > SEUIL_WEBGL else 'svg'
+    )
+    # Les marqueurs ne restent lisibles que sur les séries courtes
+    fig_daily.update_traces(mode='lines+markers' if len(daily_counts) <= 100 else 'lines')
+    return _ajouter_anomalies(fig_daily, anomalies)
+
+
+def figure_moyennes_mobiles(tendances, libelle, anomalies=None):
+    ligne = go.Scattergl if len(tendances) > SEUIL_WEBGL else go.Scatter
+    fig_mm = go.Figure()
+    fig_mm.add_trace(go.Bar(x=tendances['date'], y=tendances['valeur'], name='Par jour',
+                            marker_color='lightsteelblue', opacity=0.6))
+    fig_mm.add_trace(ligne(x=tendances['date'], y=tendances['mm_7'], name='Moyenne 7 jours',
+                                mode='lines', line=dict(color='#1f77b4', width=3)))
+    fig_mm.add_trace(ligne(x=tendances['date'], y=tendances['mm_30'], name='Moyenne 30 jours',
+                                mode='lines', line=dict(color='#ff7f0e', width=3, dash='dash')))
+    fig_mm.update_layout(
+        title=f"{libelle} : Moyennes Mobiles",
+        xaxis_title='Date',
+        yaxis_title=libelle,
+        legend=dict(orientation='h', y=-0.2)
+    )
+    return _ajouter_anomalies(fig_mm, anomalies)
+
+
+def figure_croissance_cumulee(cumul, libelle):
+    fig_cumul = px.area(
+        cumul,
+        x='date',
+        y='cumul',
+        title=f"{libelle} : Croissance Cumulée",
+        labels={'date': 'Date', 'cumul': f"{libelle} (cumul)"},
+        color_discrete_sequence=['#2ca02c']
+    )
+    return fig_cumul
+
+
+def figure_inscriptions_heure(hourly_counts):
+    return px.bar(
+        hourly_counts,
+        x='heure',
+        y='count',
+        title="Nombre d'Inscriptions par Heure",
+        labels={'heure': 'Heure de la journée', 'count': 'Nombre d\'inscriptions'},
+        color='count',
+        color_continuous_scale='Blues'
+    )
+
+
+def figure_jours_semaine(weekly_counts):
+    return px.bar(
+        x=weekly_counts.index,
+        y=weekly_counts.values,
+        title="Répartition par Jour de la Semaine",
+        labels={'x': 'Jour de la semaine', 'y': 'Nombre d\'inscriptions'},
+        color=weekly_counts.values,
+        color_continuous_scale='Greens'
+    )
+
+
+def figure_distribution_ages(ages_valides):
+    fig_age_hist = px.histogram(
+        ages_valides,
+        nbins=20,
+        title="Distribution des Âges",
+        labels={'value': 'Âge', 'count': 'Nombre de personnes'},
+        color_discrete_sequence=['skyblue']
+    )
+    fig_age_hist.update_layout(bargap=0.1)
+    return fig_age_hist
+
+
+def figure_tranches_age(tranches_counts, marges=None):
+    return px.bar(
+        x=tranches_counts.index,
+        y=tranches_counts.values,
+        error_y=marges.values if marges is not None else None,
+        title="Nombre de Personnes par Tranche d'Âge",
+        labels={'x': 'Tranche d\'âge', 'y': 'Nombre de personnes'},
+        color=tranches_counts.values,
+        color_continuous_scale='YlOrRd'
+    )
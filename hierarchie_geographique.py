@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hiérarchie géographique pays → sous-région → continent
+Objectifs :
+- Rattacher chaque pays déclaré (variantes d'écriture comprises) à son code pays, sa sous-région
+  et son continent, une seule fois par valeur distincte
+- Tenir à jour les cumuls (inscriptions, revenu) de chaque niveau : calculés au chargement,
+  corrigés à chaque ajout ou retrait de lignes sans regrouper à nouveau les lignes brutes
+- Lire directement les cumuls d'un niveau pour l'exploration et la carte par région
+"""
+
+from collections import Counter
+
+import pandas as pd
+
+from taille_memoire import octets
+
+# Sous-région -> (continent, codes pays)
+SOUS_REGIONS = {
+    "Afrique de l'Ouest": ('Afrique', ['BJ', 'BF', 'CV', 'CI', 'GM', 'GH', 'GN', 'GW', 'LR', 'ML', 'NE', 'NG',
+                                       'SN', 'SL', 'TG']),
+    "Afrique Centrale": ('Afrique', ['AO', 'CM', 'CF', 'TD', 'CG', 'CD', 'GQ', 'GA', 'ST']),
+    "Afrique de l'Est": ('Afrique', ['BI', 'KM', 'DJ', 'ER', 'ET', 'KE', 'MG', 'MW', 'MU', 'YT', 'MZ', 'RE', 'RW',
+                                     'SC', 'SO', 'SS', 'TZ', 'UG', 'ZM', 'ZW']),
+    "Afrique Australe": ('Afrique', ['BW', 'LS', 'NA', 'ZA', 'SZ']),
+    "Maghreb": ('Afrique', ['DZ', 'LY', 'MA', 'MR', 'TN', 'EH']),
+    "Afrique du Nord-Est": ('Afrique', ['EG', 'SD']),
+    "Europe de l'Ouest": ('Europe', ['AT', 'BE', 'CH', 'DE', 'FR', 'LI', 'LU', 'MC', 'NL']),
+    "Europe du Sud": ('Europe', ['AD', 'AL', 'BA', 'CY', 'ES', 'GR', 'HR', 'IT', 'ME', 'MK', 'MT', 'PT', 'RS', 'SI',
+                                 'SM', 'VA']),
+    "Europe du Nord": ('Europe', ['DK', 'EE', 'FI', 'GB', 'IE', 'IS', 'LT', 'LV', 'NO', 'SE']),
+    "Europe de l'Est": ('Europe', ['BG', 'BY', 'CZ', 'HU', 'MD', 'PL', 'RO', 'RU', 'SK', 'UA']),
+    "Amérique du Nord": ('Amériques', ['BM', 'CA', 'GL', 'MX', 'PM', 'US']),
+    "Amérique Centrale": ('Amériques', ['BZ', 'CR', 'GT', 'HN', 'NI', 'PA', 'SV']),
+    "Caraïbes": ('Amériques', ['AG', 'BB', 'BS', 'CU', 'DM', 'DO', 'GD', 'GP', 'HT', 'JM', 'KN', 'LC', 'MQ', 'PR',
+                               'TT', 'VC']),
+    "Amérique du Sud": ('Amériques', ['AR', 'BO', 'BR', 'CL', 'CO', 'EC', 'GF', 'GY', 'PE', 'PY', 'SR', 'UY', 'VE']),
+    "Moyen-Orient": ('Asie', ['AE', 'BH', 'IL', 'IQ', 'IR', 'JO', 'KW', 'LB', 'OM', 'PS', 'QA', 'SA', 'SY', 'TR',
+                              'YE']),
+    "Asie Centrale": ('Asie', ['KG', 'KZ', 'TJ', 'TM', 'UZ']),
+    "Asie du Sud": ('Asie', ['AF', 'BD', 'BT', 'IN', 'LK', 'MV', 'NP', 'PK']),
+    "Asie de l'Est": ('Asie', ['CN', 'HK', 'JP', 'KP', 'KR', 'MN', 'MO', 'TW']),
+    "Asie du Sud-Est": ('Asie', ['BN', 'ID', 'KH', 'LA', 'MM', 'MY', 'PH', 'SG', 'TH', 'TL', 'VN']),
+    "Océanie": ('Océanie', ['AU', 'FJ', 'NC', 'NZ', 'PF', 'PG', 'SB', 'TO', 'VU', 'WS']),
+}
+
+# Code pays -> (continent, sous-région)
+CHEMINS_CODES = {code: (continent, sous_region)
+                 for sous_region, (continent, codes) in SOUS_REGIONS.items() for code in codes}
+
+# Pays non reconnu (réponse libre, valeur numérique...) ou hors de la table
+NON_CLASSE = 'Non classé'
+
+# Centre approximatif [latitude, longitude] des sous-régions et continents (carte par région)
+CENTRES = {
+    "Afrique de l'Ouest": [11.0, -3.0], "Afrique Centrale": [2.0, 17.0], "Afrique de l'Est": [-2.0, 36.0],
+    "Afrique Australe": [-25.0, 24.0], "Maghreb": [30.0, 2.0], "Afrique du Nord-Est": [22.0, 30.0],
+    "Europe de l'Ouest": [48.5, 6.0], "Europe du Sud": [41.0, 14.0], "Europe du Nord": [60.0, 15.0],
+    "Europe de l'Est": [51.0, 28.0], "Amérique du Nord": [45.0, -100.0], "Amérique Centrale": [14.0, -87.0],
+    "Caraïbes": [18.5, -72.0], "Amérique du Sud": [-15.0, -60.0], "Moyen-Orient": [29.0, 45.0],
+    "Asie Centrale": [43.0, 65.0], "Asie du Sud": [23.0, 79.0], "Asie de l'Est": [35.0, 115.0],
+    "Asie du Sud-Est": [8.0, 110.0], "Océanie": [-25.0, 140.0],
+    'Afrique': [3.0, 20.0], 'Europe': [50.0, 10.0], 'Amériques': [10.0, -80.0], 'Asie': [30.0, 90.0],
+}
+
+# Niveaux du plus large au plus fin ; les cumuls d'un niveau sont indexés par le chemin depuis le continent
+NIVEAUX = ['continent', 'sous_region', 'pays']
+MESURES = ['inscriptions', 'revenu']
+
+_noms_codes = {}
+
+
+def nom_pays(code):
+    """
+    Nom français du pays d'un code région (nom officiel de phonenumbers, calculé une fois par code)
+    """
+    if code not in _noms_codes:
+        import phonenumbers
+        from phonenumbers import geocoder
+
+        exemple = phonenumbers.example_number(code)
+        _noms_codes[code] = geocoder.country_name_for_number(exemple, 'fr') if exemple is not None else code
+    return _noms_codes[code]
+
+
+def localiser_pays(pays):
+    """
+    Chemin (continent, sous-région, pays) de chaque valeur distincte de pays déclarée.
+    Les variantes d'un même pays (« Rdc », « Congo Kinshasa »...) ont le même chemin.
+    """
+    from enrichissement_telephone import regions_des_pays
+
+    distincts = pd.Series(pd.unique(pays.dropna()))
+    chemins = {}
+    for valeur, code in zip(distincts, regions_des_pays(distincts)):
+        if code in CHEMINS_CODES:
+            chemins[valeur] = CHEMINS_CODES[code] + (nom_pays(code),)
+        else:
+            chemins[valeur] = (NON_CLASSE, NON_CLASSE, valeur)
+    return chemins
+
+
+def _cumuls_par_pays(df):
+    """
+    Inscriptions et revenu par valeur de pays (redressés par les poids en aperçu rapide)
+    """
+    poids = df['poids'] if 'poids' in df.columns else pd.Series(1.0, index=df.index)
+    revenu = df['prix_pack_fcfa'] * poids if 'prix_pack_fcfa' in df.columns else poids * 0
+    return pd.DataFrame({'inscriptions': poids, 'revenu': revenu.fillna(0)}).groupby(df['pays']).sum()
+
+
+class HierarchieGeographique:
+    """
+    Index dérivé du jeu de données : cumuls matérialisés à chaque niveau de la hiérarchie.
+    resultat() : niveau -> DataFrame (inscriptions, revenu) indexé par le chemin depuis le continent.
+    """
+
+    def __init__(self):
+        self.construire(pd.DataFrame())
+
+    def construire(self, df):
+        self.chemins = {}
+        self.cumuls = {niveau: {mesure: Counter() for mesure in MESURES} for niveau in NIVEAUX}
+        self.ajouter(df)
+
+    def _appliquer(self, df, signe):
+        if 'pays' not in df.columns or len(df) == 0:
+            return
+        par_pays = _cumuls_par_pays(df)
+        inconnus = par_pays.index.difference(list(self.chemins))
+        if len(inconnus):
+            self.chemins.update(localiser_pays(inconnus.to_series()))
+        # Une mise à jour par pays distinct et par niveau, quel que soit le nombre de lignes
+        for valeur, inscriptions, revenu in zip(par_pays.index, par_pays['inscriptions'], par_pays['revenu']):
+            chemin = self.chemins[valeur]
+            for profondeur, niveau in enumerate(NIVEAUX, start=1):
+                cle = chemin[:profondeur]
+                self.cumuls[niveau]['inscriptions'][cle] += signe * inscriptions
+                self.cumuls[niveau]['revenu'][cle] += signe * revenu
+
+    def ajouter(self, df):
+        self._appliquer(df, 1)
+
+    def retirer(self, df):
+        self._appliquer(df, -1)
+        for niveau in NIVEAUX:
+            vides = [cle for cle, n in self.cumuls[niveau]['inscriptions'].items() if n <= 0]
+            for cle in vides:
+                del self.cumuls[niveau]['inscriptions'][cle]
+                del self.cumuls[niveau]['revenu'][cle]
+
+    def memoire(self, vus=None):
+        """
+        Mémoire de l'état de l'index (octets) ; vus : objets déjà comptés
+        """
+        return octets(self.chemins, self.cumuls, vus=vus)
+
+    def resultat(self):
+        resultat = {}
+        for profondeur, niveau in enumerate(NIVEAUX, start=1):
+            comptes = self.cumuls[niveau]['inscriptions']
+            index = pd.MultiIndex.from_tuples(list(comptes), names=NIVEAUX[:profondeur]) if comptes else \
+                pd.MultiIndex.from_tuples([], names=NIVEAUX[:profondeur])
+            table = pd.DataFrame({mesure: [self.cumuls[niveau][mesure][cle] for cle in comptes]
+                                  for mesure in MESURES}, index=index)
+            table['inscriptions'] = table['inscriptions'].round(0).astype('int64')
+            resultat[niveau] = table.sort_values('inscriptions', ascending=False)
+        return resultat
+
+
+def cumuls_geographiques(df):
+    """
+    Cumuls de chaque niveau calculés depuis des lignes (données filtrées)
+    """
+    hierarchie = HierarchieGeographique()
+    hierarchie.construire(df)
+    return hierarchie.resultat()
+
+
+def enfants(cumuls, chemin=()):
+    """
+    Cumuls des subdivisions directes de chemin : continents pour (), sous-régions d'un continent,
+    pays d'une sous-région. Indexés par le nom de la subdivision.
+    """
+    table = cumuls[NIVEAUX[len(chemin)]]
+    if chemin:
+        table = table.xs(tuple(chemin), level=NIVEAUX[:len(chemin)], drop_level=True)
+    if isinstance(table.index, pd.MultiIndex):
+        table = table.droplevel(list(range(table.index.nlevels - 1)))
+    return table
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Index temporel à sommes préfixes
+Objectifs :
+- Compter les inscriptions et le revenu (prix_pack_fcfa) par jour et par heure,
+  au total, par pack et par méthode de paiement
+- Publier les sommes cumulées sur une grille de dates continue
+- Répondre en temps constant aux totaux sur une période, moyennes mobiles,
+  courbes cumulées et comparaisons avec la période précédente
+"""
+
+import numpy as np
+import pandas as pd
+
+from taille_memoire import octets
+
+PAS = {'jour': pd.Timedelta(days=1), 'heure': pd.Timedelta(hours=1)}
+
+
+def segment(colonne=None, valeur=None):
+    """
+    Nom d'un segment de l'index : 'total' ou 'colonne=valeur'
+    """
+    return 'total' if colonne is None else f"{colonne}={valeur}"
+
+
+class SommesPrefixes:
+    """
+    Sommes cumulées figées d'une granularité (jour ou heure).
+    La ligne 0 vaut zéro : le total des seaux i..j-1 est P[j] - P[i].
+    """
+
+    def __init__(self, comptes, pas):
+        self.pas = pas
+        self.colonnes = {col: i for i, col in enumerate(comptes.columns)}
+        if len(comptes) == 0:
+            self.origine = None
+            self.seaux = pd.DatetimeIndex([])
+            self.prefixes = np.zeros((1, len(comptes.columns)))
+            return
+        self.seaux = pd.date_range(comptes.index.min(), comptes.index.max(), freq=self.pas)
+        self.origine = self.seaux[0]
+        valeurs = comptes.reindex(self.seaux, fill_value=0).to_numpy(dtype=float)
+        self.prefixes = np.vstack([np.zeros((1, valeurs.shape[1])), valeurs.cumsum(axis=0)])
+        self.prefixes.setflags(write=False)
+
+    def __len__(self):
+        return len(self.seaux)
+
+    def _position(self, date):
+        """
+        Position du seau contenant la date, bornée à la grille (arithmétique, sans recherche)
+        """
+        position = (pd.Timestamp(date) - self.origine) // self.pas
+        return int(min(max(position, 0), len(self.seaux)))
+
+    def _bornes(self, debut=None, fin=None):
+        if self.origine is None:
+            return 0, 0
+        i = 0 if debut is None else self._position(debut)
+        j = len(self.seaux) if fin is None else min(self._position(fin) + 1, len(self.seaux))
+        return i, max(i, j)
+
+    def _colonne(self, mesure, seg):
+        return self.colonnes.get((mesure, seg))
+
+    def total(self, debut=None, fin=None, mesure='inscriptions', seg='total'):
+        """
+        Total sur les seaux de debut à fin inclus
+        """
+        col = self._colonne(mesure, seg)
+        if col is None:
+            return 0.0
+        i, j = self._bornes(debut, fin)
+        return float(self.prefixes[j, col] - self.prefixes[i, col])
+
+    def serie(self, debut=None, fin=None, mesure='inscriptions', seg='total'):
+        """
+        Valeur de chaque seau entre debut et fin
+        """
+        i, j = self._bornes(debut, fin)
+        col = self._colonne(mesure, seg)
+        valeurs = np.zeros(j - i) if col is None else np.diff(self.prefixes[i:j + 1, col])
+        return pd.Series(valeurs, index=self.seaux[i:j])
+
+    def moyenne_mobile(self, fenetre, debut=None, fin=None, mesure='inscriptions', seg='total'):
+        """
+        Moyenne sur les `fenetre` derniers seaux, pour chaque seau entre debut et fin.
+        La fenêtre utilise l'historique antérieur à debut ; elle est raccourcie au début des données.
+        """
+        i, j = self._bornes(debut, fin)
+        col = self._colonne(mesure, seg)
+        if col is None:
+            return pd.Series(np.zeros(j - i), index=self.seaux[i:j])
+        fins = np.arange(i + 1, j + 1)
+        debuts = np.maximum(fins - fenetre, 0)
+        moyennes = (self.prefixes[fins, col] - self.prefixes[debuts, col]) / (fins - debuts)
+        return pd.Series(moyennes, index=self.seaux[i:j])
+
+    def cumul(self, debut=None, fin=None, mesure='inscriptions', seg='total'):
+        """
+        Courbe cumulée depuis debut
+        """
+        i, j = self._bornes(debut, fin)
+        col = self._colonne(mesure, seg)
+        if col is None:
+            return pd.Series(np.zeros(j - i), index=self.seaux[i:j])
+        return pd.Series(self.prefixes[i + 1:j + 1, col] - self.prefixes[i, col], index=self.seaux[i:j])
+
+    def comparaison(self, debut, fin, mesure='inscriptions', seg='total'):
+        """
+        Total de la période et de la période précédente de même durée
+        """
+        i, j = self._bornes(debut, fin)
+        col = self._colonne(mesure, seg)
+        if col is None:
+            return {'actuel': 0.0, 'precedent': 0.0, 'variation_pct': None}
+        k = max(i - (j - i), 0)
+        actuel = float(self.prefixes[j, col] - self.prefixes[i, col])
+        precedent = float(self.prefixes[i, col] - self.prefixes[k, col])
+        variation = (actuel - precedent) / precedent * 100 if precedent and i - k == j - i else None
+        return {'actuel': actuel, 'precedent': precedent, 'variation_pct': variation}
+
+
+class IndexTemporel:
+    """
+    Index dérivé du jeu de données : comptes par seau de temps, tenus à jour
+    par ajout ou retrait de lignes ; resultat() publie les sommes préfixes par granularité
+    """
+
+    def __init__(self, segments=('type_pack', 'methode_paiement_std'), colonne_revenu='prix_pack_fcfa'):
+        self.segments = segments
+        self.colonne_revenu = colonne_revenu
+        self.comptes = {}
+
+    def construire(self, df):
+        self.comptes = {nom: pd.DataFrame(dtype=float) for nom in PAS}
+        self.ajouter(df)
+
+    def _seaux(self, df, pas):
+        if 'horodateur' not in df.columns:
+            return pd.DataFrame(dtype=float)
+        lignes = df[df['horodateur'].notna()]
+        seau = lignes['horodateur'].dt.floor(pas).rename('seau')
+        # Sur un échantillon, chaque ligne compte pour son poids d'échantillonnage
+        poids = lignes['poids'] if 'poids' in lignes.columns else pd.Series(1.0, index=lignes.index)
+        revenu = pd.to_numeric(lignes[self.colonne_revenu], errors='coerce').fillna(0) \
+            if self.colonne_revenu in lignes.columns else 0.0
+        mesures = pd.DataFrame({'inscriptions': poids, 'revenu': revenu * poids}, index=lignes.index)
+
+        parties = [mesures.groupby(seau).sum().rename(columns=lambda m: (m, segment()))]
+        for colonne in self.segments:
+            if colonne not in lignes.columns:
+                continue
+            par_valeur = mesures.groupby([seau, lignes[colonne]]).sum().unstack(fill_value=0)
+            par_valeur.columns = [(m, segment(colonne, v)) for m, v in par_valeur.columns]
+            parties.append(par_valeur)
+        return pd.concat(parties, axis=1).fillna(0)
+
+    def ajouter(self, df):
+        for nom, pas in PAS.items():
+            self.comptes[nom] = self.comptes[nom].add(self._seaux(df, pas), fill_value=0)
+
+    def retirer(self, df):
+        for nom, pas in PAS.items():
+            self.comptes[nom] = self.comptes[nom].sub(self._seaux(df, pas), fill_value=0)
+
+    def memoire(self, vus=None):
+        """
+        Mémoire de l'état de l'index (octets) ; vus : objets déjà comptés
+        """
+        return octets(self.comptes, vus=vus)
+
+    def resultat(self):
+        return {nom: SommesPrefixes(self.comptes[nom], pas) for nom, pas in PAS.items()}
+
+
+def sommes_prefixes(df, granularite='jour'):
+    """
+    Sommes préfixes construites directement depuis un DataFrame (filtres non couverts par l'index).
+    granularite=None : dictionnaire de toutes les granularités.
+    """
+    index = IndexTemporel()
+    index.construire(df)
+    resultat = index.resultat()
+    return resultat if granularite is None else resultat[granularite]
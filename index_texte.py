@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Index inversé des réponses libres du formulaire
+Objectifs :
+- Découper les réponses libres en mots sans accents ni casse (même translittération unidecode
+  que le renommage des colonnes du nettoyage), mots vides écartés
+- Tenir un index inversé mot -> lignes (avec le nombre d'occurrences par ligne), complété
+  à chaque ajout de lignes sans redécouper l'historique
+- Répondre aux recherches et aux mots les plus fréquents en croisant les listes de lignes
+  avec le masque des lignes filtrées, sans parcourir les textes
+"""
+
+import re
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from chaines_arrow import replier_accents
+from taille_memoire import octets
+
+# Réponses libres du formulaire (noms après nettoyage des colonnes)
+COLONNES_TEXTE_LIBRE = ['si_tu_as_des_questions_ou_un_truc_a_dire_cest...']
+
+# Mot : lettres et chiffres après translittération ; « paie* » cherche tous les mots commençant par « paie »
+MOTIF_MOT = re.compile(r'[a-z0-9]+')
+MOTIF_REQUETE = re.compile(r'[a-z0-9]+\*?')
+LONGUEUR_MIN_MOT = 2
+
+MOTS_VIDES = frozenset("""
+a ai as au aux avec avez avoir c ca ce ces cest cette comme d dans de des du elle en est et etre
+il ils j je jai l la le les leur lui m ma mais me mes moi mon n ne nest nos notre nous on ou par pas
+pour qu que quel quelle qui s sa se ses si son sont sur t ta te tes toi ton tu un une vos votre vous y
+""".split())
+
+
+def decouper(texte):
+    """
+    Mots d'un texte, en minuscules et sans accents, mots vides et lettres isolées écartés
+    """
+    return [mot for mot in MOTIF_MOT.findall(replier_accents(texte).lower())
+            if len(mot) >= LONGUEUR_MIN_MOT and mot not in MOTS_VIDES]
+
+
+class RechercheTexte:
+    """
+    Version publiée de l'index (jamais modifiée) : entrées (mot, ligne, occurrences) triées par mot
+    dans l'ordre alphabétique, la liste des lignes d'un mot est une tranche contiguë.
+    """
+
+    def __init__(self, termes, ids, lignes, occurrences):
+        ordre = np.argsort(termes, kind='stable')
+        rangs = np.empty(len(ordre), dtype=np.int64)
+        rangs[ordre] = np.arange(len(ordre))
+        ids = rangs[ids]
+        tri = np.lexsort((lignes, ids))
+        self.termes = np.asarray(termes, dtype=str)[ordre]
+        self.ids = ids[tri]
+        self.lignes = lignes[tri]
+        self.occurrences = occurrences[tri]
+        self.debuts = np.searchsorted(self.ids, np.arange(len(self.termes) + 1))
+
+    def __len__(self):
+        return len(self.termes)
+
+    def _masque(self, etiquettes):
+        """
+        Masque des entrées dont la ligne fait partie des étiquettes (toutes si None)
+        """
+        if etiquettes is None or len(self.lignes) == 0:
+            return np.ones(len(self.lignes), dtype=bool)
+        etiquettes = np.asarray(etiquettes, dtype=np.int64)
+        bitmap = np.zeros(max(int(self.lignes.max()), int(etiquettes.max(initial=-1))) + 1, dtype=bool)
+        bitmap[etiquettes] = True
+        return bitmap[self.lignes]
+
+    def _tranche(self, mot):
+        """
+        Entrées d'un mot, ou de tous les mots d'un préfixe (« mot* »)
+        """
+        if mot.endswith('*'):
+            debut = np.searchsorted(self.termes, mot[:-1], side='left')
+            fin = np.searchsorted(self.termes, mot[:-1] + '\x7f', side='left')
+        else:
+            debut = np.searchsorted(self.termes, mot, side='left')
+            fin = debut + 1 if debut < len(self.termes) and self.termes[debut] == mot else debut
+        return slice(self.debuts[debut], self.debuts[fin])
+
+    def rechercher(self, requete, etiquettes=None):
+        """
+        Lignes contenant tous les mots de la requête, parmi les étiquettes données (toutes si None).
+        Série étiquette -> score (occurrences des mots cherchés), meilleurs scores en premier.
+        """
+        mots = [m for m in MOTIF_REQUETE.findall(replier_accents(requete).lower())
+                if m.rstrip('*') and m.rstrip('*') not in MOTS_VIDES]
+        if not mots or len(self.lignes) == 0:
+            return pd.Series(dtype='int64')
+        masque = self._masque(etiquettes)
+        resultat = None
+        for mot in mots:
+            tranche = self._tranche(mot)
+            garder = masque[tranche]
+            # Un préfixe peut couvrir plusieurs mots d'une même ligne : occurrences cumulées par ligne
+            lignes, inverse = np.unique(self.lignes[tranche][garder], return_inverse=True)
+            scores = pd.Series(np.bincount(inverse, weights=self.occurrences[tranche][garder]).astype('int64'),
+                               index=lignes)
+            if resultat is not None:
+                communes = resultat.index.intersection(scores.index)
+                scores = resultat[communes] + scores[communes]
+            resultat = scores
+            if len(resultat) == 0:
+                break
+        return resultat.sort_values(ascending=False, kind='stable')
+
+    def termes_frequents(self, etiquettes=None, nombre=20):
+        """
+        Mots présents dans le plus de lignes parmi les étiquettes données (toutes si None)
+        """
+        if len(self.lignes) == 0:
+            return pd.Series(dtype='int64')
+        lignes_par_terme = np.bincount(self.ids[self._masque(etiquettes)], minlength=len(self.termes))
+        meilleurs = np.argsort(-lignes_par_terme, kind='stable')[:nombre]
+        meilleurs = meilleurs[lignes_par_terme[meilleurs] > 0]
+        return pd.Series(lignes_par_terme[meilleurs], index=self.termes[meilleurs])
+
+
+class IndexTexte:
+    """
+    Index dérivé du jeu de données sur les colonnes de réponses libres : construire(df),
+    ajouter(df) et retirer(df) tiennent les entrées à jour, resultat() publie un RechercheTexte.
+    """
+
+    def __init__(self, colonnes=COLONNES_TEXTE_LIBRE):
+        self.colonnes = colonnes
+        self.construire(pd.DataFrame())
+
+    def construire(self, df):
+        self.vocabulaire = {}
+        self.blocs = []
+        self.ajouter(df)
+
+    def _entrees(self, df):
+        """
+        (lignes, ids des mots, occurrences) des réponses libres de df
+        """
+        textes = [df[col].dropna() for col in self.colonnes if col in df.columns]
+        textes = pd.concat(textes) if textes else pd.Series(dtype=object)
+        # Une réponse fréquente (« Ras », « Merci ») n'est découpée qu'une fois
+        codes, distincts = pd.factorize(textes.astype(str))
+        mots_distincts = [Counter(decouper(texte)) for texte in distincts]
+        lignes, ids, occurrences = [], [], []
+        for etiquette, code in zip(textes.index, codes):
+            for mot, nombre in mots_distincts[code].items():
+                lignes.append(etiquette)
+                ids.append(self.vocabulaire.setdefault(mot, len(self.vocabulaire)))
+                occurrences.append(nombre)
+        return (np.array(lignes, dtype=np.int64), np.array(ids, dtype=np.int64),
+                np.array(occurrences, dtype=np.int64))
+
+    def ajouter(self, df):
+        entrees = self._entrees(df)
+        if len(entrees[0]):
+            self.blocs.append(entrees)
+
+    def retirer(self, df):
+        self.blocs = [tuple(tableau[~np.isin(bloc[0], df.index)] for tableau in bloc) for bloc in self.blocs]
+
+    def memoire(self, vus=None):
+        """
+        Mémoire de l'état de l'index (octets) ; vus : objets déjà comptés
+        """
+        return octets(self.vocabulaire, self.blocs, vus=vus)
+
+    def resultat(self):
+        if self.blocs:
+            lignes, ids, occurrences = (np.concatenate(tableaux) for tableaux in zip(*self.blocs))
+            # Blocs regroupés : la publication suivante ne concatène que ce bloc et les nouveaux
+            self.blocs = [(lignes, ids, occurrences)]
+        else:
+            lignes = ids = occurrences = np.zeros(0, dtype=np.int64)
+        return RechercheTexte(list(self.vocabulaire), ids, lignes, occurrences)
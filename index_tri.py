@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ordres de tri précalculés des réponses
+Objectifs :
+- Tenir, pour les colonnes principales, les lignes triées par valeur (permutations des étiquettes) :
+  triées une fois au chargement, puis complétées par fusion à chaque ajout de lignes
+- Extraire une page de réponses filtrées dans l'ordre demandé en une passe sur la permutation,
+  sans trier à nouveau : seules les lignes de la page sont ensuite lues et affichées
+"""
+
+import numpy as np
+import pandas as pd
+
+from taille_memoire import octets
+
+# Colonnes proposées au tri dans l'explorateur des réponses
+COLONNES_TRI = ['horodateur', 'pays', 'type_pack', 'prix_pack_fcfa']
+
+
+def cles_tri(valeurs):
+    """
+    (clés comparables, masque des valeurs manquantes) d'une colonne :
+    dates en entiers, nombres en flottants, texte et catégories en chaînes Python
+    """
+    manquantes = valeurs.isna().to_numpy()
+    if pd.api.types.is_datetime64_any_dtype(valeurs):
+        cles = valeurs.to_numpy(dtype='datetime64[ns]').view(np.int64)
+    elif pd.api.types.is_numeric_dtype(valeurs) and not pd.api.types.is_bool_dtype(valeurs):
+        cles = valeurs.to_numpy(dtype=float)
+    else:
+        cles = valeurs.astype(object).to_numpy()
+    return cles, manquantes
+
+
+def _trier(cles, etiquettes):
+    """
+    Clés et étiquettes triées par clé (tri stable : à clé égale, ordre des étiquettes)
+    """
+    if cles.dtype == object:
+        # Texte : rang de chaque valeur parmi les valeurs distinctes triées, puis tri d'entiers
+        rangs, _ = pd.factorize(cles, sort=True)
+        ordre = np.argsort(rangs, kind='stable')
+    else:
+        ordre = np.argsort(cles, kind='stable')
+    return cles[ordre], etiquettes[ordre]
+
+
+class OrdresTri:
+    """
+    Version publiée des ordres de tri (jamais modifiée) : par colonne, étiquettes des lignes
+    triées par valeur croissante, et étiquettes des lignes sans valeur (toujours en fin de liste).
+    """
+
+    def __init__(self, ordres, etiquette_max):
+        self.ordres = ordres
+        self.etiquette_max = etiquette_max
+
+    def colonnes(self):
+        return list(self.ordres)
+
+    def page(self, etiquettes, colonne=None, croissant=True, debut=0, taille=50):
+        """
+        (étiquettes de la page, nombre total de lignes) parmi les étiquettes données,
+        triées par colonne (ordre des étiquettes, c.-à-d. d'arrivée, si colonne est None)
+        """
+        etiquettes = np.asarray(etiquettes, dtype=np.int64)
+        if colonne not in self.ordres:
+            ordre = np.sort(etiquettes)
+            ordre = ordre if croissant else ordre[::-1]
+            return ordre[debut:debut + taille], len(ordre)
+        triees, manquantes = self.ordres[colonne]
+        bitmap = np.zeros(max(self.etiquette_max, int(etiquettes.max(initial=-1))) + 1, dtype=bool)
+        bitmap[etiquettes] = True
+        triees = triees[bitmap[triees]]
+        manquantes = manquantes[bitmap[manquantes]]
+        ordre = np.concatenate([triees if croissant else triees[::-1], manquantes])
+        return ordre[debut:debut + taille], len(ordre)
+
+
+class IndexTri:
+    """
+    Index dérivé du jeu de données : construire(df) trie chaque colonne, ajouter(df) fusionne
+    les nouvelles lignes triées dans les ordres existants, resultat() publie un OrdresTri.
+    """
+
+    def __init__(self, colonnes=COLONNES_TRI):
+        self.colonnes = colonnes
+        self.construire(pd.DataFrame())
+
+    def construire(self, df):
+        self.cles = {}
+        self.ordres = {}
+        self.etiquette_max = -1
+        self.ajouter(df)
+
+    def ajouter(self, df):
+        if len(df) == 0:
+            return
+        etiquettes = df.index.to_numpy(dtype=np.int64)
+        self.etiquette_max = max(self.etiquette_max, int(etiquettes.max()))
+        for col in self.colonnes:
+            if col not in df.columns:
+                continue
+            cles, manquantes = cles_tri(df[col])
+            cles, triees = _trier(cles[~manquantes], etiquettes[~manquantes])
+            if col not in self.ordres:
+                self.cles[col] = cles
+                self.ordres[col] = (triees, etiquettes[manquantes])
+                continue
+            # Fusion : chaque nouvelle ligne est placée après les lignes existantes de même valeur
+            anciennes_cles = self.cles[col]
+            anciennes, anciennes_manquantes = self.ordres[col]
+            if cles.dtype != anciennes_cles.dtype:
+                cles, anciennes_cles = cles.astype(object), anciennes_cles.astype(object)
+            positions = np.searchsorted(anciennes_cles, cles, side='right')
+            self.cles[col] = np.insert(anciennes_cles, positions, cles)
+            self.ordres[col] = (np.insert(anciennes, positions, triees),
+                                np.concatenate([anciennes_manquantes, etiquettes[manquantes]]))
+
+    def retirer(self, df):
+        for col, (triees, manquantes) in self.ordres.items():
+            garder = ~np.isin(triees, df.index)
+            self.cles[col] = self.cles[col][garder]
+            self.ordres[col] = (triees[garder], manquantes[~np.isin(manquantes, df.index)])
+
+    def memoire(self, vus=None):
+        """
+        Mémoire de l'état de l'index (octets) ; vus : objets déjà comptés
+        """
+        return octets(self.cles, self.ordres, vus=vus)
+
+    def resultat(self):
+        return OrdresTri(dict(self.ordres), self.etiquette_max)
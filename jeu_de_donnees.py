@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Jeu de données en mémoire du dashboard
+Objectifs :
+- Préparer les données nettoyées pour l'affichage (dates, pays, packs)
+- Valider chaque chargement et chaque ajout contre le schéma (lignes en échec mises en quarantaine)
+- Garder le jeu de données et ses index dérivés en mémoire
+- Intégrer les nouvelles lignes d'un export sans tout recharger
+- Publier une nouvelle version, lue par les sessions au rerun suivant
+"""
+
+import os
+import threading
+from collections import Counter, namedtuple
+from datetime import datetime
+
+import pandas as pd
+
+from chaines_arrow import FORMAT_DATE
+from deduplication import construire_cles, dedupliquer, detecter_colonne
+from index_texte import COLONNES_TEXTE_LIBRE
+from lecteur_excel import lire_excel
+from taille_memoire import octets
+from validation_schema import ecrire_quarantaine, valider
+
+# Variantes du nom de la Côte d'Ivoire rencontrées dans les exports
+PAYS_MAPPING = {
+    'Côte D\'Ivoire': 'Côte d\'Ivoire',
+    'Cote d\'Ivoire': 'Côte d\'Ivoire',
+    'Cote D\'Ivoire': 'Côte d\'Ivoire',
+    'COTE D\'IVOIRE': 'Côte d\'Ivoire',
+    'Côte d\'ivoire': 'Côte d\'Ivoire',
+    'Cote d\'ivoire': 'Côte d\'Ivoire'
+}
+
+# Colonnes du fichier nettoyé lues par le dashboard
+COLONNES_DASHBOARD = [
+    'horodateur', 'nom', 'prenom', 'age', 'tranche_age', 'date_de_naissance', 'pays',
+    'adresse_e-mail', 'numero_de_telephone', 'type_pack', 'prix_pack_fcfa', 'methode_paiement_std',
+    # Enrichissement téléphonique (présent si le fichier a été nettoyé avec cette étape)
+    'region_telephone', 'operateur', 'pays_corrige',
+    # Réponses libres (index inversé de la recherche)
+    *COLONNES_TEXTE_LIBRE
+]
+
+# Vue figée publiée après chaque mise à jour
+Instantane = namedtuple('Instantane', ['version', 'df', 'index', 'derniere_maj', 'lignes_ajoutees'])
+
+
+def preparer_donnees(df):
+    """
+    Prépare les données nettoyées pour le dashboard (conversion des dates,
+    standardisation des pays, enrichissement des téléphones) ; les valeurs corrompues
+    sont écartées par la validation du schéma
+    """
+    # Convertir les dates
+    for col in ['horodateur', 'date_de_naissance']:
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], format=FORMAT_DATE, errors='coerce')
+
+    # Nettoyage des colonnes texte pour éviter les problèmes d'affichage
+    if 'pays' in df.columns:
+        # 1. Convertir en string et nettoyer les espaces
+        df['pays'] = df['pays'].astype(str).str.strip()
+
+        # 2. Standardiser le nom de la Côte d'Ivoire avec le mapping défini
+        df['pays'] = df['pays'].replace(PAYS_MAPPING)
+
+        # Région et opérateur du téléphone ; pays manquants ou invalides corrigés par la région
+        if 'numero_de_telephone' in df.columns and 'operateur' not in df.columns:
+            from enrichissement_telephone import enrichir_telephones
+            df = enrichir_telephones(df.assign(pays=df['pays'].where(df['pays'] != 'nan')))
+            df['pays'] = df['pays'].astype(str)
+
+        # 3. Dernière vérification pour uniformiser la casse
+        df['pays'] = df['pays'].str.title()
+
+    if 'type_pack' in df.columns:
+        df['type_pack'] = df['type_pack'].astype(str).str.strip()
+
+    if 'methode_paiement_std' in df.columns:
+        df['methode_paiement_std'] = df['methode_paiement_std'].astype(str).str.strip()
+
+    # Réponses libres : certaines sont lues comme des nombres (« 2004 »), tout est gardé en texte
+    for col in COLONNES_TEXTE_LIBRE:
+        if col in df.columns:
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+
+    return df
+
+
+def empreintes_lignes(df):
+    """
+    Empreinte d'identification d'une réponse : horodateur (à la seconde) + email.
+    Les mêmes réponses ont la même empreinte dans l'export brut et dans le fichier nettoyé.
+    """
+    col_date = detecter_colonne(df, ['horodateur', 'timestamp'])
+    col_email = detecter_colonne(df, ['mail'], exclure=['domaine', 'type'])
+
+    cles = pd.DataFrame(index=df.index)
+    if col_date:
+        dates = df[col_date]
+        if not pd.api.types.is_datetime64_any_dtype(dates):
+            dates = pd.to_datetime(dates, format=FORMAT_DATE, errors='coerce')
+        cles['date'] = dates.dt.floor('s').astype(str)
+    if col_email:
+        cles['email'] = df[col_email].astype(str).str.strip().str.lower()
+    return pd.util.hash_pandas_object(cles, index=False)
+
+
+class Agregats:
+    """
+    Comptages par modalité et par jour, mis à jour par ajout ou retrait de lignes
+    """
+
+    def __init__(self, colonnes=('pays', 'type_pack', 'methode_paiement_std')):
+        self.colonnes = colonnes
+        self.comptes = {}
+
+    def construire(self, df):
+        self.comptes = {col: Counter() for col in self.colonnes + ('jour',)}
+        self.ajouter(df)
+
+    def _valeurs(self, df):
+        for col in self.colonnes:
+            if col in df.columns:
+                yield col, df[col].dropna().value_counts()
+        if 'horodateur' in df.columns:
+            yield 'jour', df['horodateur'].dropna().dt.date.value_counts()
+
+    def ajouter(self, df):
+        for col, comptes in self._valeurs(df):
+            self.comptes[col].update(comptes.to_dict())
+
+    def retirer(self, df):
+        for col, comptes in self._valeurs(df):
+            self.comptes[col].subtract(comptes.to_dict())
+            self.comptes[col] += Counter()  # supprime les comptes nuls
+
+    def memoire(self, vus=None):
+        """
+        Mémoire de l'état de l'index (octets) ; vus : objets déjà comptés
+        """
+        return octets(self.comptes, vus=vus)
+
+    def resultat(self):
+        return {col: pd.Series(dict(c)).sort_values(ascending=False) if c else pd.Series(dtype='int64')
+                for col, c in self.comptes.items()}
+
+
+class JeuDeDonnees:
+    """
+    Jeu de données partagé par toutes les sessions du dashboard.
+
+    Les index dérivés exposent construire(df), ajouter(df), retirer(df) et resultat() ;
+    ils sont tenus à jour à chaque ajout sans re-parcourir l'historique.
+
+    donnees_propres : lignes déjà validées et dédoublonnées (jeu partagé publié par un autre
+    processus) ; le jeu est alors en lecture seule et suit les nouvelles versions via remplacer(df).
+    """
+
+    def __init__(self, df, politique_doublons='derniere', chemin_audit=None, index_derives=None,
+                 chemin_quarantaine=None, donnees_propres=False):
+        self.politique_doublons = politique_doublons
+        self.chemin_audit = chemin_audit
+        self.chemin_quarantaine = chemin_quarantaine
+        self.index_derives = {'agregats': Agregats()}
+        self.index_derives.update(index_derives or {})
+
+        self._verrou = threading.Lock()
+        # Les réponses écartées (quarantaine, doublons) restent connues pour ne pas revenir au prochain export
+        self._empreintes = set() if donnees_propres else set(empreintes_lignes(df).values)
+        self.quarantaine = None
+        self.comptes_quarantaine = pd.Series(dtype='int64')
+        self.lignes_quarantaine = 0
+        self.lignes_exclues = 0
+        self.doublons_retires = 0
+        # Empreintes du dernier export complet lu (fichier source), et différences avec l'export
+        # précédent ou réponses nouvelles d'un dépôt partiel (vue des nouveautés)
+        self.export_precedent = None
+        self.chemin_source = None
+        self.nouveautes = None
+        self.resume_nouveautes = None
+        # Numéro de la version partagée lue (mode multi-processus)
+        self.publication = None
+        if not donnees_propres:
+            df = self._valider(df)
+            df, df_doublons = dedupliquer(df, politique=politique_doublons, chemin_audit=chemin_audit)
+            self.doublons_retires = len(df_doublons)
+        self._df = df
+        self._cles = {}
+        if not donnees_propres:
+            self._indexer_cles(df)
+        for index in self.index_derives.values():
+            index.construire(df)
+
+        self._version = 1
+        self._publier(0)
+
+    def instantane(self):
+        """
+        Dernière version publiée (cohérente, jamais modifiée après publication)
+        """
+        return self._instantane
+
+    def _publier(self, lignes_ajoutees):
+        resultats = {nom: index.resultat() for nom, index in self.index_derives.items()}
+        self._instantane = Instantane(self._version, self._df, resultats, datetime.now(), lignes_ajoutees)
+
+    def avancer_horloge(self):
+        """
+        Ferme les heures écoulées sans nouvelle ligne dans les index dérivés qui suivent l'horloge
+        (fermer_heures) ; leurs résultats sont republiés dans une nouvelle version, avec les mêmes données
+        """
+        with self._verrou:
+            fermes = [nom for nom, index in self.index_derives.items()
+                      if hasattr(index, 'fermer_heures') and index.fermer_heures()]
+            if not fermes:
+                return
+            self._version += 1
+            resultats = {**self._instantane.index, **{nom: self.index_derives[nom].resultat() for nom in fermes}}
+            self._instantane = self._instantane._replace(version=self._version, index=resultats)
+
+    def _valider(self, df):
+        """
+        Écarte les lignes en échec bloquant et cumule la quarantaine (réécrite à chaque lot)
+        """
+        df, quarantaine, comptes = valider(df)
+        if len(quarantaine) == 0:
+            return df
+        self.quarantaine = quarantaine if self.quarantaine is None else pd.concat([self.quarantaine, quarantaine])
+        self.comptes_quarantaine = self.comptes_quarantaine.add(comptes, fill_value=0).astype('int64')
+        self.lignes_quarantaine = len(self.quarantaine)
+        self.lignes_exclues = int(self.quarantaine['exclue'].sum())
+        if self.chemin_quarantaine:
+            ecrire_quarantaine(self.quarantaine, self.comptes_quarantaine, self.chemin_quarantaine)
+        return df
+
+    def _indexer_cles(self, df):
+        cles = construire_cles(df)
+        for col in ['email', 'telephone']:
+            for etiquette, valeur in cles[col].dropna().items():
+                self._cles[(col, valeur)] = etiquette
+
+    def remplacer(self, df):
+        """
+        Remplace tout le jeu de données par une version publiée ailleurs ; les index dérivés sont reconstruits
+        """
+        with self._verrou:
+            lignes_ajoutees = max(len(df) - len(self._df), 0)
+            self._df = df
+            for index in self.index_derives.values():
+                index.construire(df)
+            self._version += 1
+            self._publier(lignes_ajoutees)
+            print(f"✅ Version {self._version} chargée ({len(df)} lignes)")
+
+    def noter_export(self, df_export, chemin=None, complet=True):
+        """
+        Nouveautés d'un export (avant préparation), gardées pour la vue des nouveautés.
+        Export complet du fichier source : réponses ajoutées, supprimées et modifiées depuis
+        l'export complet précédent (le premier sert de référence).
+        Dépôt partiel : seules ses réponses absentes du jeu de données, sans suppressions
+        ni modifications (les réponses qu'il ne contient pas ne sont pas retirées).
+        """
+        from diff_exports import COLONNES_APERCU, Differences, comparer, empreintes_export, resumer
+
+        empreintes = empreintes_export(df_export, COLONNES_APERCU)
+        if complet:
+            if chemin:
+                self.chemin_source = os.path.abspath(chemin)
+            precedent, self.export_precedent = self.export_precedent, empreintes
+            if precedent is None:
+                return
+            self.nouveautes = comparer(precedent, empreintes)
+        else:
+            nouvelles = ~pd.Series(empreintes.cles).isin(self._empreintes).to_numpy()
+            vide = empreintes.lignes.iloc[:0]
+            self.nouveautes = Differences(
+                ajoutees=empreintes.lignes[nouvelles],
+                supprimees=vide,
+                modifiees=vide.assign(colonnes_modifiees=pd.Series(dtype=object)),
+                changements_colonnes=pd.Series(dtype='int64'),
+                comparables=False,
+                cles_en_double=0,
+            )
+        self.resume_nouveautes = {**resumer(self.nouveautes), 'partiel': not complet,
+                                  'fichier': os.path.basename(chemin) if chemin else None,
+                                  'date': datetime.now().isoformat(timespec='seconds')}
+
+    def integrer_fichier(self, chemin):
+        """
+        Lit un export (brut ou nettoyé) et intègre uniquement les réponses nouvelles ;
+        tout autre fichier que le fichier source est un dépôt partiel
+        """
+        df_export = lire_excel(chemin)
+        complet = self.chemin_source is not None and os.path.abspath(chemin) == self.chemin_source
+        self.noter_export(df_export, chemin, complet=complet)
+        return self.ajouter_lignes(df_export)
+
+    def ajouter_lignes(self, df_export):
+        """
+        Ajoute les lignes d'un export qui ne sont pas encore dans le jeu de données.
+        Retourne le nombre de lignes ajoutées.
+        """
+        # Le nettoyage (phonenumbers, unidecode) n'est chargé qu'à l'arrivée d'un export
+        from nettoyage_formulaire import est_export_brut, noms_colonnes_uniques, nettoyer_valeurs
+
+        brut = est_export_brut(df_export)
+        if brut:
+            # Renommer les colonnes ne coûte rien ; les valeurs ne sont nettoyées que pour les nouvelles lignes
+            df_export = df_export.copy()
+            df_export.columns = noms_colonnes_uniques(df_export.columns)
+
+        with self._verrou:
+            empreintes = empreintes_lignes(df_export)
+            nouvelles = df_export[~empreintes.isin(self._empreintes).values].copy()
+            self._empreintes.update(empreintes.values)
+            if len(nouvelles) == 0:
+                return 0
+
+            print(f"📥 {len(nouvelles)} nouvelles réponses détectées")
+            if brut:
+                nouvelles = nettoyer_valeurs(nouvelles)
+            nouvelles = preparer_donnees(nouvelles)
+            nouvelles = nouvelles.reindex(columns=self._df.columns)
+            nouvelles = self._valider(nouvelles)
+            if len(nouvelles) == 0:
+                return 0
+
+            # Doublons à l'intérieur du lot puis avec les réponses déjà connues
+            lot, doublons = dedupliquer(nouvelles, politique=self.politique_doublons, quasi_doublons=False)
+            nouvelles, remplacees, rejetees = self._resoudre_doublons_connus(lot)
+            self.doublons_retires += len(doublons) + len(remplacees) + len(rejetees)
+
+            # Les nouvelles réponses gardées prennent la suite des étiquettes du jeu
+            debut = self._df.index.max() + 1 if len(self._df) else 0
+            etiquettes = dict(zip(nouvelles.index, range(debut, debut + len(nouvelles))))
+            nouvelles.index = pd.RangeIndex(debut, debut + len(nouvelles))
+            doublons['index_conserve'] = [etiquettes.get(e, e) for e in doublons['index_conserve']]
+            self._auditer([
+                doublons,
+                self._lignes_audit(lot, rejetees),
+                self._lignes_audit(self._df, {connue: (etiquettes[e], motif)
+                                              for connue, (e, motif) in remplacees.items()}),
+            ])
+            if len(nouvelles) == 0:
+                return 0
+
+            df = self._df
+            if remplacees:
+                retirees = df.loc[list(remplacees)]
+                df = df.drop(index=list(remplacees))
+                for index in self.index_derives.values():
+                    index.retirer(retirees)
+
+            self._df = pd.concat([df, nouvelles])
+            self._indexer_cles(nouvelles)
+            for index in self.index_derives.values():
+                index.ajouter(nouvelles)
+
+            self._version += 1
+            self._publier(len(nouvelles))
+            print(f"✅ Version {self._version} publiée ({len(self._df)} lignes)")
+            return len(nouvelles)
+
+    def _resoudre_doublons_connus(self, nouvelles):
+        """
+        Applique la politique de déduplication face aux réponses déjà chargées,
+        en comparant les horodateurs : 'derniere' garde la plus récente, 'premiere' la plus ancienne
+        (une nouvelle réponse sans horodateur ne remplace jamais une réponse connue).
+        Retourne (nouvelles réponses gardées, {réponse connue remplacée: (nouvelle réponse, motif)},
+        {nouvelle réponse écartée: (réponse connue conservée, motif)})
+        """
+        cles = construire_cles(nouvelles)
+        garder = []
+        remplacees = {}
+        rejetees = {}
+        for etiquette in nouvelles.index:
+            connues = {}
+            for col in ['email', 'telephone']:
+                valeur = cles.at[etiquette, col]
+                connue = self._cles.get((col, valeur)) if pd.notna(valeur) else None
+                if connue is not None and connue in self._df.index and connue not in remplacees:
+                    connues.setdefault(connue, f"doublon_{col}")
+            if not connues:
+                garder.append(etiquette)
+                continue
+
+            date = nouvelles.at[etiquette, 'horodateur'] if 'horodateur' in nouvelles.columns else pd.NaT
+            dates_connues = [self._df.at[c, 'horodateur'] if 'horodateur' in self._df.columns else pd.NaT
+                             for c in connues]
+            if pd.isna(date):
+                prioritaire = False
+            elif self.politique_doublons == 'derniere':
+                prioritaire = all(pd.isna(d) or date > d for d in dates_connues)
+            else:
+                prioritaire = all(pd.notna(d) and date < d for d in dates_connues)
+            if prioritaire:
+                garder.append(etiquette)
+                remplacees.update({connue: (etiquette, motif) for connue, motif in connues.items()})
+            else:
+                rejetees[etiquette] = next(iter(connues.items()))
+        return nouvelles.loc[garder], remplacees, rejetees
+
+    @staticmethod
+    def _lignes_audit(df, retirees):
+        """
+        Lignes retirées au format de l'audit de dedupliquer : {étiquette: (index conservé, motif)}
+        """
+        audit = df.loc[list(retirees)].copy()
+        audit.insert(0, 'motif_suppression', [motif for _, motif in retirees.values()])
+        audit.insert(1, 'index_conserve', [conserve for conserve, _ in retirees.values()])
+        return audit
+
+    def _auditer(self, audits):
+        """
+        Ajoute les réponses retirées lors d'un ajout au fichier d'audit du chargement
+        """
+        audits = [audit for audit in audits if len(audit) > 0]
+        if not self.chemin_audit or not audits:
+            return
+        audit = pd.concat(audits)
+        entete = not os.path.exists(self.chemin_audit) or os.path.getsize(self.chemin_audit) == 0
+        audit.to_csv(self.chemin_audit, mode='a', header=entete, index=True, index_label='index_supprime',
+                     encoding='utf-8-sig')
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Jeu de données partagé entre plusieurs processus du dashboard
+Objectifs :
+- Publier le jeu de données nettoyé dans un fichier Arrow IPC non compressé
+- Le lire par projection en mémoire (mmap) : le cache de pages du système garde une seule copie
+  pour tous les processus, les colonnes pandas pointent directement dans le fichier
+- Changer de version de façon atomique (nouveau fichier puis renommage) ; les processus
+  qui lisent encore l'ancienne version la gardent jusqu'à leur rechargement
+"""
+
+import json
+import os
+import time
+
+import pandas as pd
+
+from chaines_arrow import dtype_chaines
+from detection_anomalies import DetecteurAnomalies
+from jeu_de_donnees import COLONNES_DASHBOARD, JeuDeDonnees, preparer_donnees
+from lecteur_excel import lire_excel
+from surveillance_fichiers import SurveillantFichiers
+
+FICHIER_JEU_PARTAGE = "jeu_partage.arrow"
+
+# Variable d'environnement transmise aux processus Streamlit : chemin du jeu partagé
+VARIABLE_JEU_PARTAGE = "DASHBOARD_JEU_PARTAGE"
+
+# Clé des métadonnées du dashboard dans le schéma Arrow
+CLE_METADONNEES = b'dashboard'
+
+
+def publier_jeu(df, chemin=FICHIER_JEU_PARTAGE, **metadonnees):
+    """
+    Écrit df dans un fichier temporaire puis le renomme en chemin (remplacement atomique)
+    """
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    # large_string : les colonnes texte se lisent en chaînes Arrow pandas sans conversion des offsets
+    champs = [pa.field(c.name, pa.large_string()) if pa.types.is_string(c.type) else c for c in table.schema]
+    schema = pa.schema(champs, metadata={**(table.schema.metadata or {}),
+                                         CLE_METADONNEES: json.dumps(metadonnees, default=str).encode()})
+    table = table.cast(schema)
+
+    temporaire = f"{chemin}.{os.getpid()}.tmp"
+    with pa.OSFile(temporaire, 'wb') as fichier:
+        with pa.ipc.new_file(fichier, schema) as ecrivain:
+            ecrivain.write_table(table)
+    os.replace(temporaire, chemin)
+
+
+def lire_jeu(chemin=FICHIER_JEU_PARTAGE):
+    """
+    Jeu partagé projeté en mémoire : (df, métadonnées).
+    La projection reste ouverte tant que des colonnes du DataFrame y font référence.
+    """
+    import pyarrow as pa
+
+    table = pa.ipc.open_file(pa.memory_map(chemin)).read_all()
+    dtype = dtype_chaines()
+    types = {pa.large_string(): dtype}.get if dtype is not None else None
+    df = table.to_pandas(types_mapper=types, split_blocks=True)
+    metadonnees = json.loads((table.schema.metadata or {}).get(CLE_METADONNEES, b'{}'))
+    return df, metadonnees
+
+
+def metadonnees_jeu(jeu):
+    """
+    Compteurs affichés par le dashboard, transmis avec chaque version publiée
+    """
+    instantane = jeu.instantane()
+    return {
+        'version': instantane.version,
+        'lignes_ajoutees': instantane.lignes_ajoutees,
+        'doublons_retires': jeu.doublons_retires,
+        'lignes_quarantaine': jeu.lignes_quarantaine,
+        'lignes_exclues': jeu.lignes_exclues,
+        'comptes_quarantaine': jeu.comptes_quarantaine.to_dict(),
+        'nouveautes': jeu.resume_nouveautes,
+    }
+
+
+def _appliquer_metadonnees(jeu, metadonnees):
+    jeu.doublons_retires = metadonnees.get('doublons_retires', 0)
+    jeu.lignes_quarantaine = metadonnees.get('lignes_quarantaine', 0)
+    jeu.lignes_exclues = metadonnees.get('lignes_exclues', 0)
+    jeu.comptes_quarantaine = pd.Series(metadonnees.get('comptes_quarantaine', {}), dtype='int64')
+    jeu.resume_nouveautes = metadonnees.get('nouveautes')
+    jeu.publication = metadonnees.get('publication')
+
+
+def _construire_jeu(chemin_donnees, chemin_audit, chemin_quarantaine, chemin_alertes):
+    """
+    Jeu de données nettoyé et dédoublonné du fichier source ; l'export tel que lu sert de
+    référence à la vue des nouveautés
+    """
+    export = lire_excel(chemin_donnees, colonnes=COLONNES_DASHBOARD)
+    df = preparer_donnees(export.copy(deep=False))
+    jeu = JeuDeDonnees(df, chemin_audit=chemin_audit, chemin_quarantaine=chemin_quarantaine,
+                       index_derives={'anomalies': DetecteurAnomalies(chemin_journal=chemin_alertes)})
+    return jeu, export
+
+
+def demarrer_publication(chemin_donnees, dossier_depot, chemin=FICHIER_JEU_PARTAGE,
+                         chemin_audit=None, chemin_quarantaine=None, chemin_alertes=None,
+                         apres_publication=None):
+    """
+    Processus principal : charge et nettoie le fichier source une seule fois, publie le jeu partagé,
+    puis republie une nouvelle version à chaque nouvel export intégré.
+    Un fichier source modifié est rechargé entièrement en arrière-plan (thread de surveillance) ;
+    la version en place reste publiée jusqu'au remplacement atomique du fichier partagé.
+    Les anomalies du flux des inscriptions sont détectées ici et écrites dans chemin_alertes.
+    apres_publication(jeu, publication, duree) : appelé après chaque publication (numéro croissant).
+    """
+    debut = time.perf_counter()
+    jeu, export = _construire_jeu(chemin_donnees, chemin_audit, chemin_quarantaine, chemin_alertes)
+    jeu.noter_export(export, chemin_donnees)
+    # Jeu courant et numéro de la dernière publication (un rechargement complet remplace le jeu)
+    courant = {'jeu': jeu, 'publication': 0}
+
+    def publier(jeu, duree):
+        courant['jeu'] = jeu
+        courant['publication'] += 1
+        publier_jeu(jeu.instantane().df, chemin, publication=courant['publication'], **metadonnees_jeu(jeu))
+        print(f"📦 Jeu partagé v{courant['publication']} publié : {chemin} ({len(jeu.instantane().df)} lignes)")
+        if apres_publication:
+            apres_publication(jeu, courant['publication'], duree)
+
+    publier(jeu, time.perf_counter() - debut)
+    source = os.path.abspath(chemin_donnees)
+
+    def integrer(fichier):
+        debut = time.perf_counter()
+        ancien = courant['jeu']
+        if os.path.abspath(fichier) == source:
+            # Réponses modifiées ou supprimées comprises : le jeu est reconstruit à côté du jeu publié
+            print(f"🔄 Fichier source modifié : rechargement complet de {chemin_donnees}")
+            jeu, export = _construire_jeu(chemin_donnees, chemin_audit, chemin_quarantaine, chemin_alertes)
+            # Les exports déjà déposés restent intégrés, dans leur ordre d'arrivée
+            deposes = sorted((os.path.join(dossier_depot, f) for f in os.listdir(dossier_depot)
+                              if f.endswith('.xlsx')), key=os.path.getmtime)
+            for depose in deposes:
+                jeu.ajouter_lignes(lire_excel(depose))
+            jeu.export_precedent = ancien.export_precedent
+            jeu.noter_export(export, chemin_donnees)
+            publier(jeu, time.perf_counter() - debut)
+        elif ancien.integrer_fichier(fichier) > 0:
+            publier(ancien, time.perf_counter() - debut)
+
+    os.makedirs(dossier_depot, exist_ok=True)
+    # Heures sans inscription fermées à l'horloge sur le jeu courant (alertes de chute)
+    jeu.surveillant = SurveillantFichiers([chemin_donnees, dossier_depot], integrer,
+                                          tic=lambda: courant['jeu'].avancer_horloge())
+    jeu.surveillant.demarrer()
+    return jeu
+
+
+def ouvrir_jeu_partage(chemin, index_derives=None):
+    """
+    Processus Streamlit : jeu de données en lecture seule sur le fichier partagé,
+    remplacé à chaque nouvelle version publiée (seuls les index dérivés sont recalculés)
+    """
+    df, metadonnees = lire_jeu(chemin)
+    jeu = JeuDeDonnees(df, index_derives=index_derives, donnees_propres=True)
+    _appliquer_metadonnees(jeu, metadonnees)
+
+    def recharger(_):
+        df, metadonnees = lire_jeu(chemin)
+        jeu.remplacer(df)
+        _appliquer_metadonnees(jeu, metadonnees)
+
+    jeu.surveillant = SurveillantFichiers([chemin], recharger, extensions=('.arrow',), tic=jeu.avancer_horloge)
+    jeu.surveillant.demarrer()
+    return jeu
@@ -2,38 +2,135 @@
 # -*- coding: utf-8 -*-
 """
 Script de lancement du dashboard Streamlit
+Utilisation : python lancer_dashboard.py [nb_processus]
+Un seul processus (par défaut, ou sans pyarrow) : Streamlit sert le port public et charge
+lui-même les données ; le lanceur le préchauffe puis ouvre le navigateur.
+Plusieurs processus : le lanceur publie le jeu de données partagé (Arrow), préchauffe chaque
+processus Streamlit (données, index et graphiques de la page d'accueil) puis ouvre le port public,
+où le répartiteur distribue les navigateurs entre les processus.
+L'état du service est servi sur le port PORT_SANTE dans les deux cas.
 """
 
+import shutil
 import subprocess
 import sys
 import os
+import threading
 
-def lancer_dashboard():
+PORT_PUBLIC = 8501
+
+# Mêmes fichiers que dashboard_streamlit.py
+FICHIER_DONNEES = "Formulaire_FINAL_OPTIMISE.xlsx"
+DOSSIER_DEPOT = "depot"
+FICHIER_QUARANTAINE = "quarantaine.csv"
+FICHIER_AUDIT_DOUBLONS = "doublons_supprimes.csv"
+
+def commande_streamlit(port):
+    return [
+        sys.executable, "-m", "streamlit", "run", "dashboard_streamlit.py",
+        "--server.port", str(port),
+        "--server.address", "localhost",
+        "--server.headless", "true",
+        # Exécution de la page sans navigateur, utilisée pour le préchauffage
+        "--server.scriptHealthCheckEnabled", "true"
+    ]
+
+def lancer_dashboard(nb_processus=1):
     """
-    Lance l'application Streamlit
+    Lance le dashboard sur nb_processus serveurs Streamlit. Le jeu partagé du mode multi-processus
+    demande pyarrow : sans lui, ou avec un seul processus, Streamlit sert directement le port public.
     """
-    print("🚀 Lancement du Dashboard d'Analyse du Formulaire...")
-    print("📊 Interface web disponible dans votre navigateur")
+    print(f"🚀 Lancement du Dashboard d'Analyse du Formulaire ({nb_processus} processus)...")
     print("⏹️  Appuyez sur Ctrl+C pour arrêter le serveur")
     print("="*60)
-    
+
+    # Changer vers le répertoire du script
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    from lecteur_excel import PYARROW_DISPONIBLE
+
+    if nb_processus > 1 and not PYARROW_DISPONIBLE:
+        print("⚠️ pyarrow n'est pas installé (jeu partagé indisponible) : lancement sur un seul processus")
+        nb_processus = 1
+    if nb_processus == 1:
+        lancer_processus_unique()
+    else:
+        lancer_multi_processus(nb_processus)
+
+def lancer_processus_unique():
+    """
+    Un seul serveur Streamlit sur le port public, qui charge lui-même les données ;
+    le lanceur le préchauffe (une fois) puis ouvre le navigateur et sert l'état du service.
+    """
+    from prechauffage import DOSSIER_ETATS, VARIABLE_DOSSIER_ETATS, EtatLanceur, demarrer_sante
+
+    etat = EtatLanceur([PORT_PUBLIC])
+    demarrer_sante(etat)
+    shutil.rmtree(DOSSIER_ETATS, ignore_errors=True)
+    environnement = {**os.environ, VARIABLE_DOSSIER_ETATS: os.path.abspath(DOSSIER_ETATS)}
+    processus = None
+    try:
+        processus = subprocess.Popen(commande_streamlit(PORT_PUBLIC), env=environnement)
+        if not etat.prechauffer():
+            print("⚠️ Le processus n'est pas prêt : la première visite terminera le chargement")
+        print(f"📊 Interface web disponible : http://localhost:{PORT_PUBLIC}")
+        import webbrowser
+        webbrowser.open(f"http://localhost:{PORT_PUBLIC}")
+        processus.wait()
+    except KeyboardInterrupt:
+        print("\n⏹️  Dashboard arrêté par l'utilisateur")
+    except Exception as e:
+        print(f"❌ Erreur lors du lancement: {e}")
+        print("💡 Assurez-vous que Streamlit est installé: pip install streamlit")
+    finally:
+        if processus is not None:
+            processus.terminate()
+
+def lancer_multi_processus(nb_processus):
+    """
+    Prépare les données, lance nb_processus serveurs Streamlit, les préchauffe, puis ouvre le port public.
+    Tous lisent le même fichier Arrow projeté en mémoire : une seule copie des données en RAM.
+    """
+    from detection_anomalies import FICHIER_ALERTES
+    from jeu_partage import FICHIER_JEU_PARTAGE, VARIABLE_JEU_PARTAGE, demarrer_publication
+    from prechauffage import DOSSIER_ETATS, VARIABLE_DOSSIER_ETATS, EtatLanceur, demarrer_sante
+    from repartiteur import lancer_repartiteur
+
+    ports = [PORT_PUBLIC + 1 + i for i in range(nb_processus)]
+    etat = EtatLanceur(ports)
+    demarrer_sante(etat)
+
+    def apres_publication(jeu, publication, duree):
+        etat.publier(publication, len(jeu.instantane().df), duree)
+        if etat.etape != 'prechauffage':
+            # Nouvelle version : processus préchauffés en arrière-plan, le port public reste ouvert
+            threading.Thread(target=etat.prechauffer, daemon=True).start()
+
+    # Le lanceur nettoie, publie et republie le jeu à chaque nouvel export ;
+    # il tient seul le journal des anomalies (les processus Streamlit ne l'écrivent pas)
+    demarrer_publication(FICHIER_DONNEES, DOSSIER_DEPOT, FICHIER_JEU_PARTAGE,
+                         chemin_audit=FICHIER_AUDIT_DOUBLONS, chemin_quarantaine=FICHIER_QUARANTAINE,
+                         chemin_alertes=FICHIER_ALERTES, apres_publication=apres_publication)
+
+    # États laissés par un lancement précédent
+    shutil.rmtree(DOSSIER_ETATS, ignore_errors=True)
+    environnement = {**os.environ, VARIABLE_JEU_PARTAGE: os.path.abspath(FICHIER_JEU_PARTAGE),
+                     VARIABLE_DOSSIER_ETATS: os.path.abspath(DOSSIER_ETATS)}
+    processus = [subprocess.Popen(commande_streamlit(port), env=environnement) for port in ports]
+
     try:
-        # Changer vers le répertoire du script
-        os.chdir(os.path.dirname(os.path.abspath(__file__)))
-        
-        # Lancer Streamlit
-        subprocess.run([
-            sys.executable, "-m", "streamlit", "run", "dashboard_streamlit.py",
-            "--server.port", "8501",
-            "--server.address", "localhost",
-            "--server.headless", "false"
-        ])
-        
+        if not etat.prechauffer():
+            print("⚠️ Certains processus ne sont pas prêts : ouverture du port public malgré tout")
+        print(f"📊 Interface web disponible : http://localhost:{PORT_PUBLIC}")
+        lancer_repartiteur(ports, PORT_PUBLIC)
     except KeyboardInterrupt:
         print("\n⏹️  Dashboard arrêté par l'utilisateur")
     except Exception as e:
         print(f"❌ Erreur lors du lancement: {e}")
         print("💡 Assurez-vous que Streamlit est installé: pip install streamlit")
+    finally:
+        for p in processus:
+            p.terminate()
 
 if __name__ == "__main__":
-    lancer_dashboard()
+    nb_processus = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    lancer_dashboard(nb_processus)
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lecture rapide des classeurs Excel
+Objectifs :
+- Choisir le moteur le plus rapide disponible (calamine, sinon openpyxl en lecture seule)
+- Ne lire que les colonnes utiles
+- Convertir chaque classeur une seule fois : la feuille décodée est mise en cache
+  (Parquet si pyarrow est installé, pickle sinon), indexée par l'empreinte du fichier
+- Comparer les moteurs sur nos classeurs (python lecteur_excel.py)
+"""
+
+import hashlib
+import importlib.util
+import os
+import sys
+import threading
+import time
+
+import pandas as pd
+
+# Détection sans import : pyarrow n'est chargé (par pandas) qu'à la lecture d'un instantané.
+# Le moteur calamine de pandas (>= 2.2) s'appuie sur python-calamine (Rust).
+CALAMINE_DISPONIBLE = (importlib.util.find_spec('python_calamine') is not None
+                       and tuple(int(x) for x in pd.__version__.split('.')[:2]) >= (2, 2))
+PYARROW_DISPONIBLE = importlib.util.find_spec('pyarrow') is not None
+
+DOSSIER_CACHE = ".cache_excel"
+
+# Nombre d'instantanés conservés dans le cache
+MAX_INSTANTANES = 20
+
+
+def moteurs_disponibles():
+    """
+    Moteurs de lecture installés, du plus rapide au plus lent
+    """
+    moteurs = []
+    if CALAMINE_DISPONIBLE:
+        moteurs.append('calamine')
+    moteurs.append('openpyxl')
+    return moteurs
+
+
+def empreinte_fichier(chemin, taille_bloc=1 << 20):
+    """
+    Empreinte SHA-256 du contenu du fichier
+    """
+    h = hashlib.sha256()
+    with open(chemin, 'rb') as f:
+        for bloc in iter(lambda: f.read(taille_bloc), b''):
+            h.update(bloc)
+    return h.hexdigest()
+
+
+def _chemin_instantane(empreinte, colonnes, dossier_cache):
+    cle = empreinte[:32]
+    if colonnes is not None:
+        cle += '_' + hashlib.sha256('|'.join(sorted(colonnes)).encode('utf-8')).hexdigest()[:8]
+    extension = '.parquet' if PYARROW_DISPONIBLE else '.pkl'
+    return os.path.join(dossier_cache, cle + extension)
+
+
+def _lire_instantane(chemin):
+    if chemin.endswith('.parquet'):
+        return pd.read_parquet(chemin)
+    return pd.read_pickle(chemin)
+
+
+def typer_colonnes(df):
+    """
+    Les colonnes aux types mélangés (ex. téléphones lus tantôt comme nombres,
+    tantôt comme texte) sont converties en texte pour obtenir un schéma stable.
+    Les valeurs manquantes sont conservées.
+    """
+    for col in df.columns:
+        if df[col].dtype == object:
+            valeurs = df[col].dropna()
+            if not valeurs.map(type).eq(str).all():
+                df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
+
+
+def _ecrire_instantane(df, chemin):
+    """
+    Écrit l'instantané de façon atomique (fichier temporaire puis renommage).
+    Repli sur pickle si le DataFrame ne passe pas en Parquet.
+    Temporaire propre au processus et au thread : plusieurs processus Streamlit ou du pool
+    des rapports peuvent écrire le même instantané en même temps.
+    """
+    temporaire = f"{chemin}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        df.to_parquet(temporaire, index=False) if chemin.endswith('.parquet') else df.to_pickle(temporaire)
+    except Exception:
+        chemin = chemin.rsplit('.', 1)[0] + '.pkl'
+        df.to_pickle(temporaire)
+    os.replace(temporaire, chemin)
+    return chemin
+
+
+def _nettoyer_cache(dossier_cache):
+    instantanes = [os.path.join(dossier_cache, f) for f in os.listdir(dossier_cache)
+                   if f.endswith(('.parquet', '.pkl'))]
+    instantanes.sort(key=os.path.getmtime, reverse=True)
+    for chemin in instantanes[MAX_INSTANTANES:]:
+        os.remove(chemin)
+
+
+def lire_feuille(chemin, colonnes=None, moteur=None):
+    """
+    Lit la première feuille avec le moteur donné (ou le plus rapide disponible).
+    Les colonnes demandées absentes du fichier sont ignorées.
+    """
+    moteur = moteur or moteurs_disponibles()[0]
+    usecols = None
+    if colonnes is not None:
+        colonnes = set(colonnes)
+        usecols = lambda col: col in colonnes  # noqa: E731
+    return pd.read_excel(chemin, engine=moteur, usecols=usecols)
+
+
+def nombre_lignes_classeur(chemin):
+    """
+    Nombre de lignes de données annoncé par la dimension de la feuille, sans lire les cellules
+    (None si le classeur ne la renseigne pas)
+    """
+    from openpyxl import load_workbook
+
+    try:
+        classeur = load_workbook(chemin, read_only=True)
+    except Exception:
+        return None
+    try:
+        max_row = classeur.worksheets[0].max_row
+    finally:
+        classeur.close()
+    return max_row - 1 if max_row else None
+
+def lire_excel(chemin, colonnes=None, moteur=None, cache=True, dossier_cache=DOSSIER_CACHE):
+    """
+    Lit un classeur Excel en passant par le cache d'instantanés :
+    le classeur n'est décodé qu'une fois tant que son contenu ne change pas
+    """
+    if not cache:
+        return lire_feuille(chemin, colonnes, moteur)
+
+    os.makedirs(dossier_cache, exist_ok=True)
+    instantane = _chemin_instantane(empreinte_fichier(chemin), colonnes, dossier_cache)
+    for candidat in (instantane, instantane.rsplit('.', 1)[0] + '.pkl'):
+        if os.path.exists(candidat):
+            try:
+                return _lire_instantane(candidat)
+            except Exception:
+                os.remove(candidat)
+
+    df = typer_colonnes(lire_feuille(chemin, colonnes, moteur))
+    try:
+        _ecrire_instantane(df, instantane)
+        _nettoyer_cache(dossier_cache)
+    except OSError as e:
+        print(f"⚠️ Instantané non enregistré ({e})")
+    return df
+
+
+def _dupliquer_classeur(chemin, nb_lignes, dossier):
+    """
+    Classeur de test de la même forme que le classeur réel, avec nb_lignes lignes
+    """
+    df = pd.read_excel(chemin)
+    repetitions = -(-nb_lignes // len(df))
+    grand = pd.concat([df] * repetitions, ignore_index=True).head(nb_lignes)
+    sortie = os.path.join(dossier, f"bench_{nb_lignes}_{os.path.basename(chemin)}")
+    if not os.path.exists(sortie):
+        grand.to_excel(sortie, index=False)
+    return sortie
+
+
+def benchmark(chemins, colonnes=None, repetitions=3):
+    """
+    Compare les moteurs (lecture complète et colonnes utiles) et la relecture de l'instantané
+    """
+    import tempfile
+
+    resultats = []
+    with tempfile.TemporaryDirectory() as dossier_cache:
+        for chemin in chemins:
+            nb_lignes = None
+            mesures = {}
+            for moteur in moteurs_disponibles():
+                for nom, cols in [('complet', None), ('colonnes', colonnes)]:
+                    if nom == 'colonnes' and colonnes is None:
+                        continue
+                    durees = []
+                    for _ in range(repetitions):
+                        debut = time.perf_counter()
+                        df = lire_feuille(chemin, cols, moteur)
+                        durees.append(time.perf_counter() - debut)
+                    if cols is None:
+                        nb_lignes = len(df)
+                    mesures[f"{moteur}/{nom}"] = min(durees)
+
+            lire_excel(chemin, colonnes, dossier_cache=dossier_cache)
+            durees = []
+            for _ in range(repetitions):
+                debut = time.perf_counter()
+                lire_excel(chemin, colonnes, dossier_cache=dossier_cache)
+                durees.append(time.perf_counter() - debut)
+            mesures['instantane'] = min(durees)
+            resultats.append((chemin, nb_lignes, mesures))
+    return resultats
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    # Colonnes utilisées par le dashboard
+    from jeu_de_donnees import COLONNES_DASHBOARD
+
+    nb_lignes = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    print(f"⚙️ Moteurs disponibles: {', '.join(moteurs_disponibles())}")
+    print(f"💾 Format des instantanés: {'Parquet' if PYARROW_DISPONIBLE else 'pickle'}")
+
+    with tempfile.TemporaryDirectory() as dossier:
+        print(f"\n📄 Préparation d'un classeur de {nb_lignes} lignes (forme du classeur réel)...")
+        chemins = [
+            "Formulaire sans titre (réponses).xlsx",
+            "Formulaire_FINAL_OPTIMISE.xlsx",
+            _dupliquer_classeur("Formulaire_FINAL_OPTIMISE.xlsx", nb_lignes, dossier),
+        ]
+
+        for chemin, lignes, mesures in benchmark(chemins, COLONNES_DASHBOARD):
+            print(f"\n📊 {os.path.basename(chemin)} ({lignes} lignes)")
+            reference = mesures.get('openpyxl/complet')
+            for nom, duree in mesures.items():
+                gain = f"  (x{reference / duree:.1f})" if reference else ""
+                print(f"  {nom:<22} {duree * 1000:>9.1f} ms{gain}")
@@ -6,18 +6,66 @@ Objectifs :
 - Renommer les colonnes (supprimer \n, accents, phrases longues)
 - Uniformiser les dates
 - Nettoyer les numéros de téléphone
+- Traiter les colonnes texte en chaînes Arrow (repli sur des chaînes object sans pyarrow)
 - Standardiser les réponses des packs
+- Dériver le type et le prix du pack, l'âge et la tranche d'âge
 - Harmoniser les noms de pays
+- Identifier la région et l'opérateur des téléphones (pays manquants corrigés)
 - Supprimer les colonnes vides
+- Valider le schéma (lignes en échec mises en quarantaine)
+- Supprimer les inscriptions en double
 """
 
 import pandas as pd
 import re
-from unidecode import unidecode
 import phonenumbers
-from phonenumbers import geocoder, carrier
 import numpy as np
 from datetime import datetime
+from chaines_arrow import FORMAT_DATE, en_chaines, formater_dates, replier_accents
+from colonnes_derivees import deriver_colonnes
+from deduplication import dedupliquer, detecter_colonne
+from enrichissement_telephone import enrichir_telephones
+from lecteur_excel import lire_excel
+from validation_schema import valider
+
+# Formats de date courants à essayer, dans l'ordre
+FORMATS_DATES = [
+    '%d/%m/%Y %H:%M:%S',
+    '%d/%m/%Y',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d',
+    '%d-%m-%Y',
+    '%m/%d/%Y',
+    '%d.%m.%Y',
+    '%Y/%m/%d'
+]
+FORMAT_DATE_SORTIE = FORMAT_DATE
+
+# Correspondances des pays courants (la première clé contenue dans la réponse l'emporte)
+CORRESPONDANCES_PAYS = {
+    'france': 'France',
+    'cameroun': 'Cameroun',
+    'cameroon': 'Cameroun',
+    'cote d\'ivoire': 'Côte d\'Ivoire',
+    'ivory coast': 'Côte d\'Ivoire',
+    'senegal': 'Sénégal',
+    'burkina faso': 'Burkina Faso',
+    'burkina': 'Burkina Faso',
+    'mali': 'Mali',
+    'niger': 'Niger',
+    'tchad': 'Tchad',
+    'chad': 'Tchad',
+    'benin': 'Bénin',
+    'togo': 'Togo',
+    'ghana': 'Ghana',
+    'nigeria': 'Nigeria',
+    'maroc': 'Maroc',
+    'morocco': 'Maroc',
+    'algerie': 'Algérie',
+    'algeria': 'Algérie',
+    'tunisie': 'Tunisie',
+    'tunisia': 'Tunisie'
+}
 
 def nettoyer_nom_colonne(nom):
     """
@@ -30,11 +78,8 @@ def nettoyer_nom_colonne(nom):
     # Convertir en string
     nom = str(nom)
     
-    # Supprimer les \n et remplacer par des espaces
-    nom = nom.replace('\n', ' ').replace('\r', ' ')
-    
-    # Supprimer les accents
-    nom = unidecode(nom)
+    # Supprimer les \n et les accents (même translittération que l'index des réponses libres)
+    nom = replier_accents(nom)
     
     # Supprimer les caractères spéciaux sauf espaces et tirets
     nom = re.sub(r'[^\w\s-]', '', nom)
@@ -64,7 +109,7 @@ def detecter_colonnes_vides(df):
     colonnes_vides = []
     for col in df.columns:
         # Vérifier si la colonne est complètement vide
-        if df[col].isna().all() or (df[col].astype(str).str.strip() == '').all():
+        if df[col].isna().all() or (en_chaines(df[col]).str.strip() == '').all():
             colonnes_vides.append(col)
     return colonnes_vides
 
@@ -100,26 +145,14 @@ def uniformiser_date(date_str):
     
     # Si c'est déjà un objet datetime
     if isinstance(date_str, (pd.Timestamp, datetime)):
-        return date_str.strftime('%d/%m/%Y %H:%M:%S')
+        return date_str.strftime(FORMAT_DATE_SORTIE)
     
     date_str = str(date_str).strip()
     
-    # Formats de date courants à essayer
-    formats = [
-        '%d/%m/%Y %H:%M:%S',
-        '%d/%m/%Y',
-        '%Y-%m-%d %H:%M:%S',
-        '%Y-%m-%d',
-        '%d-%m-%Y',
-        '%m/%d/%Y',
-        '%d.%m.%Y',
-        '%Y/%m/%d'
-    ]
-    
-    for fmt in formats:
+    for fmt in FORMATS_DATES:
         try:
             date_obj = datetime.strptime(date_str, fmt)
-            return date_obj.strftime('%d/%m/%Y %H:%M:%S')
+            return date_obj.strftime(FORMAT_DATE_SORTIE)
         except:
             continue
     
@@ -134,39 +167,72 @@ def standardiser_pays(pays):
     
     pays_str = str(pays).strip().lower()
     
-    # Dictionnaire de correspondance pour les pays courants
-    correspondances_pays = {
-        'france': 'France',
-        'cameroun': 'Cameroun',
-        'cameroon': 'Cameroun',
-        'cote d\'ivoire': 'Côte d\'Ivoire',
-        'ivory coast': 'Côte d\'Ivoire',
-        'senegal': 'Sénégal',
-        'burkina faso': 'Burkina Faso',
-        'burkina': 'Burkina Faso',
-        'mali': 'Mali',
-        'niger': 'Niger',
-        'tchad': 'Tchad',
-        'chad': 'Tchad',
-        'benin': 'Bénin',
-        'togo': 'Togo',
-        'ghana': 'Ghana',
-        'nigeria': 'Nigeria',
-        'maroc': 'Maroc',
-        'morocco': 'Maroc',
-        'algerie': 'Algérie',
-        'algeria': 'Algérie',
-        'tunisie': 'Tunisie',
-        'tunisia': 'Tunisie'
-    }
-    
-    for cle, valeur in correspondances_pays.items():
+    for cle, valeur in CORRESPONDANCES_PAYS.items():
         if cle in pays_str:
             return valeur
     
     # Capitaliser la première lettre si pas trouvé
     return pays_str.title()
 
+def uniformiser_dates(serie):
+    """
+    uniformiser_date sur toute une colonne : chaque format est essayé en une passe
+    sur les chaînes pas encore reconnues, au lieu d'un strptime par cellule
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return formater_dates(serie, FORMAT_DATE_SORTIE)
+    
+    resultat = pd.Series(np.nan, index=serie.index, dtype=object)
+    objets_dates = serie.map(type).isin([pd.Timestamp, datetime])
+    if objets_dates.any():
+        resultat[objets_dates] = formater_dates(pd.to_datetime(serie[objets_dates]), FORMAT_DATE_SORTIE)
+    
+    restantes = en_chaines(serie[~objets_dates]).str.strip().dropna()
+    for fmt in FORMATS_DATES:
+        if len(restantes) == 0:
+            break
+        dates = pd.to_datetime(restantes, format=fmt, errors='coerce')
+        reconnues = dates.notna()
+        resultat[reconnues.index[reconnues]] = formater_dates(dates[reconnues], FORMAT_DATE_SORTIE)
+        restantes = restantes[~reconnues]
+    # Valeur d'origine (sans espaces) si aucun format ne marche
+    resultat[restantes.index] = restantes
+    return en_chaines(resultat)
+
+def nettoyer_telephones(serie, pays_defaut='FR'):
+    """
+    nettoyer_telephone sur toute une colonne : espaces et valeurs vides traités en chaînes,
+    phonenumbers appelé une seule fois par numéro distinct
+    """
+    numeros = en_chaines(serie).str.strip()
+    numeros = numeros.mask(numeros.str.lower().isin(['nan', 'none', '']))
+    codes, distincts = pd.factorize(numeros)
+    # Le code -1 (numéro manquant) désigne la dernière case, NaN
+    nettoyes = np.array([nettoyer_telephone(numero, pays_defaut) for numero in distincts] + [np.nan], dtype=object)
+    return en_chaines(pd.Series(nettoyes[codes], index=serie.index))
+
+def standardiser_noms_pays(serie):
+    """
+    standardiser_pays sur toute une colonne : espaces et casse traités en chaînes, puis une
+    recherche de sous-chaîne par correspondance sur les réponses distinctes pas encore reconnues
+    """
+    codes, distincts = pd.factorize(en_chaines(serie).str.strip().str.lower())
+    distincts = en_chaines(pd.Series(distincts, dtype=object))
+    resultat = distincts.str.title()
+    restants = pd.Series(True, index=distincts.index)
+    for cle, valeur in CORRESPONDANCES_PAYS.items():
+        trouves = restants & distincts.str.contains(cle, regex=False)
+        resultat[trouves] = valeur
+        restants &= ~trouves
+    # Le code -1 (pays manquant) désigne la dernière case, NaN
+    return en_chaines(pd.Series(np.append(resultat.to_numpy(dtype=object), np.nan)[codes], index=serie.index))
+
+def standardiser_packs(serie):
+    """
+    Réponses de packs sans espaces superflus, une majuscule par mot
+    """
+    return en_chaines(serie).str.strip().str.title().replace('Nan', np.nan)
+
 def analyser_fichier(chemin_fichier):
     """
     Analyse le fichier Excel et affiche des informations sur sa structure
@@ -174,8 +240,8 @@ def analyser_fichier(chemin_fichier):
     print("📊 Analyse du fichier Excel...")
     
     try:
-        # Lire le fichier Excel
-        df = pd.read_excel(chemin_fichier)
+        # Lire le fichier Excel (moteur le plus rapide, instantané mis en cache)
+        df = lire_excel(chemin_fichier)
         
         print(f"✅ Fichier lu avec succès!")
         print(f"📏 Dimensions: {df.shape[0]} lignes, {df.shape[1]} colonnes")
@@ -201,26 +267,13 @@ def analyser_fichier(chemin_fichier):
         print(f"❌ Erreur lors de la lecture du fichier: {e}")
         return None
 
-def nettoyer_fichier(chemin_fichier, chemin_sortie=None):
+def noms_colonnes_uniques(colonnes):
     """
-    Fonction principale de nettoyage du fichier
+    Nettoie une liste de noms de colonnes en gérant les doublons (suffixe _1, _2...)
     """
-    print("🧹 Début du nettoyage du fichier...")
-    
-    # Analyser le fichier
-    df = analyser_fichier(chemin_fichier)
-    if df is None:
-        return None
-    
-    # 1. Renommer les colonnes
-    print("\n📝 Nettoyage des noms de colonnes...")
-    anciens_noms = df.columns.tolist()
-    nouveaux_noms = [nettoyer_nom_colonne(col) for col in df.columns]
-    
-    # Gérer les doublons dans les noms de colonnes
     noms_uniques = []
     compteur = {}
-    for nom in nouveaux_noms:
+    for nom in [nettoyer_nom_colonne(col) for col in colonnes]:
         if nom in compteur:
             compteur[nom] += 1
             nom_unique = f"{nom}_{compteur[nom]}"
@@ -228,36 +281,28 @@ def nettoyer_fichier(chemin_fichier, chemin_sortie=None):
             compteur[nom] = 0
             nom_unique = nom
         noms_uniques.append(nom_unique)
-    
-    df.columns = noms_uniques
-    
-    print("✅ Colonnes renommées:")
-    for ancien, nouveau in zip(anciens_noms, noms_uniques):
-        if ancien != nouveau:
-            print(f"  '{ancien}' → '{nouveau}'")
-    
-    # 2. Supprimer les colonnes vides
-    print(f"\n🗑️ Suppression des colonnes vides...")
-    colonnes_vides = detecter_colonnes_vides(df)
-    if colonnes_vides:
-        # Mapper les anciens noms aux nouveaux noms
-        colonnes_vides_nouvelles = []
-        for i, ancien_nom in enumerate(anciens_noms):
-            if ancien_nom in colonnes_vides:
-                colonnes_vides_nouvelles.append(noms_uniques[i])
-        
-        df = df.drop(columns=colonnes_vides_nouvelles)
-        print(f"✅ {len(colonnes_vides_nouvelles)} colonnes vides supprimées")
-    else:
-        print("✅ Aucune colonne vide trouvée")
-    
+    return noms_uniques
+
+def est_export_brut(df):
+    """
+    Indique si les colonnes sont celles de l'export Google Form (non nettoyées) ;
+    les noms déjà raccourcis par le nettoyage (« ... » final) restent reconnus comme nettoyés
+    """
+    colonnes = [col[:-3] if isinstance(col, str) and col.endswith('...') else col for col in df.columns]
+    return colonnes != noms_colonnes_uniques(colonnes)
+
+def nettoyer_valeurs(df):
+    """
+    Nettoie les valeurs d'un DataFrame dont les colonnes sont déjà renommées
+    (dates, téléphones, pays, packs, colonnes dérivées)
+    """
     # 3. Traitement des dates
     print(f"\n📅 Uniformisation des dates...")
     colonnes_dates = [col for col in df.columns if any(mot in col.lower() for mot in ['date', 'horodateur', 'timestamp', 'naissance'])]
     
     for col in colonnes_dates:
         print(f"  Traitement de la colonne: {col}")
-        df[col] = df[col].apply(uniformiser_date)
+        df[col] = uniformiser_dates(df[col])
     
     if colonnes_dates:
         print(f"✅ {len(colonnes_dates)} colonnes de dates traitées")
@@ -270,7 +315,7 @@ def nettoyer_fichier(chemin_fichier, chemin_sortie=None):
     
     for col in colonnes_tel:
         print(f"  Traitement de la colonne: {col}")
-        df[col] = df[col].apply(nettoyer_telephone)
+        df[col] = nettoyer_telephones(df[col])
     
     if colonnes_tel:
         print(f"✅ {len(colonnes_tel)} colonnes de téléphone traitées")
@@ -283,13 +328,21 @@ def nettoyer_fichier(chemin_fichier, chemin_sortie=None):
     
     for col in colonnes_pays:
         print(f"  Traitement de la colonne: {col}")
-        df[col] = df[col].apply(standardiser_pays)
+        df[col] = standardiser_noms_pays(df[col])
     
     if colonnes_pays:
         print(f"✅ {len(colonnes_pays)} colonnes de pays traitées")
     else:
         print("✅ Aucune colonne de pays détectée")
     
+    # Région et opérateur des téléphones, correction des pays manquants ou invalides
+    col_tel = detecter_colonne(df, ['telephone', 'phone'])
+    col_pays = detecter_colonne(df, ['pays', 'country'])
+    if col_tel:
+        print(f"\n📞 Enrichissement des numéros de téléphone...")
+        df = enrichir_telephones(df, col_tel=col_tel, col_pays=col_pays or 'pays')
+        print(f"✅ {df['operateur'].notna().sum()} opérateurs identifiés, {int(df['pays_corrige'].sum())} pays corrigés")
+    
     # 6. Standardisation des packs (si applicable)
     print(f"\n📦 Standardisation des réponses de packs...")
     colonnes_pack = [col for col in df.columns if any(mot in col.lower() for mot in ['pack', 'package', 'formule', 'option'])]
@@ -297,18 +350,97 @@ def nettoyer_fichier(chemin_fichier, chemin_sortie=None):
     for col in colonnes_pack:
         print(f"  Traitement de la colonne: {col}")
         # Nettoyer et standardiser les valeurs
-        df[col] = df[col].astype(str).str.strip().str.title()
-        df[col] = df[col].replace('Nan', np.nan)
+        df[col] = standardiser_packs(df[col])
     
     if colonnes_pack:
         print(f"✅ {len(colonnes_pack)} colonnes de packs traitées")
     else:
         print("✅ Aucune colonne de pack détectée")
     
+    # Colonnes dérivées : type et prix du pack (réponse à l'offre), âge et tranche d'âge
+    print(f"\n🧮 Calcul des colonnes dérivées...")
+    df = deriver_colonnes(df, col_offre=detecter_colonne(df, ['offre']))
+    derivees = [col for col in ['type_pack', 'prix_pack_fcfa', 'age', 'tranche_age'] if col in df.columns]
+    print(f"✅ Colonnes dérivées: {', '.join(derivees) if derivees else 'aucune'}")
+    
+    return df
+
+def nettoyer_fichier(chemin_fichier, chemin_sortie=None, politique_doublons='derniere', chemin_audit=None,
+                     chemin_quarantaine=None):
+    """
+    Fonction principale de nettoyage du fichier
+    politique_doublons : 'derniere' ou 'premiere' réponse conservée (selon l'horodateur)
+    """
+    print("🧹 Début du nettoyage du fichier...")
+    
+    # Analyser le fichier
+    df = analyser_fichier(chemin_fichier)
+    if df is None:
+        return None
+    
+    # 1. Renommer les colonnes
+    print("\n📝 Nettoyage des noms de colonnes...")
+    anciens_noms = df.columns.tolist()
+    noms_uniques = noms_colonnes_uniques(df.columns)
+    
+    df.columns = noms_uniques
+    
+    print("✅ Colonnes renommées:")
+    for ancien, nouveau in zip(anciens_noms, noms_uniques):
+        if ancien != nouveau:
+            print(f"  '{ancien}' → '{nouveau}'")
+    
+    # 2. Supprimer les colonnes vides
+    print(f"\n🗑️ Suppression des colonnes vides...")
+    colonnes_vides = detecter_colonnes_vides(df)
+    if colonnes_vides:
+        # Mapper les anciens noms aux nouveaux noms
+        colonnes_vides_nouvelles = []
+        for i, ancien_nom in enumerate(anciens_noms):
+            if ancien_nom in colonnes_vides:
+                colonnes_vides_nouvelles.append(noms_uniques[i])
+        
+        df = df.drop(columns=colonnes_vides_nouvelles)
+        print(f"✅ {len(colonnes_vides_nouvelles)} colonnes vides supprimées")
+    else:
+        print("✅ Aucune colonne vide trouvée")
+    
+    # 3-6. Dates, téléphones, pays et packs
+    df = nettoyer_valeurs(df)
+    
     # Sauvegarder le fichier nettoyé
     if chemin_sortie is None:
         chemin_sortie = chemin_fichier.replace('.xlsx', '_nettoye.xlsx')
     
+    # 7. Validation du schéma (lignes en échec mises en quarantaine avec leurs codes de rejet)
+    print(f"\n🚧 Validation du schéma...")
+    if chemin_quarantaine is None:
+        chemin_quarantaine = chemin_sortie.replace('.xlsx', '_quarantaine.csv')
+    
+    df, df_quarantaine, comptes = valider(df, chemin_quarantaine=chemin_quarantaine)
+    
+    if len(df_quarantaine) > 0:
+        for code, nombre in comptes.items():
+            print(f"  {code}: {nombre}")
+        print(f"✅ {len(df_quarantaine)} lignes en quarantaine, {int(df_quarantaine['exclue'].sum())} exclues "
+              f"(détail: {chemin_quarantaine})")
+    else:
+        print("✅ Toutes les lignes respectent le schéma")
+    
+    # 8. Suppression des doublons (après le nettoyage des téléphones)
+    print(f"\n👥 Suppression des inscriptions en double...")
+    if chemin_audit is None:
+        chemin_audit = chemin_sortie.replace('.xlsx', '_doublons.csv')
+    
+    df, df_doublons = dedupliquer(df, politique=politique_doublons, chemin_audit=chemin_audit)
+    
+    if len(df_doublons) > 0:
+        for motif, nombre in df_doublons['motif_suppression'].value_counts().items():
+            print(f"  {motif}: {nombre}")
+        print(f"✅ {len(df_doublons)} doublons supprimés (audit: {chemin_audit})")
+    else:
+        print("✅ Aucun doublon détecté")
+    
     try:
         df.to_excel(chemin_sortie, index=False)
         print(f"\n💾 Fichier nettoyé sauvegardé: {chemin_sortie}")
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Préchauffage et état de santé du lanceur
+Objectifs :
+- Faire exécuter une première fois la page par chaque processus Streamlit avant d'ouvrir le port
+  public (jeu de données chargé, index dérivés construits, figures en cache), puis à nouveau
+  après chaque nouvelle version publiée
+- Chaque processus note dans un fichier d'état la version publiée qu'il a entièrement affichée
+  (sa propre version du jeu de données en processus unique), sa mémoire et son PID ;
+  le lanceur attend que tous les processus soient à jour
+- Exposer sur un port local l'état du service : /sante (version des données, durée de chargement,
+  mémoire du lanceur et des processus) et /pret (200 si tous les processus sont prêts, 503 sinon)
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from suivi_performance import memoire_rss
+
+PORT_SANTE = 8500
+DOSSIER_ETATS = "etat_processus"
+# Variable d'environnement indiquant aux processus Streamlit où écrire leur état
+VARIABLE_DOSSIER_ETATS = "DASHBOARD_DOSSIER_ETATS"
+
+# Exécution de la page sans navigateur (option de Streamlit activée par le lanceur sur ses processus)
+ROUTE_EXECUTION = "/_stcore/script-health-check"
+ROUTE_SANTE_STREAMLIT = "/_stcore/health"
+INTERVALLE_PRECHAUFFAGE = 0.5
+DELAI_MAX_PRECHAUFFAGE = 600
+
+_publication_notee = None
+
+
+def noter_etat_processus(publication, lignes, port, dossier=None):
+    """
+    Côté Streamlit : note la version publiée entièrement affichée par ce processus
+    (une écriture par version, remplacement atomique du fichier d'état)
+    """
+    global _publication_notee
+    dossier = dossier or os.environ.get(VARIABLE_DOSSIER_ETATS)
+    if not dossier or publication is None or publication == _publication_notee:
+        return
+    os.makedirs(dossier, exist_ok=True)
+    chemin = os.path.join(dossier, f"{port}.json")
+    temporaire = f"{chemin}.{os.getpid()}.tmp"
+    with open(temporaire, 'w', encoding='utf-8') as fichier:
+        json.dump({'port': port, 'pid': os.getpid(), 'publication': publication, 'lignes': lignes,
+                   'memoire_octets': memoire_rss(), 'date': datetime.now().isoformat(timespec='seconds')},
+                  fichier)
+    os.replace(temporaire, chemin)
+    _publication_notee = publication
+
+
+def lire_etat_processus(port, dossier=DOSSIER_ETATS):
+    """
+    Dernier état noté par le processus du port (None s'il n'a encore rien affiché)
+    """
+    try:
+        with open(os.path.join(dossier, f"{port}.json"), encoding='utf-8') as fichier:
+            return json.load(fichier)
+    except (OSError, ValueError):
+        return None
+
+
+def _requete(url, delai=65):
+    """
+    Code HTTP d'une requête GET locale (None si le serveur ne répond pas)
+    """
+    import urllib.error
+    import urllib.request
+
+    try:
+        with urllib.request.urlopen(url, timeout=delai) as reponse:
+            return reponse.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return None
+
+
+def prechauffer_processus(port, publication, dossier=DOSSIER_ETATS, hote='localhost',
+                          delai_max=DELAI_MAX_PRECHAUFFAGE):
+    """
+    Exécute la page du processus jusqu'à ce qu'il ait affiché la version publiée
+    (une version quelconque si publication est None : processus unique, sans jeu partagé).
+    Retourne la durée en secondes, ou None si le processus n'est pas prêt dans le délai.
+    """
+    debut = time.monotonic()
+    while time.monotonic() - debut < delai_max:
+        etat = lire_etat_processus(port, dossier)
+        if etat is not None and (publication is None or etat['publication'] == publication):
+            return time.monotonic() - debut
+        # Chaque exécution fait avancer le chargement en arrière-plan du processus, puis remplit ses caches
+        code = _requete(f"http://{hote}:{port}{ROUTE_EXECUTION}")
+        if code == 404:
+            # Exécution sans navigateur indisponible : prêt dès que le serveur répond
+            print(f"⚠️ Port {port} : préchauffage indisponible, la première visite chargera les données")
+            while _requete(f"http://{hote}:{port}{ROUTE_SANTE_STREAMLIT}", delai=5) != 200:
+                time.sleep(INTERVALLE_PRECHAUFFAGE)
+            return time.monotonic() - debut
+        time.sleep(INTERVALLE_PRECHAUFFAGE)
+    return None
+
+
+class EtatLanceur:
+    """
+    État du service tenu par le lanceur : version publiée et processus Streamlit à jour
+    """
+
+    def __init__(self, ports, dossier=DOSSIER_ETATS):
+        self.ports = list(ports)
+        self.dossier = dossier
+        self.etape = 'prechauffage'
+        self.publication = None
+        self.lignes = 0
+        self.duree_chargement = None
+        self.derniere_maj = None
+        self.ports_prets = set()
+        self._verrou = threading.Lock()
+        self._prechauffage = threading.Lock()
+
+    def publier(self, publication, lignes, duree_chargement):
+        with self._verrou:
+            self.publication = publication
+            self.lignes = lignes
+            self.duree_chargement = round(duree_chargement, 2)
+            self.derniere_maj = datetime.now().isoformat(timespec='seconds')
+            self.ports_prets = set()
+            if self.etape == 'pret':
+                self.etape = 'mise_a_jour'
+
+    def prechauffer(self):
+        """
+        Préchauffe tous les processus sur la dernière version publiée (recommence si une version
+        plus récente est publiée entre-temps) ; True si tous sont prêts.
+        Sans version publiée par le lanceur (processus unique), un seul passage.
+        """
+        with self._prechauffage:
+            publication = object()
+            while publication != self.publication:
+                publication = self.publication
+                for port in self.ports:
+                    duree = prechauffer_processus(port, publication, self.dossier)
+                    if duree is None:
+                        print(f"❌ Port {port} : pas prêt après {DELAI_MAX_PRECHAUFFAGE} s")
+                        continue
+                    version = "" if publication is None else f" (version {publication})"
+                    print(f"🔥 Port {port} préchauffé{version} en {duree:.1f} s")
+                    with self._verrou:
+                        if self.publication == publication:
+                            self.ports_prets.add(port)
+            with self._verrou:
+                if self.publication == publication and len(self.ports_prets) == len(self.ports):
+                    self.etape = 'pret'
+            return self.pret()
+
+    def pret(self):
+        return self.etape == 'pret' and len(self.ports_prets) == len(self.ports)
+
+    def resume(self):
+        processus = []
+        for port in self.ports:
+            etat = lire_etat_processus(port, self.dossier) or {}
+            processus.append({'port': port, 'pret': port in self.ports_prets,
+                              'publication': etat.get('publication'), 'lignes': etat.get('lignes'),
+                              'memoire_mo': round(etat['memoire_octets'] / 1024 ** 2, 1)
+                              if etat.get('memoire_octets') else None})
+        memoire = memoire_rss()
+        # Processus unique : version et lignes du jeu de données chargé par le processus lui-même
+        version, lignes = self.publication, self.lignes
+        if version is None and processus:
+            version, lignes = processus[0]['publication'], processus[0]['lignes'] or 0
+        return {
+            'pret': self.pret(),
+            'etape': self.etape,
+            'version': version,
+            'lignes': lignes,
+            'duree_chargement_s': self.duree_chargement,
+            'derniere_maj': self.derniere_maj,
+            'memoire_lanceur_mo': round(memoire / 1024 ** 2, 1) if memoire else None,
+            'processus': processus,
+        }
+
+
+def demarrer_sante(etat, port=PORT_SANTE, hote='localhost'):
+    """
+    Serveur HTTP local (thread) : GET /sante (toujours 200) et /pret (200 si prêt, 503 sinon),
+    corps JSON de EtatLanceur.resume()
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Gestionnaire(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path not in ('/sante', '/pret'):
+                self.send_error(404)
+                return
+            resume = etat.resume()
+            corps = json.dumps(resume, ensure_ascii=False).encode('utf-8')
+            self.send_response(200 if self.path == '/sante' or resume['pret'] else 503)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(corps)))
+            self.end_headers()
+            self.wfile.write(corps)
+
+        def log_message(self, format, *args):
+            pass
+
+    serveur = ThreadingHTTPServer((hote, port), Gestionnaire)
+    threading.Thread(target=serveur.serve_forever, daemon=True, name='sante').start()
+    print(f"🩺 État du service : http://{hote}:{port}/sante (prêt : /pret)")
+    return serveur
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Profil du temps d'import du dashboard (démarrage à froid)
+Objectifs :
+- Mesurer les imports de dashboard_streamlit.py avec python -X importtime
+- Afficher les modules les plus coûteux
+- Échouer (code de sortie 1) si un module lourd est de nouveau importé au démarrage
+  ou si le temps total dépasse le budget
+
+Usage : python profil_import.py [budget_ms]
+"""
+
+import os
+import subprocess
+import sys
+
+# Modules qui ne doivent être chargés qu'à l'affichage de leur section
+MODULES_DIFFERES = ['plotly', 'folium', 'streamlit_folium', 'matplotlib', 'seaborn', 'phonenumbers', 'pyarrow']
+
+# Budget par défaut du temps d'import total (ms)
+BUDGET_MS = 2000
+
+
+# Imports faits par Streamlit et pandas eux-mêmes (hors de notre contrôle)
+IMPORTS_SOCLE = 'import streamlit, pandas'
+
+
+def profiler_imports(code='import dashboard_streamlit'):
+    """
+    Exécute le code dans un processus neuf et retourne {module: (propre_us, cumule_us)}
+    """
+    resultat = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True
+    )
+    if resultat.returncode != 0:
+        raise RuntimeError(f"Échec de « {code} »:\n{resultat.stderr[-2000:]}")
+
+    mesures = {}
+    for ligne in resultat.stderr.splitlines():
+        if not ligne.startswith('import time:') or 'self [us]' in ligne:
+            continue
+        propre, cumule, nom = ligne[len('import time:'):].split('|')
+        mesures[nom.strip()] = (int(propre), int(cumule))
+    return mesures
+
+
+def verifier(mesures, socle, module='dashboard_streamlit', budget_ms=BUDGET_MS):
+    """
+    Retourne la liste des régressions détectées.
+    Un module différé est en faute s'il est importé par le dashboard et pas déjà par le socle.
+    """
+    problemes = []
+    ajoutes = [nom for nom in mesures if nom not in socle and nom.split('.')[0] in MODULES_DIFFERES]
+    for paquet in sorted({nom.split('.')[0] for nom in ajoutes}):
+        exemples = ', '.join(sorted(n for n in ajoutes if n.split('.')[0] == paquet)[:3])
+        problemes.append(f"module lourd importé au démarrage: {paquet} ({exemples})")
+
+    total_ms = mesures.get(module, (0, 0))[1] / 1000
+    if total_ms > budget_ms:
+        problemes.append(f"temps d'import {total_ms:.0f} ms > budget {budget_ms} ms")
+    return problemes
+
+
+if __name__ == "__main__":
+    budget = int(sys.argv[1]) if len(sys.argv) > 1 else BUDGET_MS
+    mesures = profiler_imports()
+    socle = profiler_imports(IMPORTS_SOCLE)
+
+    print(f"⏱️ Import de dashboard_streamlit: {mesures['dashboard_streamlit'][1] / 1000:.0f} ms")
+    print("\n📋 Modules les plus coûteux (cumulé):")
+    # Uniquement les paquets de premier niveau pour un résumé lisible
+    premiers = {nom: cumule for nom, (_, cumule) in mesures.items() if '.' not in nom and nom != 'dashboard_streamlit'}
+    for nom, cumule in sorted(premiers.items(), key=lambda x: -x[1])[:15]:
+        print(f"  {nom:<30} {cumule / 1000:>8.1f} ms")
+
+    problemes = verifier(mesures, socle, budget_ms=budget)
+    if problemes:
+        print("\n❌ Régressions du démarrage à froid:")
+        for probleme in problemes:
+            print(f"  - {probleme}")
+        sys.exit(1)
+    print("\n✅ Aucun module lourd au démarrage, budget respecté")
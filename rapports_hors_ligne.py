@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rapports HTML hors ligne par pays et par type de pack
+Objectifs :
+- Produire un rapport par valeur de pays et de type_pack : indicateurs clés et graphiques de chaque section
+- Réutiliser les agrégations du dashboard (agregations.py) et les figures de graphiques.py
+- Répartir le rendu sur un pool de processus partageant le jeu de données chargé une seule fois
+- Ne pas régénérer les rapports dont les lignes d'entrée et le rendu (code, CSS, plotly.js) n'ont pas changé
+  (empreintes dans manifeste.json)
+
+Utilisation : python rapports_hors_ligne.py [dossier_sortie] [nb_processus]
+"""
+
+import hashlib
+import html
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+from unidecode import unidecode
+
+import graphiques
+from agregations import (agreger_offres, agreger_operateurs, agreger_paiements, agreger_pays, agreger_tranches,
+                         comptes_par_heure, comptes_par_jour_semaine, details_packs, indicateurs_cles,
+                         parts_operateurs_longues)
+from index_temporel import sommes_prefixes
+from jeu_de_donnees import COLONNES_DASHBOARD, JeuDeDonnees, preparer_donnees
+from lecteur_excel import lire_excel
+from reduction_series import LARGEUR_PAGE_PX, reduire, reduire_tableau
+
+FICHIER_DONNEES = "Formulaire_FINAL_OPTIMISE.xlsx"
+DOSSIER_RAPPORTS = "rapports"
+FICHIER_MANIFESTE = "manifeste.json"
+FICHIER_CSS = "styles.css"
+
+# Un rapport par valeur de chacune de ces colonnes
+CRITERES = {'pays': "Pays", 'type_pack': "Pack"}
+
+# À incrémenter quand la mise en page change sans que le code des graphiques change
+VERSION_RAPPORT = 1
+
+# Modules dont le code entre dans l'empreinte : une modification régénère tous les rapports
+MODULES_RENDU = ['graphiques.py', 'agregations.py', 'rapports_hors_ligne.py']
+
+# Jeu de données et CSS des processus de rendu (hérités au fork, transmis une fois par processus sinon)
+_donnees = None
+_css = ""
+
+
+def charger_donnees(chemin=FICHIER_DONNEES):
+    """
+    Même préparation que le dashboard : colonnes utiles, validation du schéma, doublons retirés
+    """
+    df = preparer_donnees(lire_excel(chemin, colonnes=COLONNES_DASHBOARD))
+    return JeuDeDonnees(df).instantane().df
+
+
+def nom_fichier(critere, valeur, deja_pris=None):
+    """
+    Nom de fichier stable d'un rapport (ex. pays_cote_d_ivoire.html)
+    """
+    base = f"{critere}_{re.sub(r'[^a-z0-9]+', '_', unidecode(str(valeur)).lower()).strip('_') or 'inconnu'}"
+    nom, suffixe = f"{base}.html", 2
+    while deja_pris is not None and nom in deja_pris:
+        nom, suffixe = f"{base}_{suffixe}.html", suffixe + 1
+    return nom
+
+
+def _empreinte_code(css="", version_plotly=""):
+    """
+    Empreinte du rendu : code des modules, CSS intégré à chaque page et version de plotly.js
+    """
+    empreinte = hashlib.sha256(str(VERSION_RAPPORT).encode())
+    dossier = os.path.dirname(os.path.abspath(__file__))
+    for module in MODULES_RENDU:
+        with open(os.path.join(dossier, module), 'rb') as f:
+            empreinte.update(f.read())
+    empreinte.update(css.encode('utf-8'))
+    empreinte.update(version_plotly.encode('utf-8'))
+    return empreinte.digest()
+
+
+def lire_css(chemin=FICHIER_CSS):
+    """
+    Feuille de style intégrée aux rapports (vide si absente)
+    """
+    if not os.path.exists(chemin):
+        return ""
+    with open(chemin, encoding='utf-8') as f:
+        return f.read()
+
+
+def lister_rapports(df, criteres=CRITERES, css="", version_plotly=""):
+    """
+    (critere, valeur, positions des lignes, empreinte) de chaque rapport.
+    L'empreinte couvre les lignes du rapport et le rendu (code, CSS, version de plotly.js) ;
+    les lignes ne sont hachées qu'une fois pour tous les rapports.
+    """
+    hachages = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    code = _empreinte_code(css, version_plotly)
+    for critere in criteres:
+        if critere not in df.columns:
+            continue
+        for valeur, positions in df.groupby(critere).indices.items():
+            empreinte = hashlib.sha256(code)
+            empreinte.update(hachages[positions].tobytes())
+            yield critere, valeur, positions, empreinte.hexdigest()
+
+
+def _initialiser(df, css):
+    global _donnees, _css
+    _donnees = df
+    _css = css
+
+
+def _fragment(fig):
+    return fig.to_html(full_html=False, include_plotlyjs=False, config={'displaylogo': False})
+
+
+def _carte(libelle, valeur):
+    return (f'<div class="metric-card"><div class="metric-label">{libelle}</div>'
+            f'<div class="metric-value">{html.escape(str(valeur))}</div></div>')
+
+
+def sections_rapport(df, critere):
+    """
+    Sections du rapport : liste de (titre, [fragments HTML]).
+    La répartition selon le critère du rapport lui-même est omise (une seule valeur).
+    """
+    sections = []
+
+    if critere != 'type_pack' and 'type_pack' in df.columns:
+        pack_counts, prix_moyen_pack = agreger_offres(df)
+        if len(pack_counts) > 0:
+            fragments = [_fragment(graphiques.figure_repartition_packs(pack_counts))]
+            if prix_moyen_pack is not None:
+                fragments.append(_fragment(graphiques.figure_prix_moyen_pack(prix_moyen_pack)))
+                fragments.append(details_packs(df, pack_counts, prix_moyen_pack).to_html(classes='tableau'))
+            sections.append(("🎯 Répartition des Offres Choisies", fragments))
+
+    if critere != 'pays' and 'pays' in df.columns:
+        pays_counts, marges = agreger_pays(df)
+        if len(pays_counts) > 0:
+            sections.append(("🌍 Répartition Géographique",
+                             [_fragment(graphiques.figure_top_pays(pays_counts, marges))]))
+
+    if 'methode_paiement_std' in df.columns:
+        paiement_counts, marges = agreger_paiements(df)
+        if len(paiement_counts) > 0:
+            sections.append(("💳 Modes de Paiement Choisis", [
+                _fragment(graphiques.figure_donut_paiements(paiement_counts)),
+                _fragment(graphiques.figure_barres_paiements(paiement_counts, marges)),
+            ]))
+
+    comptes, parts = agreger_operateurs(df)
+    if comptes is not None:
+        sections.append(("📞 Opérateurs Téléphoniques par Pays",
+                         [_fragment(graphiques.figure_parts_operateurs(parts_operateurs_longues(parts)))]))
+
+    if 'horodateur' in df.columns and df['horodateur'].notna().any():
+        sommes = sommes_prefixes(df)
+        par_jour = reduire(sommes.serie(), LARGEUR_PAGE_PX)
+        tendances = pd.DataFrame({
+            'date': sommes.seaux,
+            'valeur': sommes.serie().values,
+            'mm_7': sommes.moyenne_mobile(7).values,
+            'mm_30': sommes.moyenne_mobile(30).values,
+        })
+        sections.append(("📈 Évolution Temporelle des Inscriptions", [
+            _fragment(graphiques.figure_inscriptions_jour(par_jour.rename('count').rename_axis('date').reset_index())),
+            _fragment(graphiques.figure_inscriptions_heure(comptes_par_heure(df))),
+            _fragment(graphiques.figure_jours_semaine(comptes_par_jour_semaine(df))),
+            _fragment(graphiques.figure_moyennes_mobiles(reduire_tableau(tendances, 'valeur', LARGEUR_PAGE_PX),
+                                                         "Inscriptions")),
+        ]))
+
+    if 'age' in df.columns and df['age'].notna().any():
+        fragments = [_fragment(graphiques.figure_distribution_ages(df['age'].dropna()))]
+        if 'tranche_age' in df.columns and df['tranche_age'].notna().any():
+            fragments.append(_fragment(graphiques.figure_tranches_age(*agreger_tranches(df))))
+        sections.append(("🎂 Statistiques d'Âge", fragments))
+
+    return sections
+
+
+def page_rapport(df, critere, valeur, css=""):
+    """
+    Page HTML complète d'un rapport (plotly.min.js est partagé dans le dossier des rapports)
+    """
+    indicateurs = indicateurs_cles(df)
+    age_moyen = f"{indicateurs['age_moyen']:.1f} ans" if indicateurs['age_moyen'] is not None else "N/A"
+    cartes = ''.join([
+        _carte("📊 Total Réponses", indicateurs['total']),
+        _carte("🌍 Pays Représentés", indicateurs['nb_pays'] if indicateurs['nb_pays'] is not None else "N/A"),
+        _carte("🎂 Âge Moyen", age_moyen),
+        _carte("📦 Pack Populaire", indicateurs['pack_populaire'] or "N/A"),
+    ])
+    corps = ''.join(
+        f'<h2 class="section-title">{titre}</h2>' + ''.join(f'<div class="bloc">{f}</div>' for f in fragments)
+        for titre, fragments in sections_rapport(df, critere)
+    )
+    titre = f"{CRITERES[critere]} : {html.escape(str(valeur))}"
+    return f"""<!DOCTYPE html>
+<html lang="fr">
+<head>
+<meta charset="utf-8">
+<title>Rapport - {titre}</title>
+<script src="plotly.min.js"></script>
+<style>{css}
+body {{ font-family: sans-serif; max-width: 1400px; margin: auto; padding: 1rem; }}
+.cartes {{ display: grid; grid-template-columns: repeat(4, 1fr); gap: 1rem; }}
+.tableau {{ border-collapse: collapse; margin: 1rem 0; }}
+.tableau td, .tableau th {{ border: 1px solid #ddd; padding: 0.4rem 0.8rem; text-align: right; }}
+</style>
+</head>
+<body>
+<h1 class="main-header">📊 Rapport - {titre}</h1>
+<p>Généré le {pd.Timestamp.now():%d/%m/%Y %H:%M}</p>
+<div class="cartes">{cartes}</div>
+{corps}
+</body>
+</html>
+"""
+
+
+def rendre_rapport(critere, valeur, positions, chemin):
+    """
+    Tâche d'un processus de rendu : écrit le rapport (fichier temporaire puis renommage)
+    """
+    debut = time.perf_counter()
+    contenu = page_rapport(_donnees.iloc[positions], critere, valeur, _css)
+    temporaire = f"{chemin}.tmp"
+    with open(temporaire, 'w', encoding='utf-8') as f:
+        f.write(contenu)
+    os.replace(temporaire, chemin)
+    return time.perf_counter() - debut
+
+
+def _ecrire_json(donnees, chemin):
+    temporaire = f"{chemin}.tmp"
+    with open(temporaire, 'w', encoding='utf-8') as f:
+        json.dump(donnees, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(temporaire, chemin)
+
+
+def ecrire_sommaire(rapports, dossier):
+    """
+    index.html : liens vers tous les rapports, groupés par critère
+    """
+    listes = ''.join(
+        f"<h2>{CRITERES[critere]}</h2><ul>" + ''.join(
+            f'<li><a href="{nom}">{html.escape(str(valeur))}</a></li>'
+            for c, valeur, nom in rapports if c == critere) + "</ul>"
+        for critere in CRITERES
+    )
+    with open(os.path.join(dossier, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write(f'<!DOCTYPE html><html lang="fr"><head><meta charset="utf-8"><title>Rapports</title></head>'
+                f'<body><h1>📊 Rapports par pays et par pack</h1>{listes}</body></html>')
+
+
+def generer_rapports(chemin_donnees=FICHIER_DONNEES, dossier=DOSSIER_RAPPORTS, processus=None):
+    """
+    Génère les rapports modifiés depuis la dernière exécution et retourne
+    le nombre de rapports générés, inchangés et en échec
+    """
+    print(f"📥 Chargement de {chemin_donnees}...")
+    df = charger_donnees(chemin_donnees)
+    os.makedirs(dossier, exist_ok=True)
+
+    # plotly.min.js est réécrit quand la version de plotly.js change (les rapports aussi, via l'empreinte)
+    from plotly.offline import get_plotlyjs, get_plotlyjs_version
+    version_plotly = get_plotlyjs_version()
+    chemin_plotly = os.path.join(dossier, 'plotly.min.js')
+    entete = ""
+    if os.path.exists(chemin_plotly):
+        with open(chemin_plotly, encoding='utf-8') as f:
+            entete = f.read(200)
+    if f"plotly.js v{version_plotly}" not in entete:
+        with open(chemin_plotly, 'w', encoding='utf-8') as f:
+            f.write(get_plotlyjs())
+    css = lire_css()
+
+    chemin_manifeste = os.path.join(dossier, FICHIER_MANIFESTE)
+    manifeste = {}
+    if os.path.exists(chemin_manifeste):
+        with open(chemin_manifeste, encoding='utf-8') as f:
+            manifeste = json.load(f)
+
+    rapports, taches, noms = [], [], set()
+    for critere, valeur, positions, empreinte in lister_rapports(df, css=css, version_plotly=version_plotly):
+        nom = nom_fichier(critere, valeur, noms)
+        noms.add(nom)
+        rapports.append((critere, valeur, nom))
+        if manifeste.get(nom) != empreinte or not os.path.exists(os.path.join(dossier, nom)):
+            taches.append((critere, valeur, positions, nom, empreinte))
+    inchanges = len(rapports) - len(taches)
+    print(f"📊 {len(rapports)} rapports : {len(taches)} à générer, {inchanges} inchangés")
+
+    echecs = 0
+    debut = time.perf_counter()
+    if taches:
+        with ProcessPoolExecutor(max_workers=processus, initializer=_initialiser, initargs=(df, css)) as pool:
+            futures = {pool.submit(rendre_rapport, critere, valeur, positions, os.path.join(dossier, nom)): (nom, empreinte)
+                       for critere, valeur, positions, nom, empreinte in taches}
+            for future in as_completed(futures):
+                nom, empreinte = futures[future]
+                try:
+                    future.result()
+                    manifeste[nom] = empreinte
+                except Exception as e:
+                    echecs += 1
+                    print(f"❌ {nom} : {e}")
+        _ecrire_json(manifeste, chemin_manifeste)
+
+    ecrire_sommaire(rapports, dossier)
+    print(f"✅ {len(taches) - echecs} rapports générés en {time.perf_counter() - debut:.1f} s dans {dossier}/")
+    return {'generes': len(taches) - echecs, 'inchanges': inchanges, 'echecs': echecs}
+
+
+if __name__ == "__main__":
+    dossier = sys.argv[1] if len(sys.argv) > 1 else DOSSIER_RAPPORTS
+    processus = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    generer_rapports(dossier=dossier, processus=processus)
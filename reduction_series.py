@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Réduction des séries temporelles avant affichage
+Objectifs :
+- Limiter le nombre de points envoyés au navigateur à la largeur du graphique
+- Préserver la forme de la courbe : LTTB (Largest-Triangle-Three-Buckets) pour les lignes,
+  minimum/maximum par seau pour les barres (les pics restent visibles)
+"""
+
+import numpy as np
+import pandas as pd
+
+# Largeur d'un graphique en demi-page et en pleine page (pixels). Valeurs fixes : Streamlit
+# ne transmet pas au script la largeur réelle des colonnes, c'est celle d'un écran large de 1400 px ;
+# sur un écran plus étroit, la série garde simplement un peu plus de points que de pixels.
+LARGEUR_COLONNE_PX = 700
+LARGEUR_PAGE_PX = 1400
+
+# Points gardés par pixel de largeur
+POINTS_PAR_PIXEL = 1
+
+# Rendu WebGL (Scattergl) plutôt que SVG pour les traces plus longues que le budget d'un graphique
+# en demi-page : les courbes du dashboard, réduites à ce budget, restent en SVG ; les graphiques
+# pleine page des rapports hors ligne (jusqu'à LARGEUR_PAGE_PX points) passent en WebGL.
+SEUIL_WEBGL = LARGEUR_COLONNE_PX * POINTS_PAR_PIXEL
+
+
+def _abscisses(index):
+    if isinstance(index, pd.DatetimeIndex):
+        return index.asi8.astype(float)
+    return np.asarray(index, dtype=float)
+
+
+def lttb(x, y, n):
+    """
+    Indices des n points retenus par l'algorithme LTTB : dans chaque seau, le point qui forme
+    le plus grand triangle avec le point retenu précédent et la moyenne du seau suivant
+    """
+    total = len(y)
+    if n >= total or n < 3:
+        return np.arange(total)
+    bornes = np.linspace(1, total - 1, n - 1).astype(int)
+    indices = np.empty(n, dtype=int)
+    indices[0], indices[-1] = 0, total - 1
+    a = 0
+    for i in range(n - 2):
+        debut, fin = bornes[i], bornes[i + 1]
+        if i == n - 3:
+            moy_x, moy_y = x[total - 1], y[total - 1]
+        else:
+            suivant = slice(bornes[i + 1], bornes[i + 2])
+            moy_x, moy_y = x[suivant].mean(), y[suivant].mean()
+        aires = np.abs((x[a] - moy_x) * (y[debut:fin] - y[a]) - (x[a] - x[debut:fin]) * (moy_y - y[a]))
+        a = debut + int(np.argmax(aires))
+        indices[i + 1] = a
+    return indices
+
+
+def min_max(y, n):
+    """
+    Indices du minimum et du maximum de chaque seau (n points au plus, dans l'ordre)
+    """
+    total = len(y)
+    if n >= total or n < 2:
+        return np.arange(total)
+    bornes = np.linspace(0, total, n // 2 + 1).astype(int)
+    indices = []
+    for debut, fin in zip(bornes[:-1], bornes[1:]):
+        if fin > debut:
+            seau = y[debut:fin]
+            indices.extend(sorted({debut + int(np.argmin(seau)), debut + int(np.argmax(seau))}))
+    return np.asarray(indices, dtype=int)
+
+
+def nombre_points(largeur_px=LARGEUR_COLONNE_PX):
+    return int(largeur_px * POINTS_PAR_PIXEL)
+
+
+def reduire(serie, largeur_px=LARGEUR_COLONNE_PX, methode='lttb'):
+    """
+    Série réduite à la largeur du graphique ('lttb' pour les courbes, 'min_max' pour les barres)
+    """
+    n = nombre_points(largeur_px)
+    if len(serie) <= n:
+        return serie
+    y = serie.to_numpy(dtype=float)
+    indices = lttb(_abscisses(serie.index), y, n) if methode == 'lttb' else min_max(y, n)
+    return serie.iloc[indices]
+
+
+def reduire_tableau(df, colonne, largeur_px=LARGEUR_COLONNE_PX, methode='min_max'):
+    """
+    Lignes d'un DataFrame retenues d'après la forme de l'une de ses colonnes
+    """
+    n = nombre_points(largeur_px)
+    if len(df) <= n:
+        return df
+    y = df[colonne].to_numpy(dtype=float)
+    indices = min_max(y, n) if methode == 'min_max' else lttb(np.arange(len(df), dtype=float), y, n)
+    return df.iloc[indices]
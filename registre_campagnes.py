@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Registre des campagnes (formulaires) et cache de leurs jeux de données
+Objectifs :
+- Enregistrer plusieurs fichiers nettoyés sous un nom de campagne (campagnes.json), en plus du
+  fichier principal du dashboard
+- Charger le jeu de données d'une campagne (instantané, index dérivés) à la première demande,
+  puis le garder en mémoire tant que le budget le permet : les jeux les moins récemment utilisés
+  sont libérés (surveillance arrêtée) quand leur taille cumulée dépasse le budget
+- Garder un résumé de chaque campagne (indicateurs, parts des packs, courbe des inscriptions),
+  quelques kilo-octets qui restent disponibles pour la comparaison une fois le jeu libéré
+- Ne pas dépendre de Streamlit
+"""
+
+import itertools
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+from unidecode import unidecode
+
+from taille_memoire import octets
+
+FICHIER_CAMPAGNES = "campagnes.json"
+CAMPAGNE_PRINCIPALE = "Campagne principale"
+
+# Mémoire (en octets) des jeux de données chargés au-delà de laquelle les moins récents sont libérés
+BUDGET_MEMOIRE_CAMPAGNES = 1024 ** 3
+
+
+def lire_registre(fichier_principal, chemin=FICHIER_CAMPAGNES):
+    """
+    Campagnes enregistrées (nom -> fichier nettoyé) : la campagne principale (fichier du dashboard)
+    d'abord, puis celles de campagnes.json, de la forme {"Campagne 2024": "Formulaire_2024.xlsx", ...}
+    """
+    campagnes = {CAMPAGNE_PRINCIPALE: fichier_principal}
+    try:
+        with open(chemin, encoding='utf-8') as fichier:
+            enregistrees = json.load(fichier)
+    except FileNotFoundError:
+        return campagnes
+    except ValueError as e:
+        print(f"⚠️ {chemin} illisible, seule la campagne principale est disponible : {e}")
+        return campagnes
+    for nom, fichier_campagne in enregistrees.items():
+        if fichier_campagne != fichier_principal:
+            campagnes.setdefault(str(nom), fichier_campagne)
+    return campagnes
+
+
+def suffixe_campagne(nom):
+    """
+    Nom de campagne utilisable dans un nom de fichier (audits et quarantaine propres à la campagne)
+    """
+    return re.sub(r'[^a-z0-9]+', '_', unidecode(nom).lower()).strip('_') or 'campagne'
+
+
+def taille_jeu(jeu):
+    """
+    Estimation de la mémoire d'un jeu de données : dernière version publiée (lignes et résultats
+    des index dérivés), état des index dérivés (memoire()) et empreintes de l'export de référence
+    """
+    instantane = jeu.instantane()
+    taille = int(instantane.df.memory_usage(deep=True).sum())
+    # Un tableau partagé entre l'état d'un index et son résultat publié n'est compté qu'une fois
+    vus = set()
+    for index in jeu.index_derives.values():
+        if hasattr(index, 'memoire'):
+            taille += index.memoire(vus)
+    taille += octets(instantane.index, vus=vus)
+    export = getattr(jeu, 'export_precedent', None)
+    if export is not None:
+        taille += export.cellules.nbytes + export.cles.nbytes + int(export.lignes.memory_usage(deep=True).sum())
+    return taille
+
+
+def resume_campagne(df):
+    """
+    Résumé d'une campagne pour la comparaison : indicateurs, parts des packs et inscriptions
+    cumulées par jour depuis la première réponse (types Python et petites séries)
+    """
+    dates = df['horodateur'].dropna() if 'horodateur' in df.columns else pd.Series(dtype='datetime64[ns]')
+    prix = df['prix_pack_fcfa'].dropna() if 'prix_pack_fcfa' in df.columns else pd.Series(dtype=float)
+    debut = dates.min() if len(dates) else None
+    courbe = pd.Series(dtype='int64')
+    if debut is not None:
+        jours = (dates - debut.normalize()).dt.days
+        courbe = jours.value_counts().sort_index().cumsum()
+    parts_packs = pd.Series(dtype=float)
+    if 'type_pack' in df.columns and len(df) > 0:
+        parts_packs = df['type_pack'].value_counts(normalize=True)
+    return {
+        'inscriptions': len(df),
+        'revenu': float(prix.sum()),
+        'prix_moyen': float(prix.mean()) if len(prix) else None,
+        'nb_pays': int(df['pays'].nunique()) if 'pays' in df.columns else None,
+        'debut': debut,
+        'fin': dates.max() if len(dates) else None,
+        'parts_packs': parts_packs,
+        'courbe': courbe,
+    }
+
+
+class CacheCampagnes:
+    """
+    Chargements des campagnes, partagés par toutes les sessions du processus.
+    charger(campagne, politique) lance le chargement en arrière-plan (ChargementArrierePlan) ;
+    à sa fin, le résumé est calculé et le budget vérifié avec la taille du nouveau jeu.
+    Le jeu de la campagne principale (surveillance des exports, alertes) n'est jamais libéré.
+    """
+
+    def __init__(self, campagnes, charger, budget=BUDGET_MEMOIRE_CAMPAGNES):
+        self.campagnes = campagnes
+        self.charger = charger
+        self.budget = budget
+        self.liberations = 0
+        self._chargements = OrderedDict()
+        # (campagne, politique) -> numéro du chargement en mémoire (chaque jeu rechargé repart
+        # de la version 1), (version, taille) et (numéro, version, état du fichier, résumé)
+        self._numeros = {}
+        self._compteur = itertools.count(1)
+        self._tailles = {}
+        self._resumes = {}
+        self._verrou = threading.RLock()
+
+    def obtenir(self, campagne, politique_doublons='derniere', recent=True):
+        """
+        Chargement de la campagne (lancé à la première demande). recent=False le place en tête
+        des prochains libérés (campagne chargée pour la seule comparaison).
+        """
+        cle = (campagne, politique_doublons)
+        with self._verrou:
+            chargement = self._chargements.get(cle)
+            if chargement is None:
+                chargement = self.charger(campagne, politique_doublons)
+                self._chargements[cle] = chargement
+                self._numeros[cle] = next(self._compteur)
+                chargement.apres(lambda: self._fin_chargement(cle, chargement))
+            elif recent:
+                self._chargements.move_to_end(cle)
+            if not recent:
+                self._chargements.move_to_end(cle, last=False)
+            self._liberer_exces(garder=cle)
+            return chargement
+
+    def _fin_chargement(self, cle, chargement):
+        """
+        Chargement terminé (thread de chargement) : résumé gardé pour la comparaison,
+        puis jeux en trop libérés maintenant que la taille du nouveau jeu est connue
+        """
+        with self._verrou:
+            if self._chargements.get(cle) is not chargement or self._jeu(chargement) is None:
+                return
+            self._resumer(cle, chargement)
+            self._liberer_exces(garder=self._plus_recent())
+
+    def _plus_recent(self):
+        """
+        Campagne la plus récemment demandée (celle affichée), gardée même au-delà du budget
+        """
+        return next(reversed(self._chargements), None)
+
+    @staticmethod
+    def _jeu(chargement):
+        """
+        Jeu de données d'un chargement terminé avec succès (None sinon)
+        """
+        if not chargement.termine():
+            return None
+        try:
+            return chargement.resultat()
+        except Exception:
+            return None
+
+    def _taille(self, cle, jeu):
+        version = jeu.instantane().version
+        connue = self._tailles.get(cle)
+        if connue is None or connue[0] != version:
+            connue = self._tailles[cle] = (version, taille_jeu(jeu))
+        return connue[1]
+
+    def _liberer_exces(self, garder):
+        """
+        Libère les jeux les moins récemment utilisés tant que le budget est dépassé
+        (chargements en cours, campagne principale et campagne demandée gardés)
+        """
+        jeux = {cle: self._jeu(chargement) for cle, chargement in self._chargements.items()}
+        tailles = {cle: self._taille(cle, jeu) for cle, jeu in jeux.items() if jeu is not None}
+        total = sum(tailles.values())
+        for cle in list(self._chargements):
+            if total <= self.budget:
+                break
+            if cle == garder or cle[0] == CAMPAGNE_PRINCIPALE or cle not in tailles:
+                continue
+            total -= tailles[cle]
+            self._retirer(cle, jeux[cle])
+            self.liberations += 1
+            print(f"♻️ Campagne « {cle[0]} » libérée ({tailles[cle] / 1024 ** 2:.1f} Mo, "
+                  f"budget {self.budget / 1024 ** 2:.0f} Mo)")
+
+    def _retirer(self, cle, jeu):
+        del self._chargements[cle]
+        self._numeros.pop(cle, None)
+        self._tailles.pop(cle, None)
+        surveillant = getattr(jeu, 'surveillant', None)
+        if surveillant is not None:
+            surveillant.arreter()
+
+    def oublier(self, campagne, politique_doublons='derniere'):
+        """
+        Oublie un chargement (en échec ou à recharger) : il sera relancé à la prochaine demande
+        """
+        cle = (campagne, politique_doublons)
+        with self._verrou:
+            chargement = self._chargements.get(cle)
+            if chargement is not None:
+                self._retirer(cle, self._jeu(chargement))
+            self._resumes.pop(cle, None)
+
+    def vider(self):
+        with self._verrou:
+            for cle, chargement in list(self._chargements.items()):
+                self._retirer(cle, self._jeu(chargement))
+            self._resumes.clear()
+
+    def _etat_fichier(self, campagne):
+        try:
+            infos = os.stat(self.campagnes[campagne])
+            return infos.st_mtime_ns, infos.st_size
+        except OSError:
+            return None
+
+    def _resumer(self, cle, chargement):
+        """
+        Résumé du jeu chargé, calculé une fois par chargement et par version
+        """
+        numero = self._numeros[cle]
+        instantane = chargement.resultat().instantane()
+        connu = self._resumes.get(cle)
+        if connu is not None and connu[:2] == (numero, instantane.version):
+            return connu[3]
+        resume = resume_campagne(instantane.df)
+        self._resumes[cle] = (numero, instantane.version, self._etat_fichier(cle[0]), resume)
+        return resume
+
+    def resume(self, campagne, politique_doublons='derniere'):
+        """
+        Résumé de la campagne : calculé une fois par version du jeu chargé ; une campagne libérée
+        garde son dernier résumé tant que son fichier n'a pas changé. None pendant le chargement
+        (lancé si nécessaire) ; relève l'exception d'un chargement en échec.
+        """
+        cle = (campagne, politique_doublons)
+        with self._verrou:
+            chargement = self._chargements.get(cle)
+            if chargement is None:
+                connu = self._resumes.get(cle)
+                if connu is not None and connu[2] == self._etat_fichier(campagne):
+                    return connu[3]
+                chargement = self.obtenir(campagne, politique_doublons, recent=False)
+            if not chargement.termine():
+                return None
+            chargement.resultat()
+            return self._resumer(cle, chargement)
+
+    def etat(self):
+        """
+        Campagnes en mémoire, de la plus récemment utilisée à la moins récente :
+        liste de (campagne, politique, taille en octets ou None pendant le chargement)
+        """
+        with self._verrou:
+            etat = []
+            for cle, chargement in reversed(self._chargements.items()):
+                jeu = self._jeu(chargement)
+                etat.append((*cle, None if jeu is None else self._taille(cle, jeu)))
+            return etat
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Répartiteur de charge local du mode multi-processus
+Objectifs :
+- Recevoir les connexions du navigateur sur le port public et les transmettre aux processus Streamlit
+- Attribuer chaque nouveau navigateur au processus suivant (tourniquet), puis toujours au même
+  grâce à un cookie : l'état de session Streamlit ne vit que dans un processus
+- Relayer les octets sans les interpréter après le premier en-tête (HTTP comme WebSocket)
+"""
+
+import asyncio
+import itertools
+import re
+
+COOKIE_PROCESSUS = "dashboard_processus"
+TAILLE_BLOC = 64 * 1024
+
+REPONSE_INDISPONIBLE = b"HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+
+
+class Repartiteur:
+    """
+    Proxy TCP à sessions persistantes vers les ports des processus Streamlit
+    """
+
+    def __init__(self, ports, hote='localhost'):
+        self.ports = list(ports)
+        self.hote = hote
+        self._tourniquet = itertools.cycle(range(len(self.ports)))
+        self._motif_cookie = re.compile(rf"^cookie:.*\b{COOKIE_PROCESSUS}=(\d+)", re.IGNORECASE | re.MULTILINE)
+
+    def choisir(self, entete):
+        """
+        (numéro du processus, nouveau navigateur ?) d'après le cookie de la requête
+        """
+        trouve = self._motif_cookie.search(entete)
+        if trouve and int(trouve.group(1)) < len(self.ports):
+            return int(trouve.group(1)), False
+        return next(self._tourniquet), True
+
+    @staticmethod
+    async def _relayer(lecteur, ecrivain):
+        try:
+            while True:
+                donnees = await lecteur.read(TAILLE_BLOC)
+                if not donnees:
+                    break
+                ecrivain.write(donnees)
+                await ecrivain.drain()
+        except ConnectionError:
+            pass
+        finally:
+            ecrivain.close()
+
+    async def _connexion(self, lecteur_client, ecrivain_client):
+        try:
+            entete = await lecteur_client.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            ecrivain_client.close()
+            return
+
+        numero, nouveau = self.choisir(entete.decode('latin-1'))
+        try:
+            lecteur_serveur, ecrivain_serveur = await asyncio.open_connection(self.hote, self.ports[numero])
+            ecrivain_serveur.write(entete)
+            if nouveau:
+                # Le cookie est ajouté à la première réponse, le reste de la connexion est relayé tel quel
+                reponse = await lecteur_serveur.readuntil(b'\r\n\r\n')
+                cookie = f"Set-Cookie: {COOKIE_PROCESSUS}={numero}; Path=/; HttpOnly; SameSite=Lax\r\n\r\n"
+                ecrivain_client.write(reponse[:-2] + cookie.encode('latin-1'))
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            ecrivain_client.write(REPONSE_INDISPONIBLE)
+            ecrivain_client.close()
+            return
+
+        await asyncio.gather(self._relayer(lecteur_client, ecrivain_serveur),
+                             self._relayer(lecteur_serveur, ecrivain_client))
+
+    async def servir(self, port):
+        serveur = await asyncio.start_server(self._connexion, self.hote, port)
+        async with serveur:
+            await serveur.serve_forever()
+
+
+def lancer_repartiteur(ports, port_public, hote='localhost'):
+    """
+    Sert le port public jusqu'à l'interruption (Ctrl+C)
+    """
+    print(f"🔀 Répartiteur sur http://{hote}:{port_public} → ports {', '.join(map(str, ports))}")
+    asyncio.run(Repartiteur(ports, hote).servir(port_public))
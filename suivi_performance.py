@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Suivi des performances du dashboard
+Objectifs :
+- Mesurer le temps de chaque section d'un rerun (chargement, filtres, graphiques, carte, exports)
+- Compter les succès/échecs des caches (données et figures)
+- Relever la mémoire du processus (RSS)
+- Noter la taille envoyée au navigateur pour chaque graphique (octets JSON, points)
+- Écrire les mesures dans un journal JSON à rotation, agrégeable entre sessions
+  (python suivi_performance.py affiche les latences p50/p95 par section)
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+try:
+    import psutil
+    PSUTIL_DISPONIBLE = True
+except ImportError:
+    PSUTIL_DISPONIBLE = False
+
+FICHIER_TRACES = "traces_performance.jsonl"
+TAILLE_MAX_TRACES = 5 * 1024 * 1024
+NB_ARCHIVES_TRACES = 5
+
+# Exécutions réelles des fonctions en cache, par thread (un thread par rerun Streamlit)
+_local = threading.local()
+
+
+def noter_execution(nom):
+    """
+    À appeler dans le corps d'une fonction en cache : le corps ne s'exécute qu'en cas d'échec du cache
+    """
+    if not hasattr(_local, 'executions'):
+        _local.executions = Counter()
+    _local.executions[nom] += 1
+
+
+def _executions(nom):
+    return getattr(_local, 'executions', Counter())[nom]
+
+
+def memoire_rss():
+    """
+    Mémoire résidente du processus en octets (None si indisponible)
+    """
+    if PSUTIL_DISPONIBLE:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/status') as f:
+            for ligne in f:
+                if ligne.startswith('VmRSS:'):
+                    return int(ligne.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        # Pic de mémoire (Ko sous Linux, octets sous macOS)
+        pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pic if sys.platform == 'darwin' else pic * 1024
+    except ImportError:
+        return None
+
+
+def _journal_traces(chemin=FICHIER_TRACES):
+    journal = logging.getLogger('dashboard.traces')
+    if not journal.handlers:
+        gestionnaire = RotatingFileHandler(chemin, maxBytes=TAILLE_MAX_TRACES,
+                                           backupCount=NB_ARCHIVES_TRACES, encoding='utf-8')
+        gestionnaire.setFormatter(logging.Formatter('%(message)s'))
+        journal.addHandler(gestionnaire)
+        journal.setLevel(logging.INFO)
+        journal.propagate = False
+    return journal
+
+
+class SuiviExecution:
+    """
+    Mesures d'un rerun : une étape par section, plus les compteurs de cache
+    """
+
+    def __init__(self, session=None):
+        self.session = session or uuid.uuid4().hex[:12]
+        self.rerun = uuid.uuid4().hex[:12]
+        self.debut = time.perf_counter()
+        self.etapes = []
+        self.caches = {}
+        self.graphiques = {}
+
+    @contextmanager
+    def mesurer(self, section, lignes=None):
+        """
+        Mesure le temps passé dans le bloc ; etape['lignes'] peut être renseigné dans le bloc
+        """
+        etape = {'section': section, 'lignes': lignes}
+        debut = time.perf_counter()
+        try:
+            yield etape
+        finally:
+            etape['duree_ms'] = round((time.perf_counter() - debut) * 1000, 2)
+            self.etapes.append(etape)
+
+    def appel_cache(self, nom, fonction, *args, **kwargs):
+        """
+        Appelle une fonction en cache et compte un succès ou un échec selon
+        que son corps (qui appelle noter_execution(nom)) a été exécuté
+        """
+        avant = _executions(nom)
+        resultat = fonction(*args, **kwargs)
+        compteur = self.caches.setdefault(nom, {'succes': 0, 'echecs': 0})
+        compteur['echecs' if _executions(nom) > avant else 'succes'] += 1
+        return resultat
+
+    def noter_graphique(self, nom, octets, points):
+        """
+        Taille du graphique envoyé au navigateur (JSON Plotly) et nombre de points tracés
+        """
+        self.graphiques[nom] = {'octets': octets, 'points': points}
+
+    def duree_totale_ms(self):
+        return round((time.perf_counter() - self.debut) * 1000, 2)
+
+    def terminer(self, chemin_traces=FICHIER_TRACES):
+        """
+        Clôt le rerun et écrit une ligne JSON par section dans le journal de traces
+        """
+        self.rss = memoire_rss()
+        self.total_ms = self.duree_totale_ms()
+        horodatage = datetime.now().isoformat(timespec='milliseconds')
+        journal = _journal_traces(chemin_traces)
+
+        commun = {'horodatage': horodatage, 'session': self.session, 'rerun': self.rerun}
+        for etape in self.etapes:
+            journal.info(json.dumps({**commun, **etape}, ensure_ascii=False))
+        journal.info(json.dumps({**commun, 'section': 'total', 'duree_ms': self.total_ms,
+                                 'rss_octets': self.rss, 'caches': self.caches,
+                                 'graphiques': self.graphiques}, ensure_ascii=False))
+
+
+def agreger_traces(chemin=FICHIER_TRACES):
+    """
+    Latences par section sur toutes les sessions (journal courant et archives)
+    """
+    import pandas as pd
+
+    fichiers = [chemin] + [f"{chemin}.{i}" for i in range(1, NB_ARCHIVES_TRACES + 1)]
+    traces = [pd.read_json(f, lines=True) for f in fichiers if os.path.exists(f) and os.path.getsize(f) > 0]
+    if not traces:
+        return pd.DataFrame()
+    traces = pd.concat(traces, ignore_index=True)
+    return traces.groupby('section')['duree_ms'].describe(percentiles=[0.5, 0.95]).sort_values('95%', ascending=False)
+
+
+if __name__ == "__main__":
+    chemin = sys.argv[1] if len(sys.argv) > 1 else FICHIER_TRACES
+    resume = agreger_traces(chemin)
+    if resume.empty:
+        print(f"❌ Aucune trace trouvée dans {chemin}")
+    else:
+        print(f"📊 Latences par section (ms) - {chemin}")
+        print(resume[['count', 'mean', '50%', '95%', 'max']].round(1).to_string())
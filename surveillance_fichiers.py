@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Surveillance des exports du formulaire
+Objectifs :
+- Détecter un nouvel export déposé dans un dossier ou la mise à jour du fichier source
+- Utiliser inotify (via watchdog) si disponible, sinon une scrutation périodique
+- Attendre que le fichier soit complètement écrit avant de le traiter
+- Donner un battement régulier aux traitements qui suivent l'horloge (fermeture des heures)
+"""
+
+import os
+import threading
+import time
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    WATCHDOG_DISPONIBLE = True
+except ImportError:
+    WATCHDOG_DISPONIBLE = False
+
+EXTENSIONS_SURVEILLEES = ('.xlsx',)
+
+
+class SurveillantFichiers:
+    """
+    Appelle rappel(chemin) quand un fichier surveillé est créé ou modifié.
+    chemins : fichiers et/ou dossiers de dépôt
+    extensions : extensions des fichiers surveillés
+    tic : appelé sans argument à chaque tour de la boucle de surveillance (optionnel)
+    """
+
+    def __init__(self, chemins, rappel, intervalle=2.0, delai_stabilite=1.0, extensions=EXTENSIONS_SURVEILLEES,
+                 tic=None):
+        self.chemins = [os.path.abspath(c) for c in chemins]
+        self.rappel = rappel
+        self.tic = tic
+        self.extensions = tuple(extensions)
+        self.intervalle = intervalle
+        self.delai_stabilite = delai_stabilite
+        self.mode = None
+
+        self._arret = threading.Event()
+        self._etats = {}
+        self._vus = {}
+        self._en_attente = {}
+        self._verrou = threading.Lock()
+        self._observateur = None
+        self._thread = None
+
+    def _fichiers(self):
+        for chemin in self.chemins:
+            if os.path.isdir(chemin):
+                for nom in os.listdir(chemin):
+                    if nom.endswith(self.extensions) and not nom.startswith('~$'):
+                        yield os.path.join(chemin, nom)
+            elif os.path.isfile(chemin):
+                yield chemin
+
+    def _est_surveille(self, chemin):
+        chemin = os.path.abspath(chemin)
+        if not chemin.endswith(self.extensions) or os.path.basename(chemin).startswith('~$'):
+            return False
+        return chemin in self.chemins or os.path.dirname(chemin) in self.chemins
+
+    @staticmethod
+    def _etat(chemin):
+        try:
+            infos = os.stat(chemin)
+            return infos.st_mtime_ns, infos.st_size
+        except OSError:
+            return None
+
+    def demarrer(self):
+        """
+        Démarre la surveillance en arrière-plan (les fichiers existants ne déclenchent rien)
+        """
+        self._etats = {chemin: self._etat(chemin) for chemin in self._fichiers()}
+        self._vus = dict(self._etats)
+
+        if WATCHDOG_DISPONIBLE:
+            self.mode = 'inotify'
+            self._observateur = Observer()
+            gestionnaire = _GestionnaireEvenements(self)
+            dossiers = {c if os.path.isdir(c) else os.path.dirname(c) for c in self.chemins}
+            for dossier in dossiers:
+                if os.path.isdir(dossier):
+                    self._observateur.schedule(gestionnaire, dossier, recursive=False)
+            self._observateur.daemon = True
+            self._observateur.start()
+        else:
+            self.mode = 'scrutation'
+
+        # Le thread sert à la scrutation et à la temporisation des événements inotify
+        self._thread = threading.Thread(target=self._boucle, name="surveillance-exports", daemon=True)
+        self._thread.start()
+        print(f"👀 Surveillance des exports ({self.mode}) : {', '.join(self.chemins)}")
+
+    def arreter(self):
+        self._arret.set()
+        if self._observateur is not None:
+            self._observateur.stop()
+
+    def signaler(self, chemin):
+        """
+        Note un changement ; le rappel sera déclenché une fois le fichier stable
+        """
+        if self._est_surveille(chemin):
+            with self._verrou:
+                self._en_attente[os.path.abspath(chemin)] = time.monotonic()
+
+    def _boucle(self):
+        while not self._arret.wait(self.intervalle if self.mode == 'scrutation' else 0.5):
+            if self.mode == 'scrutation':
+                for chemin in self._fichiers():
+                    etat = self._etat(chemin)
+                    if etat != self._vus.get(chemin):
+                        self._vus[chemin] = etat
+                        self.signaler(chemin)
+            self._traiter_en_attente()
+            if self.tic is not None:
+                try:
+                    self.tic()
+                except Exception as e:
+                    print(f"❌ Erreur lors du battement de la surveillance : {e}")
+
+    def _traiter_en_attente(self):
+        maintenant = time.monotonic()
+        with self._verrou:
+            prets = [c for c, t in self._en_attente.items() if maintenant - t >= self.delai_stabilite]
+            for chemin in prets:
+                del self._en_attente[chemin]
+
+        for chemin in prets:
+            etat = self._etat(chemin)
+            if etat is None or etat == self._etats.get(chemin):
+                continue
+            self._etats[chemin] = etat
+            try:
+                self.rappel(chemin)
+            except Exception as e:
+                print(f"❌ Erreur lors de l'intégration de {chemin}: {e}")
+
+
+if WATCHDOG_DISPONIBLE:
+    class _GestionnaireEvenements(FileSystemEventHandler):
+        def __init__(self, surveillant):
+            self.surveillant = surveillant
+
+        def on_created(self, event):
+            if not event.is_directory:
+                self.surveillant.signaler(event.src_path)
+
+        def on_modified(self, event):
+            if not event.is_directory:
+                self.surveillant.signaler(event.src_path)
+
+        def on_moved(self, event):
+            if not event.is_directory:
+                self.surveillant.signaler(event.dest_path)
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Estimation de la mémoire des index dérivés et de leurs résultats publiés
+Objectifs :
+- Mesurer tableaux NumPy (chaînes Python des tableaux object comprises), séries et tables pandas,
+  dictionnaires, compteurs et objets publiés (OrdresTri, RechercheTexte, SommesPrefixes...)
+- Ne compter qu'une fois un objet partagé entre l'état d'un index et son résultat publié
+- Ne pas dépendre de Streamlit
+"""
+
+import sys
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+
+def octets(*objets, vus=None):
+    """
+    Mémoire (en octets) des objets donnés et de leur contenu.
+    vus : identifiants des objets déjà comptés, à partager entre plusieurs appels
+    """
+    vus = set() if vus is None else vus
+    total = 0
+    pile = list(objets)
+    while pile:
+        objet = pile.pop()
+        if objet is None or id(objet) in vus:
+            continue
+        vus.add(id(objet))
+        if isinstance(objet, pd.DataFrame):
+            total += int(objet.memory_usage(deep=True).sum())
+        elif isinstance(objet, (pd.Series, pd.Index)):
+            total += int(objet.memory_usage(deep=True))
+        elif isinstance(objet, np.ndarray):
+            total += objet.nbytes
+            if objet.dtype == object:
+                total += sum(sys.getsizeof(valeur) for valeur in objet.ravel())
+        elif isinstance(objet, dict):
+            total += sys.getsizeof(objet)
+            pile.extend(objet.keys())
+            pile.extend(objet.values())
+        elif isinstance(objet, (list, tuple, set, frozenset, deque)):
+            total += sys.getsizeof(objet)
+            pile.extend(objet)
+        elif hasattr(objet, '__dict__') and not isinstance(objet, (pd.Timestamp, pd.Timedelta, type(pd.NaT))):
+            # Objet publié : ses attributs
+            total += sys.getsizeof(objet)
+            pile.append(vars(objet))
+        else:
+            total += sys.getsizeof(objet)
+    return total
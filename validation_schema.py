@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Validation du jeu de données par schéma
+Objectifs :
+- Décrire le schéma attendu (types, catégories, plages, formats) de façon déclarative
+- Compiler le schéma une fois en règles vectorisées (masques de colonnes)
+- Évaluer chaque règle sur les valeurs distinctes de la colonne (une factorisation par colonne)
+- Envoyer les lignes en échec dans un fichier de quarantaine avec leurs codes de rejet
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+# Valeurs considérées comme manquantes (astype(str) transforme NaN en 'nan')
+VALEURS_MANQUANTES = ['', 'nan', 'none', 'nat']
+
+REGEX_EMAIL = r"[^@\s]+@[^@\s]+\.[A-Za-z]{2,}"
+# Format international produit par nettoyer_telephone (ex. +33 6 55 97 55 65)
+REGEX_TELEPHONE = r"\+\d[\d \-]{6,20}"
+
+# Schéma du fichier nettoyé. Une règle « bloquante » exclut la ligne du jeu de données ;
+# les autres envoient seulement la ligne en quarantaine pour information.
+SCHEMA_DONNEES = {
+    'horodateur': {'type': 'date', 'obligatoire': True, 'bloquante': True},
+    'date_de_naissance': {'type': 'date'},
+    'pays': {'type': 'texte', 'obligatoire': True, 'interdit': r"\d+", 'bloquante': True},
+    'age': {'type': 'nombre', 'min': 10, 'max': 100},
+    'tranche_age': {'categories': ['<18', '18-25', '25-30', '30-35', '35-40', '40+']},
+    'prix_pack_fcfa': {'type': 'nombre', 'min': 0, 'max': 1000000, 'bloquante': True},
+    'type_pack': {'categories': ['Essentiel', 'Standard', 'Premium', 'Avantage']},
+    'methode_paiement_std': {'categories': ['Mobile Money', 'Carte Bancaire', 'Transfert International',
+                                            'Cryptomonnaie', 'Autre', 'Pas de moyen']},
+    'adresse_e-mail': {'format': REGEX_EMAIL},
+    'numero_de_telephone': {'format': REGEX_TELEPHONE},
+}
+
+
+class Regle:
+    """
+    Règle compilée : test(valeurs) retourne True pour les valeurs distinctes en échec.
+    Les valeurs manquantes ne sont testées que par la règle « manquant ».
+    """
+
+    def __init__(self, colonne, nom, test, bloquante=False):
+        self.colonne = colonne
+        self.nom = nom
+        self.code = f"{colonne}:{nom}"
+        self.test = test
+        self.bloquante = bloquante
+        self.sur_manquantes = nom == 'manquant'
+
+
+def _absentes(valeurs):
+    if valeurs.dtype == object or pd.api.types.is_string_dtype(valeurs):
+        return valeurs.astype(str).str.strip().str.lower().isin(VALEURS_MANQUANTES).to_numpy()
+    return valeurs.isna().to_numpy()
+
+
+def _date_invalide(valeurs):
+    if pd.api.types.is_datetime64_any_dtype(valeurs):
+        return np.zeros(len(valeurs), dtype=bool)
+    return pd.to_datetime(valeurs.astype(str), dayfirst=True, errors='coerce').isna()
+
+
+def compiler_schema(schema=SCHEMA_DONNEES):
+    """
+    Transforme le schéma déclaratif en liste de règles vectorisées
+    """
+    regles = []
+    for colonne, spec in schema.items():
+        bloquante = spec.get('bloquante', False)
+
+        if spec.get('obligatoire'):
+            regles.append(Regle(colonne, 'manquant', _absentes, bloquante))
+
+        type_attendu = spec.get('type')
+        if type_attendu == 'date':
+            regles.append(Regle(colonne, 'date_invalide', _date_invalide, bloquante))
+        elif type_attendu == 'nombre':
+            def hors_plage(valeurs, mini=spec.get('min'), maxi=spec.get('max')):
+                nombres = pd.to_numeric(valeurs, errors='coerce')
+                echec = nombres.isna()
+                if mini is not None:
+                    echec |= nombres < mini
+                if maxi is not None:
+                    echec |= nombres > maxi
+                return echec
+            regles.append(Regle(colonne, 'hors_plage', hors_plage, bloquante))
+
+        if 'categories' in spec:
+            autorisees = set(spec['categories'])
+            regles.append(Regle(colonne, 'categorie_inconnue',
+                                lambda v, a=autorisees: ~v.astype(str).str.strip().isin(a), bloquante))
+
+        if 'format' in spec:
+            motif = re.compile(spec['format'])
+            regles.append(Regle(colonne, 'format_invalide',
+                                lambda v, m=motif: ~v.astype(str).str.strip().str.fullmatch(m), bloquante))
+
+        if 'interdit' in spec:
+            motif = re.compile(spec['interdit'])
+            regles.append(Regle(colonne, 'valeur_interdite',
+                                lambda v, m=motif: v.astype(str).str.strip().str.fullmatch(m), bloquante))
+    return regles
+
+
+REGLES_DONNEES = compiler_schema()
+
+
+def valider(df, regles=REGLES_DONNEES, chemin_quarantaine=None):
+    """
+    Évalue toutes les règles en une passe.
+
+    Retourne (df_valide, df_quarantaine, comptes) :
+    - df_valide : lignes sans échec bloquant
+    - df_quarantaine : lignes avec au moins un échec, colonnes codes_rejet et exclue en tête
+    - comptes : nombre de lignes en échec par code de règle
+    """
+    exclues = np.zeros(len(df), dtype=bool)
+    en_echec = np.zeros(len(df), dtype=bool)
+    masques = {}
+    distinctes = {}
+    for regle in regles:
+        if regle.colonne not in df.columns:
+            continue
+        # Une factorisation par colonne : les règles ne voient que les valeurs distinctes
+        if regle.colonne not in distinctes:
+            codes, valeurs = pd.factorize(df[regle.colonne])
+            valeurs = pd.Series(valeurs)
+            distinctes[regle.colonne] = (codes, valeurs, _absentes(valeurs))
+        codes, valeurs, absentes = distinctes[regle.colonne]
+
+        if regle.sur_manquantes:
+            echecs = absentes
+        else:
+            echecs = np.asarray(regle.test(valeurs), dtype=bool) & ~absentes
+        # Le code -1 (NaN) lit la dernière case : manquant en échec seulement pour la règle « manquant »
+        masque = np.append(echecs, regle.sur_manquantes)[codes]
+        if masque.any():
+            masques[regle.code] = masque
+            en_echec |= masque
+            if regle.bloquante:
+                exclues |= masque
+
+    comptes = pd.Series({code: int(m.sum()) for code, m in masques.items()}, dtype='int64')
+
+    # Codes de rejet : un bit par règle, chaque combinaison distincte n'est nommée qu'une fois
+    positions = np.flatnonzero(en_echec)
+    liste_codes = list(masques)
+    motifs = np.zeros(len(positions), dtype=np.int64)
+    for bit, code in enumerate(liste_codes):
+        motifs |= masques[code][positions].astype(np.int64) << bit
+    combinaisons, inverse = np.unique(motifs, return_inverse=True)
+    noms = np.array([';'.join(c for bit, c in enumerate(liste_codes) if (m >> bit) & 1)
+                     for m in combinaisons.tolist()], dtype=object)
+
+    quarantaine = df.iloc[positions].copy()
+    quarantaine.insert(0, 'codes_rejet', noms[inverse.ravel()])
+    quarantaine.insert(1, 'exclue', exclues[positions])
+
+    if chemin_quarantaine:
+        ecrire_quarantaine(quarantaine, comptes, chemin_quarantaine)
+
+    return df[~exclues], quarantaine, comptes
+
+
+def ecrire_quarantaine(quarantaine, comptes, chemin):
+    """
+    Écrit les lignes en quarantaine (chemin) et le nombre de lignes par code de rejet (*_resume.csv)
+    """
+    if len(quarantaine) == 0:
+        return
+    quarantaine.to_csv(chemin, index=True, index_label='index_ligne', encoding='utf-8-sig')
+    comptes.rename_axis('code_rejet').rename('lignes').to_csv(
+        chemin.replace('.csv', '_resume.csv'), encoding='utf-8-sig')